@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 
+import sys
 from argparse import Namespace
-from asyncio.exceptions import CancelledError
 from functools import lru_cache
 from typing import Callable, Dict
 
@@ -10,16 +10,22 @@ from mwfilter.apps.clear import clear_main
 from mwfilter.apps.down import down_main
 from mwfilter.apps.exclude import exclude_main
 from mwfilter.apps.image import image_main
+from mwfilter.apps.import_ import import_main
 from mwfilter.apps.index import index_main
+from mwfilter.apps.merge import merge_main
 from mwfilter.apps.nav import nav_main
+from mwfilter.apps.sync import sync_main
 from mwfilter.arguments import (
     CMD_BUILD,
     CMD_CLEAN,
     CMD_DOWN,
     CMD_EXCLUDE,
     CMD_IMAGE,
+    CMD_IMPORT,
     CMD_INDEX,
+    CMD_MERGE,
     CMD_NAV,
+    CMD_SYNC,
 )
 from mwfilter.logging.logging import logger
 
@@ -32,11 +38,21 @@ def cmd_apps() -> Dict[str, Callable[[Namespace], None]]:
         CMD_DOWN: down_main,
         CMD_EXCLUDE: exclude_main,
         CMD_IMAGE: image_main,
+        CMD_IMPORT: import_main,
         CMD_INDEX: index_main,
+        CMD_MERGE: merge_main,
         CMD_NAV: nav_main,
+        CMD_SYNC: sync_main,
     }
 
 
+def is_cancelled_error(e: BaseException) -> bool:
+    # An asyncio cancellation can only be raised if asyncio has been imported,
+    # so avoid importing it just to run a command.
+    asyncio = sys.modules.get("asyncio")
+    return asyncio is not None and isinstance(e, asyncio.CancelledError)
+
+
 def run_app(cmd: str, args: Namespace) -> int:
     apps = cmd_apps()
 
@@ -47,8 +63,6 @@ def run_app(cmd: str, args: Namespace) -> int:
 
     try:
         app(args)
-    except CancelledError:
-        logger.debug("An cancelled signal was detected")
     except (KeyboardInterrupt, InterruptedError):
         logger.warning("An interrupt signal was detected")
     except SystemExit as e:
@@ -57,6 +71,9 @@ def run_app(cmd: str, args: Namespace) -> int:
             logger.warning(f"A system shutdown has been detected ({e.code})")
         return e.code
     except BaseException as e:
+        if is_cancelled_error(e):
+            logger.debug("An cancelled signal was detected")
+            return 0
         logger.exception(e)
         return 1
 
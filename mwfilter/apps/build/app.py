@@ -2,23 +2,70 @@
 
 import os
 from argparse import Namespace
-from multiprocessing import Pool, cpu_count
+from multiprocessing import Pool
+from multiprocessing.pool import ThreadPool
 from pathlib import Path
-from typing import List, NamedTuple, Optional
+from time import monotonic
+from threading import local
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Final,
+    Iterable,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
 
 import yaml
 from type_serialize import deserialize
 
-from mwfilter.arguments import METHOD_VERSIONS
+from mwfilter.arguments import (
+    DEFAULT_IMAGE_PAGE,
+    EXECUTOR_AUTO,
+    EXECUTOR_PROCESS,
+    EXECUTOR_SERIAL,
+    EXECUTOR_THREAD,
+    EXECUTORS,
+    METHOD_VERSIONS,
+)
 from mwfilter.logging.logging import logger
-from mwfilter.arguments import DEFAULT_IMAGE_PAGE
-from mwfilter.mw.cache_dirs import pages_cache_dirpath, exclude_filepath
+from mwfilter.mw.build_report import BuildFailure, BuildReport
+from mwfilter.mw.cache_dirs import exclude_filepath
 from mwfilter.mw.convert_info import ConvertInfo
 from mwfilter.mw.exclude import Exclude
 from mwfilter.mw.image_list import ImageList
 from mwfilter.pandoc.markdown.dumper import PandocToMarkdownDumper
 from mwfilter.paths.expand_abspath import expand_abspath
+from mwfilter.store import open_page_store
+from mwfilter.store.page_store import PageStore
 from mwfilter.system.ask import ask_continue, ask_overwrite
+from mwfilter.system.atomic import DirSync, atomic_write_text
+from mwfilter.system.cpu import usable_cpu_count
+from mwfilter.system.metrics import (
+    CONVERSION_LATENCY,
+    ERRORS,
+    PAGES_CONVERTED,
+    SKIPPED,
+    metrics,
+)
+from mwfilter.system.progress import Progress, format_seconds
+from mwfilter.system.shard import Shard, parse_shard, selection_digest
+from mwfilter.system.timing import (
+    STAGE_DISCOVER,
+    STAGE_WRITE,
+    StageRecord,
+    StageTimer,
+    current_timer,
+    timing,
+    timing_page,
+    use_timer,
+)
+
+DEFAULT_BUILD_CHUNKSIZE: Final[int] = 1
 
 
 class BuildTuple(NamedTuple):
@@ -27,29 +74,129 @@ class BuildTuple(NamedTuple):
     docs_dirpath: Path
     method_version: int
     info: ConvertInfo
+    fsync: bool = False
+    hostname: str = str()
+
+
+class BuildResult(NamedTuple):
+    i: int
+    filename: str
+    elapsed: float
+    error: Optional[str] = None
+    timings: Tuple[StageRecord, ...] = tuple()
+    hostname: str = str()
+
+
+class BuildLinks(NamedTuple):
+    # The link targets of the pages of one host.
     filenames: List[str]
     image_names: List[str]
 
 
-class ExcludeTuple(NamedTuple):
-    exclude: Exclude
-    info: ConvertInfo
+class BuildHost(NamedTuple):
+    hostname: str
+    docs_dirpath: Path
+    infos: List[ConvertInfo]
+    links: BuildLinks
 
 
 class BuildError(Exception):
     pass
 
 
+_worker_local = local()
+
+
+def init_build_worker(links: Mapping[str, BuildLinks]) -> None:
+    # [IMPORTANT]
+    # The filename and image lists are shared by every page, so they are sent to
+    # each worker only once instead of being pickled along with every task.
+    # The dumper keeps per-document state, so each worker thread owns one per host.
+    _worker_local.links = dict(links)
+    _worker_local.dumpers = dict()
+
+
+def worker_dumper(hostname: str) -> PandocToMarkdownDumper:
+    dumpers: Dict[str, PandocToMarkdownDumper] = _worker_local.dumpers
+    dumper = dumpers.get(hostname)
+    if dumper is None:
+        links: BuildLinks = _worker_local.links[hostname]
+        dumper = PandocToMarkdownDumper(
+            links.filenames,
+            no_abspath=True,
+            image_names=links.image_names,
+        )
+        dumpers[hostname] = dumper
+    return dumper
+
+
+def parse_build_host(value: str) -> Tuple[str, str]:
+    hostname, separator, mkdocs_yml = value.partition("=")
+    if not separator or not hostname.strip() or not mkdocs_yml.strip():
+        raise ValueError(f"Expected 'HOSTNAME=MKDOCS_YML', not {value!r}")
+    return hostname.strip(), mkdocs_yml.strip()
+
+
+def read_exclude(exclude_yml: Path) -> Exclude:
+    with exclude_yml.open("rt", encoding="utf-8") as f:
+        exclude = deserialize(yaml.safe_load(f), Exclude)
+        assert isinstance(exclude, Exclude)
+        return exclude
+
+
+def read_image_names(store: PageStore) -> List[str]:
+    if not store.exists(DEFAULT_IMAGE_PAGE):
+        return list()
+    mediawiki_content = store.get_text(DEFAULT_IMAGE_PAGE)
+    image_list = ImageList.from_mediawiki_content(mediawiki_content)
+    logger.info(f"Loaded {len(image_list.images)} image names from whitelist")
+    return image_list.images
+
+
+def select_executor(executor: str, jobs: int, method_version: int) -> str:
+    if executor != EXECUTOR_AUTO:
+        return executor
+    if jobs <= 1:
+        return EXECUTOR_SERIAL
+    if method_version == 1:
+        return EXECUTOR_THREAD
+    return EXECUTOR_PROCESS
+
+
+def read_docs_dirpath(mkdocs_yml: Path) -> Path:
+    with mkdocs_yml.open("rt", encoding="utf-8") as f:
+        mkdocs = yaml.safe_load(f)
+
+    if not isinstance(mkdocs, dict):
+        raise TypeError(f"Unexpected mkdocs types: {type(mkdocs).__name__}")
+
+    site_name = mkdocs.get("site_name")
+    logger.info(f"Site name: '{site_name}'")
+
+    docs_dir = mkdocs.get("docs_dir", "docs")
+    logger.info(f"Docs dir: '{docs_dir}'")
+
+    return mkdocs_yml.parent / docs_dir
+
+
+def schedule_largest_first(items: List[BuildTuple]) -> List[BuildTuple]:
+    # Longest-processing-time-first: the most expensive pages start immediately,
+    # and the many small pages fill the gaps at the end of the build.
+    return sorted(items, key=lambda x: (-x.info.cost, x.i))
+
+
 class BuildApp:
     def __init__(self, args: Namespace):
         assert isinstance(args.hostname, str)
         assert isinstance(args.cache_dir, str)
-        assert args.hostname
+        assert args.hostname or args.hosts
         assert os.path.isdir(args.cache_dir)
 
         # Common arguments
         assert isinstance(args.yes, bool)
         assert isinstance(args.ignore_errors, bool)
+        assert isinstance(args.page_store, str)
+        assert isinstance(args.fsync, bool)
         assert isinstance(args.debug, bool)
         assert isinstance(args.verbose, int)
 
@@ -62,6 +209,11 @@ class BuildApp:
         assert isinstance(args.pages, list)
         assert isinstance(args.start_index, int)
         assert isinstance(args.jobs, int)
+        assert isinstance(args.executor, str)
+        assert args.executor in EXECUTORS
+        assert isinstance(args.hosts, (type(None), list))
+        assert isinstance(args.shard, str)
+        assert isinstance(args.report, str)
 
         self._hostname = args.hostname
         self._yes = args.yes
@@ -69,163 +221,322 @@ class BuildApp:
         self._debug = args.debug
         self._verbose = args.verbose
         self._method_version = args.method_version
-        self._pages_dir = pages_cache_dirpath(args.cache_dir, self._hostname)
-        self._exclude_yml = exclude_filepath(args.cache_dir, self._hostname)
+        self._cache_dir = args.cache_dir
+        self._page_store = args.page_store
+        self._fsync = args.fsync
         self._start_index = args.start_index
         self._mkdocs_yml = Path(expand_abspath(args.mkdocs_yml))
         self._all = args.all
         self._dry_run = args.dry_run
         self._pages = list(str(page_name) for page_name in args.pages)
-        self._jobs = args.jobs if 1 <= args.jobs else (cpu_count() * 2)
+        self._jobs = args.jobs if 1 <= args.jobs else usable_cpu_count()
+        self._hosts = [parse_build_host(str(x)) for x in args.hosts or list()]
+        self._shard = parse_shard(args.shard) if args.shard else None
+        self._report = Path(expand_abspath(args.report)) if args.report else None
+        self._executor = select_executor(
+            args.executor,
+            self._jobs,
+            self._method_version,
+        )
 
-    @staticmethod
-    def find_json_files_recursively(root_dir: Path) -> List[Path]:
-        result = list()
-        for dirpath, dirnames, filenames in root_dir.walk():
-            for filename in filenames:
-                if filename.endswith(".json"):
-                    result.append(dirpath / filename)
-        return result
+        # The pages selected before sharding, the pages of this shard,
+        # and the pages that could not be read.
+        self._selected: List[str] = list()
+        self._assigned: List[str] = list()
+        self._read_errors: Dict[str, str] = dict()
 
-    def all_json_files(self) -> List[Path]:
-        return self.find_json_files_recursively(self._pages_dir)
+    def selected_filenames(self, store: PageStore) -> List[str]:
+        if self._all or self._hosts:
+            return store.filenames()
 
-    def specified_json_files(self) -> List[Path]:
         result = list()
         for page_name in self._pages:
-            filepath = self._pages_dir / (page_name + ".json")
-            if not filepath.is_file():
-                raise FileNotFoundError(f"Not found JSON file: '{str(filepath)}'")
-            result.append(filepath)
+            if not store.exists(page_name):
+                location = store.location(page_name)
+                raise FileNotFoundError(f"Page not found: '{location}'")
+            result.append(page_name)
         return result
 
-    def selected_json_files(self) -> List[Path]:
-        if self._all:
-            return self.all_json_files()
-        else:
-            return self.specified_json_files()
-
-    def create_convert_infos(self) -> List[ConvertInfo]:
-        json_filenames = self.selected_json_files()
-        if not json_filenames:
-            raise FileNotFoundError(f"No JSON files found in '{self._pages_dir}'")
+    @staticmethod
+    def exclude_filter(exclude: Exclude, filenames: List[str]) -> List[str]:
+        result = list()
+        for filename in filenames:
+            if not exclude.filter_with_title(filename):
+                logger.warning(f"Filtered page: '{filename}'")
+                continue
+            result.append(filename)
+        return result
 
-        json_filenames.sort()
-        count = len(json_filenames)
+    def create_convert_infos(
+        self,
+        store: PageStore,
+        exclude: Exclude,
+    ) -> List[ConvertInfo]:
+        with timing(STAGE_DISCOVER):
+            filenames = self.selected_filenames(store)
+            if not filenames:
+                location = store.location(str())
+                raise FileNotFoundError(f"No pages found in '{location}'")
+
+            # [IMPORTANT]
+            # Excluded pages are dropped from the page listing, before any text is read.
+            filenames = self.exclude_filter(exclude, filenames)
+
+        filenames.sort()
+        self._selected = list(filenames)
+        if self._shard is not None:
+            # [IMPORTANT]
+            # Pages are assigned by a hash of their filename, before any text is
+            # read, so each shard only reads the pages it converts.
+            filenames = [f for f in filenames if self._shard.includes(f)]
+            logger.info(
+                f"Shard {self._shard}: {len(filenames)} "
+                f"of {len(self._selected)} pages"
+            )
+        self._assigned = list(filenames)
+
+        count = len(filenames)
         result = list()
 
-        for i, json_path in enumerate(json_filenames, start=1):
-            filename = json_path.name.removesuffix(".json")
+        for i, filename in enumerate(filenames, start=1):
             logger.debug(f"Read ({i}/{count}): {filename}")
 
             try:
-                wiki_path = json_path.parent / f"{filename}.wiki"
-                info = ConvertInfo.from_paths(json_path, wiki_path)
+                with timing_page(filename):
+                    info = ConvertInfo.from_store(store, filename)
                 result.append(info)
             except BaseException as e:
                 if self._ignore_errors:
                     logger.error(e)
+                    self._read_errors[filename] = f"{type(e).__name__}: {e}"
                 else:
                     raise
+
+        if imported := sum(1 for info in result if info.meta.from_dump):
+            logger.warning(
+                f"{imported} page(s) imported from a dump have no templates "
+                "expanded; Run 'down --all --sync' or 'sync' to refetch them"
+            )
         return result
 
     @staticmethod
-    def build(item: BuildTuple) -> None:
+    def build(item: BuildTuple) -> BuildResult:
         i = item.i
         max_index = item.max_index
         docs_dirpath = item.docs_dirpath
         method_version = item.method_version
         info = item.info
-        filenames = item.filenames
-        image_names = item.image_names
-        dumper = PandocToMarkdownDumper(
-            filenames,
-            no_abspath=True,
-            image_names=image_names,
-        )
+        dumper = worker_dumper(item.hostname)
 
-        logger.info(f"Converting ({i}/{max_index}) {info.filename} ...")
+        logger.debug(f"Converting ({i}/{max_index}) {info.filename} ...")
+        begin = monotonic()
 
         path = docs_dirpath / info.markdown_filename
         info_ver = info.meta.method_version
         ver = info_ver if info_ver is not None else method_version
+        timer = StageTimer(keep_records=True)
+        error: Optional[str] = None
         try:
-            text = info.as_markdown(ver, dumper=dumper)
-        except BaseException as e:
-            raise BuildError(f"Convert error ({i}/{max_index}) {info.filename}") from e
-        path.parent.mkdir(parents=True, exist_ok=True)
-        path.write_text(text)
-
-    @staticmethod
-    def exclude_filter(item: ExcludeTuple) -> Optional[ConvertInfo]:
-        exclude = item.exclude
-        info = item.info
-
-        if not exclude.filter_with_title(info.filename):
-            logger.warning(f"Filtered page: '{info.filename}'")
-            return None
-
-        return info
+            with use_timer(timer, info.filename):
+                text = info.as_markdown(ver, dumper=dumper)
+                with timing(STAGE_WRITE):
+                    atomic_write_text(path, text, fsync=item.fsync)
+        except Exception as e:
+            logger.debug(f"Convert error ({i}/{max_index}) {info.filename}", exc_info=e)
+            error = f"{type(e).__name__}: {e}"
+
+        elapsed = monotonic() - begin
+        timings = tuple(timer.records())
+        return BuildResult(i, info.filename, elapsed, error, timings, item.hostname)
+
+    def result_name(self, result: BuildResult) -> str:
+        if self._hosts:
+            return f"{result.hostname}/{result.filename}"
+        return result.filename
+
+    def collect_results(
+        self,
+        results: Iterable[BuildResult],
+        progress: Progress,
+    ) -> List[BuildResult]:
+        failures: List[BuildResult] = list()
+        timer = current_timer()
+        for result in results:
+            progress.update()
+            if timer is not None:
+                timer.merge(result.timings)
+            name = self.result_name(result)
+            if result.error is None:
+                metrics().inc(PAGES_CONVERTED)
+                metrics().observe(CONVERSION_LATENCY, result.elapsed)
+                elapsed = f"{result.elapsed:.2f}s"
+                logger.info(f"Converted [{progress}] {name} ({elapsed})")
+                continue
+
+            failures.append(result)
+            metrics().inc(ERRORS)
+            logger.error(f"Convert error [{progress}] {name}")
+            if not self._ignore_errors:
+                raise BuildError(f"Convert error ({result.i}) {name}: {result.error}")
+        return failures
+
+    def log_summary(self, progress: Progress, failures: List[BuildResult]) -> None:
+        converted = progress.done - len(failures)
+        elapsed = format_seconds(progress.elapsed)
+        logger.info(
+            f"Build complete: {converted} converted, {len(failures)} failed "
+            f"({elapsed}, {progress.throughput:.2f} pages/s)"
+        )
+        for failure in sorted(failures, key=lambda x: x.i):
+            name = self.result_name(failure)
+            logger.error(f"Failed ({failure.i}) {name}: {failure.error}")
+
+    def create_pool(self, links: Mapping[str, BuildLinks]):
+        pool_types: Dict[str, Callable[..., Any]] = {
+            EXECUTOR_PROCESS: Pool,
+            EXECUTOR_THREAD: ThreadPool,
+        }
+        pool_type = pool_types.get(self._executor)
+        if pool_type is None:
+            raise ValueError(f"Unsupported executor: {self._executor}")
+        return pool_type(
+            processes=self._jobs,
+            initializer=init_build_worker,
+            initargs=(links,),
+        )
 
-    def run(self) -> None:
-        if not self._mkdocs_yml.is_file():
-            mkdocs_yml = str(self._mkdocs_yml)
+    def convert(
+        self,
+        build_args: Iterable[BuildTuple],
+        links: Mapping[str, BuildLinks],
+        progress: Progress,
+    ) -> List[BuildResult]:
+        logger.info(f"Build with {self._jobs} {self._executor} job(s)")
+        if self._executor == EXECUTOR_SERIAL:
+            init_build_worker(links)
+            return self.collect_results(map(self.build, build_args), progress)
+
+        with self.create_pool(links) as pool:
+            results = pool.imap_unordered(
+                self.build,
+                build_args,
+                DEFAULT_BUILD_CHUNKSIZE,
+            )
+            return self.collect_results(results, progress)
+
+    def load_host(self, hostname: str, mkdocs_yml: Path) -> BuildHost:
+        if not mkdocs_yml.is_file():
             raise FileNotFoundError(f"Not found mkdocs config file: '{mkdocs_yml}'")
 
-        if not self._exclude_yml.is_file():
-            exclude_yml = str(self._exclude_yml)
+        exclude_yml = exclude_filepath(self._cache_dir, hostname)
+        if not exclude_yml.is_file():
             raise FileNotFoundError(f"Not found exclude file: '{exclude_yml}'")
 
-        with self._exclude_yml.open("rt", encoding="utf-8") as f:
-            exclude = deserialize(yaml.safe_load(f), Exclude)
-            assert isinstance(exclude, Exclude)
-
-        image_names: List[str] = list()
-        image_wiki_path = self._pages_dir / f"{DEFAULT_IMAGE_PAGE}.wiki"
-        if image_wiki_path.is_file():
-            mediawiki_content = image_wiki_path.read_text()
-            image_list = ImageList.from_mediawiki_content(mediawiki_content)
-            image_names = image_list.images
-            logger.info(f"Loaded {len(image_names)} image names from whitelist")
-
-        exclude_args: List[ExcludeTuple] = list()
-        for si in self.create_convert_infos():
-            exclude_args.append(ExcludeTuple(exclude, si))
-
-        infos = dict()
-
-        if 1 <= self._jobs:
-            with Pool(processes=self._jobs) as pool:
-                result = pool.map(self.exclude_filter, exclude_args)
-                assert isinstance(result, list)
-                for ci in result:
-                    if ci is None:
-                        continue
-                    assert isinstance(ci, ConvertInfo)
-                    infos[ci.filename] = ci
-        else:
-            for exclude_arg in exclude_args:
-                if ci := self.exclude_filter(exclude_arg):
-                    assert isinstance(ci, ConvertInfo)
-                    infos[ci.filename] = ci
-
-        with self._mkdocs_yml.open("rt", encoding="utf-8") as f:
-            mkdocs = yaml.safe_load(f)
-
-        if not isinstance(mkdocs, dict):
-            raise TypeError(f"Unexpected mkdocs types: {type(mkdocs).__name__}")
+        exclude = read_exclude(exclude_yml)
+        store = open_page_store(self._cache_dir, hostname, self._page_store)
+        with store:
+            image_names = read_image_names(store)
+            convert_infos = self.create_convert_infos(store, exclude)
+
+        infos = {ci.filename: ci for ci in convert_infos}
+        docs_dirpath = read_docs_dirpath(mkdocs_yml)
+
+        # Every shard links against all selected pages, not only its own.
+        link_names = self._selected if self._shard else list(infos.keys())
+        links = BuildLinks(link_names, image_names)
+        return BuildHost(hostname, docs_dirpath, list(infos.values()), links)
+
+    def create_report(
+        self,
+        build_args: List[BuildTuple],
+        failures: List[BuildResult],
+        progress: Progress,
+    ) -> BuildReport:
+        failed = {f.filename: f.error or str() for f in failures}
+        failed.update(self._read_errors)
+        converted = [a.info.filename for a in build_args]
+        shard = self._shard if self._shard is not None else Shard()
+        return BuildReport(
+            hostname=self._hostname,
+            shard_index=shard.number,
+            shard_count=shard.total,
+            total=len(self._selected),
+            selection=selection_digest(self._selected),
+            assigned=sorted(self._assigned),
+            converted=sorted(f for f in converted if f not in failed),
+            failed=[BuildFailure(k, v) for k, v in sorted(failed.items())],
+            elapsed=progress.elapsed,
+        )
 
-        site_name = mkdocs.get("site_name")
-        logger.info(f"Site name: '{site_name}'")
+    def run_hosts(self) -> None:
+        if self._shard is not None or self._report is not None:
+            raise ValueError("Sharded builds and build reports are for one host")
+        if not self._yes or self._dry_run:
+            raise ValueError("Building several hosts requires '--yes' and no dry run")
+        if self._pages or self._start_index:
+            raise ValueError("Building several hosts always builds all pages")
+
+        hostnames = [hostname for hostname, _ in self._hosts]
+        if len(set(hostnames)) != len(hostnames):
+            raise ValueError(f"Duplicated hostnames: {hostnames}")
+
+        hosts: List[BuildHost] = list()
+        for hostname, mkdocs_yml in self._hosts:
+            logger.info(f"Load host: '{hostname}'")
+            host = self.load_host(hostname, Path(expand_abspath(mkdocs_yml)))
+            if any(h.docs_dirpath == host.docs_dirpath for h in hosts):
+                raise ValueError(f"Docs dir shared by several hosts: '{mkdocs_yml}'")
+            hosts.append(host)
+
+        # [IMPORTANT]
+        # The pages of all hosts are scheduled together on one pool,
+        # so the machine runs one set of workers however many hosts are built.
+        build_args: List[BuildTuple] = list()
+        for host in hosts:
+            max_index = len(host.infos) - 1
+            for i, info in enumerate(host.infos):
+                item = BuildTuple(
+                    i,
+                    max_index,
+                    host.docs_dirpath,
+                    self._method_version,
+                    info,
+                    self._fsync,
+                    host.hostname,
+                )
+                build_args.append(item)
 
-        docs_dir = mkdocs.get("docs_dir", "docs")
-        logger.info(f"Docs dir: '{docs_dir}'")
+        build_args = schedule_largest_first(build_args)
+        progress = Progress(len(build_args))
+        links = {host.hostname: host.links for host in hosts}
+        failures = self.convert(build_args, links, progress)
+
+        dir_sync = DirSync(self._fsync)
+        dir_sync.update(a.docs_dirpath / a.info.markdown_filename for a in build_args)
+        for host in hosts:
+            failed = sum(1 for x in failures if x.hostname == host.hostname)
+            converted = len(host.infos) - failed
+            logger.info(
+                f"Host '{host.hostname}': {converted} converted, {failed} failed"
+            )
+        self.log_summary(progress, failures)
+        dir_sync.sync()
 
-        docs_dirpath = self._mkdocs_yml.parent / docs_dir
-        values = list(infos.values())
-        source_count = len(infos)
+    def run(self) -> None:
+        if self._hosts:
+            self.run_hosts()
+            return
+        if self._report is not None and (not self._yes or self._dry_run):
+            raise ValueError("A build report requires '--yes' and no dry run")
+
+        host = self.load_host(self._hostname, self._mkdocs_yml)
+        docs_dirpath = host.docs_dirpath
+        values = host.infos
+        source_count = len(values)
         max_index = source_count - 1
-        filenames = list(infos.keys())
+        filenames = host.links.filenames
+        image_names = host.links.image_names
+        dir_sync = DirSync(self._fsync)
 
         if self._yes and not self._dry_run:
             build_args: List[BuildTuple] = list()
@@ -236,13 +547,21 @@ class BuildApp:
                     docs_dirpath,
                     self._method_version,
                     values[i],
-                    filenames,
-                    image_names,
+                    self._fsync,
+                    self._hostname,
                 )
                 build_args.append(item)
 
-            with Pool(processes=self._jobs) as pool:
-                pool.map(self.build, build_args)
+            build_args = schedule_largest_first(build_args)
+            progress = Progress(len(build_args))
+            links = {self._hostname: host.links}
+            failures = self.convert(build_args, links, progress)
+            dir_sync.update(docs_dirpath / a.info.markdown_filename for a in build_args)
+            self.log_summary(progress, failures)
+            if self._report is not None:
+                report = self.create_report(build_args, failures, progress)
+                report.save(self._report, self._fsync)
+                logger.info(f"Saved build report: '{self._report}'")
         else:
             for i in range(self._start_index, source_count):
                 info = values[i]
@@ -250,6 +569,7 @@ class BuildApp:
                 markdown_path = docs_dirpath / info.markdown_filename
 
                 if not ask_overwrite(markdown_path, force_yes=self._yes):
+                    metrics().inc(SKIPPED)
                     continue
 
                 if info.meta.method_version is not None:
@@ -262,7 +582,10 @@ class BuildApp:
                     no_abspath=True,
                     image_names=image_names,
                 )
-                markdown_text = info.as_markdown(method_version, dumper=dumper)
+                begin = monotonic()
+                with timing_page(info.filename):
+                    markdown_text = info.as_markdown(method_version, dumper=dumper)
+                metrics().observe(CONVERSION_LATENCY, monotonic() - begin)
 
                 if not self._yes and self._debug and 2 <= self._verbose:
                     hr = "-" * 88
@@ -274,5 +597,9 @@ class BuildApp:
                 if self._dry_run:
                     continue
 
-                markdown_path.parent.mkdir(parents=True, exist_ok=True)
-                markdown_path.write_text(markdown_text)
+                with timing_page(info.filename), timing(STAGE_WRITE):
+                    atomic_write_text(markdown_path, markdown_text, fsync=self._fsync)
+                dir_sync.add(markdown_path)
+                metrics().inc(PAGES_CONVERTED)
+
+        dir_sync.sync()
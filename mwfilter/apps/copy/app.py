@@ -1,15 +1,13 @@
 # -*- coding: utf-8 -*-
 
-import json
 import os
 from argparse import Namespace
 
-from type_serialize import deserialize, serialize
-
 from mwfilter.logging.logging import logger
-from mwfilter.mw.cache_dirs import pages_cache_dirpath
 from mwfilter.mw.page_meta import PageMeta
-from mwfilter.system.ask import ask_overwrite
+from mwfilter.store import open_page_store
+from mwfilter.store.page_store import PageStore
+from mwfilter.system.ask import ask_overwrite_page
 
 
 class CopyApp:
@@ -21,6 +19,8 @@ class CopyApp:
 
         # Common arguments
         assert isinstance(args.yes, bool)
+        assert isinstance(args.page_store, str)
+        assert isinstance(args.fsync, bool)
 
         # Subparser arguments
         assert isinstance(args.src, str)
@@ -30,29 +30,23 @@ class CopyApp:
 
         self._hostname = args.hostname
         self._yes = args.yes
-        self._pages_dir = pages_cache_dirpath(args.cache_dir, self._hostname)
+        self._cache_dir = args.cache_dir
+        self._page_store = args.page_store
+        self._fsync = args.fsync
 
         self._src = args.src
         self._dest = args.dest
         self._namespace = args.namespace
         self._method_version = args.method_version
 
-    def save(self, meta: PageMeta, content: str) -> None:
-        meta_json = json.dumps(serialize(meta))
-        json_path = self._pages_dir / meta.json_filename
-        wiki_path = self._pages_dir / meta.wiki_filename
-
+    def save(self, store: PageStore, meta: PageMeta, content: str) -> None:
         try:
-            if ask_overwrite(json_path, force_yes=self._yes):
-                json_path.parent.mkdir(parents=True, exist_ok=True)
-                json_path.write_text(meta_json)
-
-            if ask_overwrite(wiki_path, force_yes=self._yes):
-                wiki_path.parent.mkdir(parents=True, exist_ok=True)
-                wiki_path.write_text(content)
+            if store.exists(meta.filename):
+                location = store.location(meta.filename)
+                if not ask_overwrite_page(location, force_yes=self._yes):
+                    return
+            store.put(meta, content)
         except BaseException as e:
-            json_path.unlink(missing_ok=True)
-            wiki_path.unlink(missing_ok=True)
             logger.error(e)
             raise
 
@@ -60,28 +54,29 @@ class CopyApp:
         if not self._src:
             raise ValueError("The 'src' argument is required")
 
-        json_path = self._pages_dir / f"{self._src}.json"
-        wiki_path = self._pages_dir / f"{self._src}.wiki"
-
-        if not json_path.is_file():
-            raise FileNotFoundError(f"File not found: '{str(wiki_path)}'")
-        if not wiki_path.is_file():
-            raise FileNotFoundError(f"File not found: '{str(wiki_path)}'")
-
-        json_text = json_path.read_bytes()
-        json_obj = json.loads(json_text)
-        meta = deserialize(json_obj, PageMeta)
-        assert isinstance(meta, PageMeta)
-        content = wiki_path.read_text()
-
-        meta.name = self._dest
-        meta.page_title = self._dest
-        meta.base_title = self._dest
-        meta.base_name = self._dest
-        if self._namespace is not None:
-            meta.namespace = self._namespace
-        if self._method_version is not None:
-            meta.method_version = self._method_version
-
-        self.save(meta, content)
+        store = open_page_store(
+            self._cache_dir,
+            self._hostname,
+            self._page_store,
+            fsync=self._fsync,
+        )
+        with store:
+            if not store.exists(self._src):
+                raise FileNotFoundError(
+                    f"Page not found: '{store.location(self._src)}'"
+                )
+
+            meta = store.get_meta(self._src)
+            content = store.get_text(self._src)
+
+            meta.name = self._dest
+            meta.page_title = self._dest
+            meta.base_title = self._dest
+            meta.base_name = self._dest
+            if self._namespace is not None:
+                meta.namespace = self._namespace
+            if self._method_version is not None:
+                meta.method_version = self._method_version
+
+            self.save(store, meta, content)
         logger.info(f"Copy complete: '{self._src}' -> '{self._dest}'")
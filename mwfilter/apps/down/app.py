@@ -1,20 +1,72 @@
 # -*- coding: utf-8 -*-
 
-import json
 import os
 from argparse import Namespace
-from typing import Optional, Sequence, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import count
+from pathlib import Path
+from queue import Queue
+from threading import Event
+from time import monotonic
+from typing import (
+    Callable,
+    Dict,
+    Final,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
 
 from mwclient import Site
 from mwclient.listing import RevisionsIterator
 from mwclient.page import Page
-from type_serialize import serialize
 
 from mwfilter.logging.logging import logger
-from mwfilter.mw.cache_dirs import exclude_filepath, pages_cache_dirpath
+from mwfilter.mw.allpages import TitleRange, iter_allpages_chunks, plan_title_ranges
+from mwfilter.mw.cache_dirs import down_state_filepath, template_index_filepath
+from mwfilter.mw.down_state import DownState
+from mwfilter.mw.expander import TemplateExpander, UnsupportedExpansion
+from mwfilter.mw.namespace import (
+    TEMPLATE_NAMESPACE,
+    listable_namespaces,
+    parse_namespaces,
+)
+from mwfilter.mw.page_diff import is_unchanged, vanished_filenames
 from mwfilter.mw.page_meta import PageMeta
 from mwfilter.mw.redirect import parse_redirect_pagename
-from mwfilter.system.ask import ask_overwrite
+from mwfilter.mw.site import HttpOptions, shared_site
+from mwfilter.mw.statistics import request_statistics
+from mwfilter.mw.template_index import TemplateIndex
+from mwfilter.mw.templates import request_revisions, request_templates
+from mwfilter.store import open_page_store
+from mwfilter.store.page_store import PageStore
+from mwfilter.system.ask import ask_overwrite_page
+from mwfilter.system.metrics import (
+    BYTES_DOWNLOADED,
+    ERRORS,
+    EXPANSION_FALLBACKS,
+    HTTP_LATENCY,
+    PAGES_EXPANDED,
+    PAGES_FETCHED,
+    SKIPPED,
+    metrics,
+)
+from mwfilter.system.pipeline import iter_until_stopped, put_until_stopped
+from mwfilter.system.timing import (
+    STAGE_EXPAND,
+    STAGE_HTTP,
+    STAGE_WRITE,
+    bind_timer,
+    timing,
+    timing_page,
+)
+
+QUEUE_PAGES_PER_JOB: Final[int] = 100
 
 
 class DownApp:
@@ -27,28 +79,55 @@ class DownApp:
         # Common arguments
         assert isinstance(args.yes, bool)
         assert isinstance(args.ignore_errors, bool)
+        assert isinstance(args.page_store, str)
+        assert isinstance(args.fsync, bool)
 
         # Subparser arguments
         assert isinstance(args.endpoint_path, str)
         assert isinstance(args.username, (type(None), str))
         assert isinstance(args.password, (type(None), str))
-        assert isinstance(args.namespace, int)
+        assert isinstance(args.namespace, str)
         assert isinstance(args.no_expand_templates, bool)
+        assert isinstance(args.expand_locally, bool)
+        assert isinstance(args.compress, str)
         assert isinstance(args.all, bool)
+        assert isinstance(args.jobs, int)
+        assert isinstance(args.sync, bool)
+        assert isinstance(args.resume, bool)
         assert isinstance(args.pages, list)
 
         self._hostname = args.hostname
         self._yes = args.yes
         self._ignore_errors = args.ignore_errors
+        self._http_options = HttpOptions.from_namespace(args)
         self._endpoint_path = args.endpoint_path
         self._username = args.username
         self._password = args.password
-        self._namespace = args.namespace
+        self._namespaces = parse_namespaces(args.namespace)
         self._no_expand_templates = args.no_expand_templates
+        self._expand_locally = args.expand_locally
+        self._compress = args.compress
         self._all = args.all
-        self._pages_dir = pages_cache_dirpath(args.cache_dir, self._hostname)
-        self._exclude_path = exclude_filepath(args.cache_dir, self._hostname)
+        self._jobs = max(1, args.jobs)
+        self._sync = args.sync
+        self._resume = args.resume
+        self._cache_dir = args.cache_dir
+        self._page_store = args.page_store
+        self._fsync = args.fsync
         self._pages = list(str(page_name) for page_name in args.pages)
+        self._template_index_path = template_index_filepath(
+            args.cache_dir,
+            self._hostname,
+        )
+        self._fetched: List[Tuple[str, str]] = list()
+        self._affected: Set[str] = set()
+        self._template_revisions: Dict[str, int] = dict()
+        self._expander: Optional[TemplateExpander] = None
+        self._stop = Event()
+
+    @property
+    def stop(self) -> Event:
+        return self._stop
 
     @property
     def auth(self) -> Optional[Tuple[str, str]]:
@@ -58,53 +137,462 @@ class DownApp:
             return None
 
     def create_site(self) -> Site:
-        site = Site(host=self._hostname, path=self._endpoint_path)
-        if auth := self.auth:
-            site.login(*auth)
-        return site
+        with timing(STAGE_HTTP):
+            return shared_site(
+                self._hostname,
+                self._endpoint_path,
+                self.auth,
+                pool_size=self._jobs * 2,
+                options=self._http_options,
+            )
+
+    def create_expander(self, site: Site, store: PageStore) -> None:
+        if not self._expand_locally:
+            return
+        if self._no_expand_templates:
+            raise ValueError(
+                "The '--expand-locally' and '--no-expand-templates' options "
+                "cannot be used together"
+            )
+
+        site_name = str(site.site.get("sitename", str()))
+        loader = partial(self.load_template_source, site, store)
+        self._expander = TemplateExpander(loader, site_name, site.namespaces)
+
+    def template_revision(self, site: Site, title: str) -> int:
+        revision = self._template_revisions.get(title)
+        if revision is None:
+            with timing(STAGE_HTTP):
+                revision = request_revisions(site, [title]).get(title, 0)
+            self._template_revisions[title] = revision
+        return revision
+
+    def load_template_source(
+        self,
+        site: Site,
+        store: PageStore,
+        title: str,
+    ) -> Optional[str]:
+        # [IMPORTANT]
+        # A template cached as written at its current revision is read from the
+        # page store; Only its revision is requested, not its text.
+        filename = PageMeta.normalize_page_name(title)
+        if store.exists(filename):
+            meta = store.get_meta(filename)
+            if not meta.templates_expanded:
+                if meta.revision == self.template_revision(site, title):
+                    logger.debug(f"Load template source: {filename}")
+                    return store.get_text(filename)
+        return self.request_template_source(site, title)
+
+    def request_template_source(self, site: Site, title: str) -> Optional[str]:
+        logger.debug(f"Download template source: {title}")
+        with timing(STAGE_HTTP):
+            page = site.pages[title]
+            if not page.exists:
+                return None
+            return page.text(expandtemplates=False)
+
+    def expand_locally(self, page: Page, content: str) -> str:
+        assert self._expander is not None
+        try:
+            with timing(STAGE_EXPAND):
+                expanded = self._expander.expand(
+                    content,
+                    page.page_title,
+                    page.namespace,
+                )
+        except UnsupportedExpansion as e:
+            logger.debug(f"Expand templates on the server: {page.name} ({e})")
+            metrics().inc(EXPANSION_FALLBACKS)
+            with timing(STAGE_HTTP):
+                return page.text(expandtemplates=True)
+        metrics().inc(PAGES_EXPANDED)
+        return expanded
+
+    def expansion(self, namespace: int) -> Tuple[bool, bool]:
+        # Whether the text is expanded locally, and whether it is expanded by
+        # the server. Template pages are the sources of the local expansion,
+        # so they are kept as written.
+        if self._expander is not None:
+            return namespace != TEMPLATE_NAMESPACE, False
+        return False, not self._no_expand_templates
 
     def page_to_meta(self, page: Page) -> Tuple[PageMeta, str]:
-        revisions = page.revisions()
-        assert isinstance(revisions, RevisionsIterator)
-        meta = PageMeta.from_page(page)
-        meta.authors = list(set(rev["user"] for rev in revisions))
-        content = page.text(expandtemplates=not self._no_expand_templates)
+        local, expandtemplates = self.expansion(page.namespace)
+
+        begin = monotonic()
+        with timing(STAGE_HTTP):
+            revisions = page.revisions()
+            assert isinstance(revisions, RevisionsIterator)
+            meta = PageMeta.from_page(page)
+            meta.authors = list(set(rev["user"] for rev in revisions))
+            meta.templates_expanded = local or expandtemplates
+            content = page.text(expandtemplates=expandtemplates)
+        metrics().observe(HTTP_LATENCY, monotonic() - begin)
+        if local:
+            content = self.expand_locally(page, content)
+        metrics().inc(PAGES_FETCHED)
+        metrics().inc(BYTES_DOWNLOADED, len(content.encode()))
         if meta.redirect:
             redirect_pagename = parse_redirect_pagename(content)
             meta.redirect_pagename = PageMeta.normalize_page_name(redirect_pagename)
         return meta, content
 
-    def download_page(self, page: Page, i: int) -> None:
-        meta, content = self.page_to_meta(page)
-        meta_json = json.dumps(serialize(meta))
+    def record_fetched(self, page: Page, meta: PageMeta) -> None:
+        # Only stored pages enter the template index; A page that failed to be
+        # written keeps its previous record, so the next sync still finds it.
+        self._fetched.append((page.name, meta.filename))
 
-        logger.info(f"Download ({i}): {meta.filename}")
-        json_path = self._pages_dir / meta.json_filename
-        wiki_path = self._pages_dir / meta.wiki_filename
+    def download_page(self, store: PageStore, page: Page, i: int) -> bool:
+        with timing_page(page.name):
+            return self._download_page(store, page, i)
 
+    def _download_page(self, store: PageStore, page: Page, i: int) -> bool:
         try:
-            if ask_overwrite(json_path, force_yes=self._yes):
-                json_path.parent.mkdir(parents=True, exist_ok=True)
-                json_path.write_text(meta_json)
-            if ask_overwrite(wiki_path, force_yes=self._yes):
-                wiki_path.parent.mkdir(parents=True, exist_ok=True)
-                wiki_path.write_text(content)
+            meta, content = self.page_to_meta(page)
+            logger.info(f"Download ({i}): {meta.filename}")
+
+            if store.exists(meta.filename):
+                location = store.location(meta.filename)
+                if not ask_overwrite_page(location, force_yes=self._yes):
+                    metrics().inc(SKIPPED)
+                    return True
+            with timing(STAGE_WRITE):
+                store.put(meta, content)
+            self.record_fetched(page, meta)
         except BaseException as e:
-            json_path.unlink(missing_ok=True)
-            wiki_path.unlink(missing_ok=True)
+            metrics().inc(ERRORS)
             logger.error(e)
             if not self._ignore_errors:
                 raise
+            return False
+        else:
+            return True
+
+    def check_namespaces(self) -> None:
+        for namespace in self._namespaces if self._namespaces is not None else []:
+            if namespace not in Site.default_namespaces:
+                raise ValueError(f"Unexpected namespace number: {namespace}")
+        if self._resume and not self._all:
+            raise ValueError("The '--resume' option requires '--all'")
+        if self._resume and (self._namespaces is None or 1 < len(self._namespaces)):
+            raise ValueError("The '--resume' option requires a single namespace")
+
+    def select_namespaces(self, site: Site) -> List[int]:
+        if self._namespaces is None:
+            return listable_namespaces(site.namespaces.keys())
+        return list(self._namespaces)
+
+    def state_path(self, namespace: int) -> Path:
+        # Every namespace keeps its own state, so a serial run of several
+        # namespaces does not overwrite the failures of an earlier one.
+        return down_state_filepath(self._cache_dir, self._hostname, namespace)
+
+    def load_state(self, namespace: int) -> DownState:
+        if not self._resume:
+            return DownState(namespace=namespace)
+
+        state_path = self.state_path(namespace)
+        state = DownState.load(state_path)
+        if state is None:
+            logger.warning(f"No download state to resume: '{str(state_path)}'")
+            return DownState(namespace=namespace)
+        if state.namespace != namespace:
+            logger.warning(
+                f"The download state is for namespace {state.namespace}, "
+                f"not {namespace}; Start from the beginning"
+            )
+            return DownState(namespace=namespace)
+
+        logger.info(
+            f"Resume download: {len(state.completed)} completed in the current "
+            f"chunk, {len(state.failed)} failed"
+        )
+        return state
+
+    def is_listed_unchanged(
+        self,
+        page: Page,
+        cached: Dict[str, PageMeta],
+        seen: Set[str],
+    ) -> bool:
+        listed = PageMeta.from_page(page)
+        seen.add(listed.filename)
+        if listed.filename in self._affected:
+            logger.debug(f"Template changed: {page.name}")
+            return False
+        cached_meta = cached.get(listed.filename)
+        expanded = any(self.expansion(listed.namespace))
+        if cached_meta and is_unchanged(cached_meta, listed, expanded):
+            logger.debug(f"Unchanged: {page.name}")
+            metrics().inc(SKIPPED)
+            return True
+        return False
+
+    def download_allpages(
+        self,
+        store: PageStore,
+        site: Site,
+        namespaces: Sequence[int],
+    ) -> None:
+        if 1 < self._jobs:
+            self.download_allpages_parallel(store, site, namespaces)
+            return
+
+        # The listing already carries the revision and touched time of every page,
+        # so unchanged pages are detected without any further request.
+        cached = {m.filename: m for m in store.iter_metas()} if self._sync else {}
+        for namespace in namespaces:
+            self.download_namespace(store, site, namespace, cached)
+
+    def download_namespace(
+        self,
+        store: PageStore,
+        site: Site,
+        namespace: int,
+        cached: Dict[str, PageMeta],
+    ) -> None:
+        state_path = self.state_path(namespace)
+        state = self.load_state(namespace)
+        state.save(state_path)
+        from_start = state.continuation is None and not state.completed
+        full_listing = from_start and not state.finished
+
+        seen: Set[str] = set()
+        unchanged = 0
+        listed = 0
+
+        i = 0
+        if not state.finished:
+            chunks = iter_allpages_chunks(site, namespace, state.continuation)
+            for chunk in chunks:
+                for page in chunk.pages:
+                    i += 1
+                    listed += 1
+                    if self._sync and self.is_listed_unchanged(page, cached, seen):
+                        unchanged += 1
+                        state.complete(page.name)
+                        continue
+                    if page.name in state.completed:
+                        logger.debug(f"Already downloaded ({i}): {page.name}")
+                        continue
+                    if self.download_page(store, page, i):
+                        state.complete(page.name)
+                    else:
+                        state.fail(page.name)
+                    state.save(state_path)
+                state.next_chunk(chunk.continuation)
+                state.save(state_path)
 
-    def download_allpages(self, site: Site) -> None:
-        for i, page in enumerate(site.allpages(namespace=self._namespace), start=1):
-            self.download_page(page, i)
+        for title in list(state.failed):
+            i += 1
+            logger.info(f"Retry failed page: {title}")
+            page = self.request_page(site, title)
+            if page is not None and self.download_page(store, page, i):
+                state.complete(title)
+                state.save(state_path)
 
-    def request_page(self, site: Site, page_name: str) -> Page:
+        if self._sync:
+            logger.info(
+                f"Sync complete: {unchanged} unchanged of {listed} listed pages "
+                f"in namespace {namespace}"
+            )
+            if full_listing:
+                self.report_vanished(cached.values(), seen, [namespace])
+            else:
+                logger.info("Vanished pages are only reported after a full listing")
+
+        if state.failed:
+            logger.warning(
+                f"{len(state.failed)} page(s) failed in namespace {namespace}; "
+                f"Run again with '--all --resume --namespace {namespace}' "
+                "to retry them"
+            )
+        else:
+            state_path.unlink(missing_ok=True)
+
+    def enumerate_range(
+        self,
+        site: Site,
+        namespace: int,
+        title_range: TitleRange,
+        queue: Queue,
+        accept: Optional[Callable[[Page], bool]] = None,
+    ) -> int:
+        listed = 0
+        logger.debug(f"Enumerate title range {title_range} in namespace {namespace}")
+        for chunk in iter_allpages_chunks(site, namespace, None, None, title_range):
+            for page in chunk.pages:
+                if accept is not None and not accept(page):
+                    continue
+                if not put_until_stopped(queue, page, self._stop):
+                    return listed
+                listed += 1
+            if self._stop.is_set():
+                break
+        logger.debug(
+            f"Enumerated {listed} pages in title range {title_range} "
+            f"in namespace {namespace}"
+        )
+        return listed
+
+    def fetch_pages(
+        self,
+        store: PageStore,
+        queue: Queue,
+        cached: Dict[str, PageMeta],
+        seen: Set[str],
+        counter: Iterator[int],
+        failed: List[str],
+    ) -> int:
+        unchanged = 0
+        for page in iter_until_stopped(queue, self._stop):
+            if self._sync and self.is_listed_unchanged(page, cached, seen):
+                unchanged += 1
+                continue
+            try:
+                if not self.download_page(store, page, next(counter)):
+                    failed.append(page.name)
+            except BaseException:
+                self._stop.set()
+                raise
+        return unchanged
+
+    def download_allpages_parallel(
+        self,
+        store: PageStore,
+        site: Site,
+        namespaces: Sequence[int],
+    ) -> None:
+        if self._resume:
+            raise ValueError("The '--resume' option requires a single job")
+        if not self._yes:
+            raise ValueError("Concurrent jobs cannot ask to overwrite; Use '--yes'")
+
+        with timing(STAGE_HTTP):
+            statistics = request_statistics(site)
+        ranges = plan_title_ranges(statistics.pages, self._jobs, site.api_limit)
+        listings = [(ns, r) for ns in namespaces for r in ranges]
+        logger.info(
+            f"Enumerate about {statistics.pages} pages in {len(namespaces)} "
+            f"namespace(s) of {len(ranges)} title range(s) "
+            f"and fetch them with {self._jobs} jobs"
+        )
+
+        cached = {m.filename: m for m in store.iter_metas()} if self._sync else {}
+        seen: Set[str] = set()
+        failed: List[str] = list()
+        counter = count(1)
+
+        # [IMPORTANT]
+        # The bounded queue lets fetching begin with the first listed chunk,
+        # while enumeration never runs far ahead of the fetch jobs.
+        queue: Queue = Queue(maxsize=self._jobs * QUEUE_PAGES_PER_JOB)
+        self._stop.clear()
+
+        # [IMPORTANT]
+        # At most as many listings as fetch jobs run at once; The rest wait for a
+        # free thread, so more namespaces never means more concurrent requests.
+        listers = min(len(listings), self._jobs)
+        with ThreadPoolExecutor(max_workers=listers + self._jobs) as executor:
+            fetchers = [
+                executor.submit(
+                    bind_timer(self.fetch_pages),
+                    store,
+                    queue,
+                    cached,
+                    seen,
+                    counter,
+                    failed,
+                )
+                for _ in range(self._jobs)
+            ]
+            enumerators = [
+                executor.submit(bind_timer(self.enumerate_range), site, ns, r, queue)
+                for ns, r in listings
+            ]
+            try:
+                listed = sum(f.result() for f in enumerators)
+                for _ in fetchers:
+                    put_until_stopped(queue, None, self._stop)
+                unchanged = sum(f.result() for f in fetchers)
+            except BaseException:
+                self._stop.set()
+                raise
+
+        if self._sync:
+            logger.info(
+                f"Sync complete: {unchanged} unchanged of {listed} listed pages"
+            )
+            self.report_vanished(cached.values(), seen, namespaces)
+
+        for title in failed:
+            logger.info(f"Retry failed page: {title}")
+            page = self.request_page(site, title)
+            if page is not None:
+                self.download_page(store, page, next(counter))
+
+    def report_vanished(
+        self,
+        cached: Iterable[PageMeta],
+        seen: Set[str],
+        namespaces: Sequence[int],
+    ) -> None:
+        metas = list(cached)
+        vanished = list()
+        for namespace in namespaces:
+            vanished.extend(vanished_filenames(metas, namespace, seen))
+        for filename in vanished:
+            logger.warning(f"Vanished page: '{filename}'")
+        if vanished:
+            logger.warning(
+                f"{len(vanished)} cached page(s) no longer exist on the wiki"
+            )
+
+    def load_template_index(self, site: Site) -> Optional[TemplateIndex]:
+        # Pages stored without expansion do not change with their templates.
+        if self._no_expand_templates:
+            return None
+
+        index = TemplateIndex.load(self._template_index_path)
+        if not (self._sync and self._all):
+            return index
+
+        with timing(STAGE_HTTP):
+            self._template_revisions = request_revisions(site, index.templates)
+        self._affected = index.affected_pages(self._template_revisions)
+        if self._affected:
+            logger.info(
+                f"{len(self._affected)} page(s) will be refetched "
+                "because their templates changed"
+            )
+        return index
+
+    def save_template_index(self, site: Site, index: TemplateIndex) -> None:
+        fetched = dict(self._fetched)
+        if not fetched:
+            return
+
+        with timing(STAGE_HTTP):
+            templates = request_templates(site, list(fetched.keys()))
+            used = set(t for ts in templates.values() for t in ts)
+            unknown = sorted(used.difference(self._template_revisions.keys()))
+            self._template_revisions.update(request_revisions(site, unknown))
+
+        for name, filename in fetched.items():
+            names = templates.get(name, list())
+            index.update(filename, {t: self._template_revisions[t] for t in names})
+        index.save(self._template_index_path, self._fsync)
+        logger.debug(f"Recorded the templates of {len(fetched)} page(s)")
+
+    def request_page(self, site: Site, page_name: str) -> Optional[Page]:
         try:
             logger.debug(f"Request page: {page_name}")
-            page = site.pages[page_name]
+            with timing_page(page_name), timing(STAGE_HTTP):
+                page = site.pages[page_name]
         except BaseException as e:
+            metrics().inc(ERRORS)
             logger.error(e)
             if not self._ignore_errors:
                 raise
@@ -113,25 +601,46 @@ class DownApp:
                 return page
             else:
                 error_message = f"Unexpected page type: {type(page).__name__}"
+                metrics().inc(ERRORS)
                 logger.error(error_message)
                 if not self._ignore_errors:
                     raise TypeError(error_message)
+        return None
 
-    def download_pages(self, site: Site, page_names: Sequence[str]) -> None:
+    def download_pages(
+        self,
+        store: PageStore,
+        site: Site,
+        page_names: Sequence[str],
+    ) -> None:
         for i, page_name in enumerate(page_names, start=1):
             page = self.request_page(site, page_name)
-            self.download_page(page, i)
+            if page is not None:
+                self.download_page(store, page, i)
 
     def run(self) -> None:
         if not self._endpoint_path:
             raise ValueError("The 'endpoint_path' argument is required")
-        if self._namespace not in Site.default_namespaces:
-            raise ValueError(f"Unexpected namespace number: {self._namespace}")
+        self.check_namespaces()
 
         site = self.create_site()
 
-        if self._all:
-            self.download_allpages(site)
+        store = open_page_store(
+            self._cache_dir,
+            self._hostname,
+            self._page_store,
+            self._compress,
+            self._fsync,
+        )
+        with store:
+            template_index = self.load_template_index(site)
+            self.create_expander(site, store)
+
+            if self._all:
+                self.download_allpages(store, site, self.select_namespaces(site))
+
+            if self._pages:
+                self.download_pages(store, site, self._pages)
 
-        if self._pages:
-            self.download_pages(site, self._pages)
+        if template_index is not None:
+            self.save_template_index(site, template_index)
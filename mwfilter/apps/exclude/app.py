@@ -7,9 +7,11 @@ import yaml
 from type_serialize import serialize
 
 from mwfilter.logging.logging import logger
-from mwfilter.mw.cache_dirs import exclude_filepath, pages_cache_dirpath
+from mwfilter.mw.cache_dirs import exclude_filepath
 from mwfilter.mw.exclude import Exclude
+from mwfilter.store import open_page_store
 from mwfilter.system.ask import ask_overwrite
+from mwfilter.system.atomic import atomic_open
 
 
 class ExcludeApp:
@@ -21,6 +23,8 @@ class ExcludeApp:
 
         # Common arguments
         assert isinstance(args.yes, bool)
+        assert isinstance(args.page_store, str)
+        assert isinstance(args.fsync, bool)
 
         # Subparser arguments
         assert isinstance(args.exclude_page, str)
@@ -30,19 +34,21 @@ class ExcludeApp:
         self._yes = args.yes
         self._exclude_page = args.exclude_page
         self._stdout = args.stdout
-        self._pages_dir = pages_cache_dirpath(args.cache_dir, self._hostname)
+        self._cache_dir = args.cache_dir
+        self._page_store = args.page_store
+        self._fsync = args.fsync
         self._exclude_path = exclude_filepath(args.cache_dir, self._hostname)
 
     def run(self) -> None:
         if not self._exclude_page:
             raise ValueError("The 'exclude_page' argument is required")
 
-        wiki_path = self._pages_dir / f"{self._exclude_page}.wiki"
-        if not wiki_path.is_file():
-            raise FileNotFoundError(f"File not found: '{str(wiki_path)}'")
+        store = open_page_store(self._cache_dir, self._hostname, self._page_store)
+        with store:
+            location = store.location(self._exclude_page)
+            logger.debug(f"Read exclude wiki file: '{location}'")
+            mediawiki_content = store.get_text(self._exclude_page)
 
-        logger.debug(f"Read exclude wiki file: '{wiki_path}'")
-        mediawiki_content = wiki_path.read_text()
         exclude = Exclude.from_mediawiki_content(mediawiki_content)
         exclude_text = serialize(exclude)
 
@@ -51,6 +57,5 @@ class ExcludeApp:
             return
 
         if ask_overwrite(self._exclude_path, force_yes=self._yes):
-            self._exclude_path.parent.mkdir(parents=True, exist_ok=True)
-            with self._exclude_path.open("wt") as f:
+            with atomic_open(self._exclude_path, "wt", fsync=self._fsync) as f:
                 yaml.dump(exclude_text, f)
@@ -3,14 +3,26 @@
 import os
 from argparse import Namespace
 from pathlib import Path
+from time import monotonic
 from typing import Optional, Sequence, Tuple
 
 from mwclient import Site
 from mwclient.image import Image
 
 from mwfilter.logging.logging import logger
-from mwfilter.mw.cache_dirs import pages_cache_dirpath
 from mwfilter.mw.image_list import ImageList
+from mwfilter.mw.site import HttpOptions, shared_site
+from mwfilter.store import open_page_store
+from mwfilter.system.atomic import DirSync, atomic_open
+from mwfilter.system.metrics import (
+    BYTES_DOWNLOADED,
+    ERRORS,
+    HTTP_LATENCY,
+    IMAGES_FETCHED,
+    SKIPPED,
+    metrics,
+)
+from mwfilter.system.timing import STAGE_HTTP, timing, timing_page
 
 
 class ImageApp:
@@ -23,6 +35,8 @@ class ImageApp:
         # Common arguments
         assert isinstance(args.yes, bool)
         assert isinstance(args.ignore_errors, bool)
+        assert isinstance(args.page_store, str)
+        assert isinstance(args.fsync, bool)
 
         # Subparser arguments
         assert isinstance(args.endpoint_path, str)
@@ -35,13 +49,17 @@ class ImageApp:
         self._hostname = args.hostname
         self._yes = args.yes
         self._ignore_errors = args.ignore_errors
+        self._http_options = HttpOptions.from_namespace(args)
         self._endpoint_path = args.endpoint_path
         self._username = args.username
         self._password = args.password
         self._image_page = args.image_page
         self._output_dir = Path(args.output_dir)
         self._stdout = args.stdout
-        self._pages_dir = pages_cache_dirpath(args.cache_dir, self._hostname)
+        self._cache_dir = args.cache_dir
+        self._page_store = args.page_store
+        self._fsync = args.fsync
+        self._dir_sync = DirSync(args.fsync)
 
     @property
     def auth(self) -> Optional[Tuple[str, str]]:
@@ -51,26 +69,33 @@ class ImageApp:
             return None
 
     def create_site(self) -> Site:
-        site = Site(host=self._hostname, path=self._endpoint_path)
-        if auth := self.auth:
-            site.login(*auth)
-        return site
+        with timing(STAGE_HTTP):
+            return shared_site(
+                self._hostname,
+                self._endpoint_path,
+                self.auth,
+                options=self._http_options,
+            )
 
     def read_image_list(self) -> ImageList:
-        wiki_path = self._pages_dir / f"{self._image_page}.wiki"
-        if not wiki_path.is_file():
-            raise FileNotFoundError(f"File not found: '{str(wiki_path)}'")
-
-        logger.debug(f"Read image list wiki file: '{wiki_path}'")
-        mediawiki_content = wiki_path.read_text()
+        store = open_page_store(self._cache_dir, self._hostname, self._page_store)
+        with store:
+            location = store.location(self._image_page)
+            logger.debug(f"Read image list wiki file: '{location}'")
+            mediawiki_content = store.get_text(self._image_page)
         return ImageList.from_mediawiki_content(mediawiki_content)
 
     def download_image(self, site: Site, image_name: str, i: int) -> None:
+        with timing_page(image_name):
+            self._download_image(site, image_name, i)
+
+    def _download_image(self, site: Site, image_name: str, i: int) -> None:
         logger.info(f"Download image ({i}): {image_name}")
 
         try:
-            image = site.images[image_name]
-            assert isinstance(image, Image)
+            with timing(STAGE_HTTP):
+                image = site.images[image_name]
+                assert isinstance(image, Image)
 
             if not image.exists:
                 logger.warning(f"Image does not exist on wiki: {image_name}")
@@ -83,15 +108,23 @@ class ImageApp:
                 answer = input(f"Overwrite file '{str(dest_path)}' (Y/n/s): ")
                 answer = answer.strip().lower()
                 if answer == "s":
+                    metrics().inc(SKIPPED)
                     return
                 elif answer != "y":
                     raise FileExistsError(f"Already exists file: '{str(dest_path)}'")
 
-            with open(dest_path, "wb") as f:
-                image.download(f)
+            begin = monotonic()
+            with timing(STAGE_HTTP):
+                with atomic_open(dest_path, "wb", fsync=self._fsync) as f:
+                    image.download(f)
+            self._dir_sync.add(dest_path)
+            metrics().observe(HTTP_LATENCY, monotonic() - begin)
+            metrics().inc(IMAGES_FETCHED)
+            metrics().inc(BYTES_DOWNLOADED, dest_path.stat().st_size)
 
             logger.info(f"Saved: {dest_path}")
         except BaseException as e:
+            metrics().inc(ERRORS)
             logger.error(f"Failed to download image '{image_name}': {e}")
             if not self._ignore_errors:
                 raise
@@ -124,4 +157,7 @@ class ImageApp:
         logger.info(f"Found {len(image_list.images)} images to download")
 
         site = self.create_site()
-        self.download_images(site, image_list.images)
+        try:
+            self.download_images(site, image_list.images)
+        finally:
+            self._dir_sync.sync()
@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+
+from argparse import Namespace
+
+
+def import_main(args: Namespace) -> None:
+    from mwfilter.apps.import_.app import ImportApp
+
+    app = ImportApp(args)
+    app.run()
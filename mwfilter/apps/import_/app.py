@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+import os
+from argparse import Namespace
+from typing import List, Optional, Set
+
+from mwfilter.logging.logging import logger
+from mwfilter.mw.dump import DumpReader, open_dump
+from mwfilter.store import open_page_store
+from mwfilter.store.page_store import Page, PageStore
+from mwfilter.system.ask import ask_overwrite_page
+from mwfilter.system.metrics import ERRORS, PAGES_FETCHED, SKIPPED, metrics
+from mwfilter.system.timing import STAGE_WRITE, timing
+
+
+class ImportApp:
+    def __init__(self, args: Namespace):
+        assert isinstance(args.hostname, str)
+        assert isinstance(args.cache_dir, str)
+        assert args.hostname
+        assert os.path.isdir(args.cache_dir)
+
+        # Common arguments
+        assert isinstance(args.yes, bool)
+        assert isinstance(args.ignore_errors, bool)
+        assert isinstance(args.page_store, str)
+        assert isinstance(args.fsync, bool)
+
+        # Subparser arguments
+        assert isinstance(args.dump, str)
+        assert isinstance(args.namespace, (type(None), list))
+        assert isinstance(args.compress, str)
+        assert isinstance(args.batch_size, int)
+
+        self._hostname = args.hostname
+        self._yes = args.yes
+        self._ignore_errors = args.ignore_errors
+        self._cache_dir = args.cache_dir
+        self._page_store = args.page_store
+        self._fsync = args.fsync
+        self._dump = args.dump
+        self._namespaces: Optional[Set[int]] = None
+        if args.namespace is not None:
+            self._namespaces = set(int(ns) for ns in args.namespace)
+        self._compress = args.compress
+        self._batch_size = max(1, args.batch_size)
+
+    def flush(self, store: PageStore, batch: List[Page]) -> None:
+        if not batch:
+            return
+        try:
+            with timing(STAGE_WRITE):
+                store.put_many(batch)
+        except BaseException as e:
+            metrics().inc(ERRORS)
+            logger.error(e)
+            if not self._ignore_errors:
+                raise
+        finally:
+            batch.clear()
+
+    def import_pages(self, store: PageStore, reader: DumpReader) -> int:
+        batch: List[Page] = list()
+        count = 0
+        for meta, text in reader:
+            count += 1
+            metrics().inc(PAGES_FETCHED)
+            logger.info(f"Import ({count}): {meta.filename}")
+
+            if not self._yes and store.exists(meta.filename):
+                location = store.location(meta.filename)
+                if not ask_overwrite_page(location):
+                    metrics().inc(SKIPPED)
+                    continue
+
+            batch.append((meta, text))
+            if self._batch_size <= len(batch):
+                self.flush(store, batch)
+
+        self.flush(store, batch)
+        return count
+
+    def run(self) -> None:
+        if not os.path.isfile(self._dump):
+            raise FileNotFoundError(f"Not found dump file: '{self._dump}'")
+
+        store = open_page_store(
+            self._cache_dir,
+            self._hostname,
+            self._page_store,
+            self._compress,
+            self._fsync,
+        )
+        with store, open_dump(self._dump) as f:
+            reader = DumpReader(f, self._namespaces)
+            count = self.import_pages(store, reader)
+        logger.info(f"Import complete: {count} pages from '{self._dump}'")
@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+
+from argparse import Namespace
+
+
+def merge_main(args: Namespace) -> None:
+    from mwfilter.apps.merge.app import MergeApp
+
+    app = MergeApp(args)
+    app.run()
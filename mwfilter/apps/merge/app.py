@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+
+from argparse import Namespace
+from pathlib import Path
+
+from mwfilter.logging.logging import logger
+from mwfilter.mw.build_report import BuildReport, merge_reports
+from mwfilter.paths.expand_abspath import expand_abspath
+
+
+class MergeError(Exception):
+    pass
+
+
+class MergeApp:
+    def __init__(self, args: Namespace):
+        assert isinstance(args.hostname, str)
+        assert args.hostname
+
+        # Common arguments
+        assert isinstance(args.fsync, bool)
+
+        # Subparser arguments
+        assert isinstance(args.reports, list)
+        assert isinstance(args.output, str)
+
+        self._hostname = args.hostname
+        self._fsync = args.fsync
+        self._reports = [Path(expand_abspath(str(x))) for x in args.reports]
+        self._output = Path(expand_abspath(args.output)) if args.output else None
+
+    def run(self) -> None:
+        reports = list()
+        for path in self._reports:
+            if not path.is_file():
+                raise FileNotFoundError(f"Not found build report: '{path}'")
+            reports.append(BuildReport.load(path))
+
+        merged = merge_reports(reports, self._hostname)
+
+        if self._output is not None:
+            merged.save(self._output, self._fsync)
+            logger.info(f"Saved merged build report: '{self._output}'")
+
+        for problem in merged.problems:
+            logger.error(problem)
+        if merged.problems:
+            raise MergeError(
+                f"{len(merged.problems)} problem(s) in {len(reports)} build report(s)"
+            )
+
+        logger.info(
+            f"Verified {len(reports)} shard(s): all {merged.total} pages "
+            "were converted exactly once"
+        )
@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+
+from argparse import Namespace
+
+
+def sync_main(args: Namespace) -> None:
+    from mwfilter.apps.sync.app import SyncApp
+
+    app = SyncApp(args)
+    app.run()
@@ -0,0 +1,464 @@
+# -*- coding: utf-8 -*-
+
+import os
+from argparse import Namespace
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import count
+from pathlib import Path
+from queue import Queue
+from threading import Event, Lock
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set
+from urllib.parse import quote
+
+import yaml
+from mwclient import Site
+from mwclient.page import Page
+from type_serialize import serialize
+
+from mwfilter.apps.build.app import (
+    BuildApp,
+    BuildLinks,
+    BuildTuple,
+    read_docs_dirpath,
+)
+from mwfilter.apps.down.app import DownApp
+from mwfilter.arguments import EXECUTORS, METHOD_VERSIONS
+from mwfilter.logging.logging import logger
+from mwfilter.mw.allpages import plan_title_ranges
+from mwfilter.mw.cache_dirs import exclude_filepath
+from mwfilter.mw.convert_info import ConvertInfo
+from mwfilter.mw.exclude import Exclude
+from mwfilter.mw.image_list import ImageList
+from mwfilter.mw.page_meta import PageMeta
+from mwfilter.mw.statistics import request_statistics
+from mwfilter.paths.expand_abspath import expand_abspath
+from mwfilter.store import open_page_store
+from mwfilter.store.page_store import PageStore
+from mwfilter.system.atomic import DirSync, atomic_open
+from mwfilter.system.metrics import ERRORS, metrics
+from mwfilter.system.pipeline import (
+    iter_until_stopped,
+    put_until_stopped,
+    wait_until_stopped,
+)
+from mwfilter.system.progress import Progress
+from mwfilter.system.timing import (
+    STAGE_HTTP,
+    STAGE_WRITE,
+    bind_timer,
+    timing,
+    timing_page,
+)
+
+
+class SyncApp:
+    def __init__(self, args: Namespace):
+        assert isinstance(args.hostname, str)
+        assert isinstance(args.cache_dir, str)
+        assert args.hostname
+        assert os.path.isdir(args.cache_dir)
+
+        # Common arguments
+        assert isinstance(args.yes, bool)
+        assert isinstance(args.ignore_errors, bool)
+        assert isinstance(args.page_store, str)
+        assert isinstance(args.fsync, bool)
+
+        # Subparser arguments
+        assert isinstance(args.endpoint_path, str)
+        assert isinstance(args.namespace, str)
+        assert isinstance(args.compress, str)
+        assert isinstance(args.exclude_page, str)
+        assert isinstance(args.image_page, str)
+        assert isinstance(args.method_version, int)
+        assert args.method_version in METHOD_VERSIONS
+        assert isinstance(args.mkdocs_yml, str)
+        assert isinstance(args.refetch, bool)
+        assert isinstance(args.fetch_jobs, int)
+        assert isinstance(args.convert_jobs, int)
+        assert isinstance(args.executor, str)
+        assert args.executor in EXECUTORS
+        assert isinstance(args.queue_size, int)
+
+        self._hostname = args.hostname
+        self._yes = args.yes
+        self._ignore_errors = args.ignore_errors
+        self._endpoint_path = args.endpoint_path
+        self._compress = args.compress
+        self._exclude_page = args.exclude_page
+        self._image_page = args.image_page
+        self._method_version = args.method_version
+        self._mkdocs_yml = Path(expand_abspath(args.mkdocs_yml))
+        self._refetch = args.refetch
+        self._fetch_jobs = max(1, args.fetch_jobs)
+        self._queue_size = max(1, args.queue_size)
+        self._cache_dir = args.cache_dir
+        self._page_store = args.page_store
+        self._fsync = args.fsync
+        self._exclude_path = exclude_filepath(args.cache_dir, self._hostname)
+        self._lock = Lock()
+        self._failed: Set[str] = set()
+        self._progress: Optional[Progress] = None
+
+        # [IMPORTANT]
+        # The download and conversion of a page are the same as with the 'down'
+        # and 'build' commands, so both apps are created from these arguments.
+        down_args = dict(
+            all=True,
+            jobs=self._fetch_jobs,
+            sync=not self._refetch,
+            resume=False,
+            pages=list(),
+        )
+        build_args = dict(
+            all=True,
+            dry_run=False,
+            pages=list(),
+            start_index=0,
+            jobs=args.convert_jobs,
+            hosts=None,
+            shard=str(),
+            report=str(),
+        )
+        self._down = DownApp(Namespace(**dict(vars(args), **down_args)))
+        self._build = BuildApp(Namespace(**dict(vars(args), **build_args)))
+
+    @property
+    def stop(self) -> Event:
+        return self._down.stop
+
+    def fetch_setting_page(self, store: PageStore, site: Site, page_name: str) -> str:
+        page = self._down.request_page(site, page_name)
+        if page is None or not page.exists:
+            logger.warning(f"Not found setting page: '{page_name}'")
+        else:
+            self._down.download_page(store, page, 0)
+
+        if not store.exists(page_name):
+            return str()
+        return store.get_text(page_name)
+
+    def sync_exclude(self, store: PageStore, site: Site) -> Exclude:
+        mediawiki_content = self.fetch_setting_page(store, site, self._exclude_page)
+        exclude = Exclude.from_mediawiki_content(mediawiki_content)
+        with atomic_open(self._exclude_path, "wt", fsync=self._fsync) as f:
+            yaml.dump(serialize(exclude), f)
+        return exclude
+
+    def sync_image_names(self, store: PageStore, site: Site) -> List[str]:
+        mediawiki_content = self.fetch_setting_page(store, site, self._image_page)
+        if not mediawiki_content:
+            return list()
+        image_names = ImageList.from_mediawiki_content(mediawiki_content).images
+        logger.info(f"Loaded {len(image_names)} image names from whitelist")
+        return image_names
+
+    @staticmethod
+    def accept_page(page: Page, exclude: Exclude, filenames: Set[str]) -> bool:
+        filename = PageMeta.from_page(page).filename
+        if not exclude.filter_with_title(filename):
+            logger.warning(f"Filtered page: '{filename}'")
+            return False
+        filenames.add(filename)
+        return True
+
+    def fetch_failed(self, store: PageStore, page: Page) -> Optional[ConvertInfo]:
+        filename = PageMeta.from_page(page).filename
+        if store.exists(filename):
+            # Links to a page are resolved as long as any version of it is converted.
+            logger.warning(f"Convert the cached version of '{filename}'")
+            return ConvertInfo.from_store(store, filename)
+
+        with self._lock:
+            self._failed.add(filename)
+            if self._progress is not None:
+                self._progress.cancel()
+        return None
+
+    def fetch_page(
+        self,
+        store: PageStore,
+        page: Page,
+        cached: Dict[str, PageMeta],
+        seen: Set[str],
+        i: int,
+    ) -> Optional[ConvertInfo]:
+        try:
+            with timing_page(page.name):
+                if not self._refetch and self._down.is_listed_unchanged(
+                    page, cached, seen
+                ):
+                    filename = PageMeta.from_page(page).filename
+                    return ConvertInfo.from_store(store, filename)
+
+                meta, text = self._down.page_to_meta(page)
+                logger.info(f"Download ({i}): {meta.filename}")
+                with timing(STAGE_WRITE):
+                    store.put(meta, text)
+                self._down.record_fetched(page, meta)
+        except BaseException as e:
+            metrics().inc(ERRORS)
+            logger.error(e)
+            if not self._ignore_errors:
+                raise
+            return self.fetch_failed(store, page)
+
+        text_path = store.text_path(meta.filename) or str()
+        return ConvertInfo(text_path=text_path, meta=meta, text=text)
+
+    def fetch_pages(
+        self,
+        store: PageStore,
+        fetch_queue: Queue,
+        convert_queue: Queue,
+        cached: Dict[str, PageMeta],
+        seen: Set[str],
+        counter: Iterator[int],
+    ) -> None:
+        try:
+            for page in iter_until_stopped(fetch_queue, self.stop):
+                info = self.fetch_page(store, page, cached, seen, next(counter))
+                if info is None:
+                    continue
+                if not put_until_stopped(convert_queue, info, self.stop):
+                    break
+        except BaseException:
+            self.stop.set()
+            raise
+
+    def close_stages(
+        self,
+        listers: List[Future],
+        fetchers: List[Future],
+        fetch_queue: Queue,
+        convert_queue: Queue,
+        listed: Event,
+    ) -> int:
+        try:
+            listed_count = sum(f.result() for f in listers)
+            listed.set()
+            for _ in fetchers:
+                put_until_stopped(fetch_queue, None, self.stop)
+            for f in fetchers:
+                f.result()
+            put_until_stopped(convert_queue, None, self.stop)
+        except BaseException:
+            self.stop.set()
+            raise
+        return listed_count
+
+    def iter_build_tuples(
+        self,
+        infos: Iterable[ConvertInfo],
+        max_index: int,
+        docs_dirpath: Path,
+        dir_sync: DirSync,
+    ) -> Iterator[BuildTuple]:
+        for i, info in enumerate(infos):
+            dir_sync.add(docs_dirpath / info.markdown_filename)
+            yield BuildTuple(
+                i,
+                max_index,
+                docs_dirpath,
+                self._method_version,
+                info,
+                self._fsync,
+                self._hostname,
+            )
+
+    @staticmethod
+    def linking_pages(
+        docs_dirpath: Path,
+        names: Iterable[str],
+        targets: Iterable[str],
+    ) -> List[str]:
+        # Converted links are relative, as in '[text](Page_name.md#anchor)'.
+        links = tuple(f"]({quote(target)}.md" for target in targets)
+        result = list()
+        for name in names:
+            path = docs_dirpath / f"{name}.md"
+            try:
+                markdown = path.read_text(encoding="utf-8")
+            except FileNotFoundError:
+                continue
+            if any(link in markdown for link in links):
+                result.append(name)
+        return result
+
+    def reconvert(
+        self,
+        store: PageStore,
+        names: List[str],
+        image_names: List[str],
+        docs_dirpath: Path,
+        dir_sync: DirSync,
+        failed: Set[str],
+    ) -> None:
+        # [IMPORTANT]
+        # Conversion starts before every page is downloaded, so pages that failed
+        # later could still be linked to. Only the pages with such links are
+        # converted again, with links resolved against the downloaded or cached pages.
+        linking = self.linking_pages(docs_dirpath, names, failed)
+        logger.warning(
+            f"{len(failed)} page(s) failed to download after conversion started; "
+            f"Convert {len(linking)} page(s) again without links to them"
+        )
+        if not linking:
+            return
+
+        infos = (ConvertInfo.from_store(store, name) for name in linking)
+        build_args = self.iter_build_tuples(
+            infos,
+            len(linking) - 1,
+            docs_dirpath,
+            dir_sync,
+        )
+        links = {self._hostname: BuildLinks(names, image_names)}
+        progress = Progress(len(linking))
+        failures = self._build.convert(build_args, links, progress)
+        self._build.log_summary(progress, failures)
+
+    def run_pipeline(
+        self,
+        store: PageStore,
+        site: Site,
+        exclude: Exclude,
+        image_names: List[str],
+        docs_dirpath: Path,
+        dir_sync: DirSync,
+        namespaces: Sequence[int],
+    ) -> None:
+        with timing(STAGE_HTTP):
+            statistics = request_statistics(site)
+        ranges = plan_title_ranges(statistics.pages, self._fetch_jobs, site.api_limit)
+        listings = [(ns, r) for ns in namespaces for r in ranges]
+        logger.info(
+            f"Sync about {statistics.pages} pages: list {len(namespaces)} "
+            f"namespace(s) of {len(ranges)} title range(s) "
+            f"and fetch with {self._fetch_jobs} jobs"
+        )
+
+        cached = {m.filename: m for m in store.iter_metas()}
+        seen: Set[str] = set()
+        filenames: Set[str] = set()
+        counter = count(1)
+        listed = Event()
+        self._failed.clear()
+        self._progress = None
+
+        # [IMPORTANT]
+        # Links are resolved against the names of all converted pages, so conversion
+        # starts once listing is complete. Listing must never wait for the later
+        # stages, so only the queue of fetched texts is bounded; It holds back
+        # the fetch jobs until conversion starts, instead of memory growing.
+        fetch_queue: Queue = Queue()
+        convert_queue: Queue = Queue(maxsize=self._queue_size)
+        self.stop.clear()
+
+        def _accept(page: Page) -> bool:
+            return self.accept_page(page, exclude, filenames)
+
+        workers = min(len(listings), self._fetch_jobs) + self._fetch_jobs + 1
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            fetchers = [
+                executor.submit(
+                    bind_timer(self.fetch_pages),
+                    store,
+                    fetch_queue,
+                    convert_queue,
+                    cached,
+                    seen,
+                    counter,
+                )
+                for _ in range(self._fetch_jobs)
+            ]
+            listers = [
+                executor.submit(
+                    bind_timer(self._down.enumerate_range),
+                    site,
+                    ns,
+                    r,
+                    fetch_queue,
+                    _accept,
+                )
+                for ns, r in listings
+            ]
+            closer = executor.submit(
+                self.close_stages,
+                listers,
+                fetchers,
+                fetch_queue,
+                convert_queue,
+                listed,
+            )
+            try:
+                if not wait_until_stopped(listed, self.stop):
+                    closer.result()
+                    return
+
+                # Pages that failed to download and have no cached version are
+                # left out of the links and the progress.
+                with self._lock:
+                    names = sorted(filenames - self._failed)
+                    progress = Progress(len(names))
+                    self._progress = progress
+                logger.info(f"Listed {len(names)} pages; Start conversion")
+                build_args = self.iter_build_tuples(
+                    iter_until_stopped(convert_queue, self.stop),
+                    len(names) - 1,
+                    docs_dirpath,
+                    dir_sync,
+                )
+                links = {self._hostname: BuildLinks(names, image_names)}
+                failures = self._build.convert(build_args, links, progress)
+                closer.result()
+            except BaseException:
+                self.stop.set()
+                raise
+
+        self._build.log_summary(progress, failures)
+        if late := self._failed.intersection(names):
+            names = sorted(set(names) - late)
+            self.reconvert(store, names, image_names, docs_dirpath, dir_sync, late)
+        if not self._refetch:
+            self._down.report_vanished(cached.values(), seen, namespaces)
+
+    def run(self) -> None:
+        if not self._endpoint_path:
+            raise ValueError("The 'endpoint_path' argument is required")
+        self._down.check_namespaces()
+        if not self._yes:
+            raise ValueError("Concurrent stages cannot ask to overwrite; Use '--yes'")
+        if not self._mkdocs_yml.is_file():
+            mkdocs_yml = str(self._mkdocs_yml)
+            raise FileNotFoundError(f"Not found mkdocs config file: '{mkdocs_yml}'")
+
+        docs_dirpath = read_docs_dirpath(self._mkdocs_yml)
+        site = self._down.create_site()
+        dir_sync = DirSync(self._fsync)
+
+        store = open_page_store(
+            self._cache_dir,
+            self._hostname,
+            self._page_store,
+            self._compress,
+            self._fsync,
+        )
+        with store:
+            template_index = self._down.load_template_index(site)
+            self._down.create_expander(site, store)
+            exclude = self.sync_exclude(store, site)
+            image_names = self.sync_image_names(store, site)
+            self.run_pipeline(
+                store,
+                site,
+                exclude,
+                image_names,
+                docs_dirpath,
+                dir_sync,
+                self._down.select_namespaces(site),
+            )
+
+        if template_index is not None:
+            self._down.save_template_index(site, template_index)
+        dir_sync.sync()
@@ -7,6 +7,7 @@ from os.path import expanduser, isfile, join
 from typing import Final, List, Optional, Sequence
 
 from mwfilter.logging.logging import SEVERITIES, SEVERITY_NAME_INFO
+from mwfilter.mw.namespace import ALL_NAMESPACES
 from mwfilter.system.environ import get_typed_environ_value as get_eval
 
 PROG: Final[str] = "mwfilter"
@@ -40,6 +41,8 @@ List of namespace numbers:
   13: Help talk
   14: Category
   15: Category talk
+
+Multiple namespaces are separated by commas, e.g. '-n 0,4,6,10,12'.
 """
 
 CMD_EXCLUDE: Final[str] = "exclude"
@@ -48,12 +51,37 @@ CMD_EXCLUDE_HELP: Final[str] = "Export exclude setting file"
 CMD_IMAGE: Final[str] = "image"
 CMD_IMAGE_HELP: Final[str] = "Download images from MediaWiki"
 
+CMD_IMPORT: Final[str] = "import"
+CMD_IMPORT_HELP: Final[str] = "Import pages from a MediaWiki XML dump"
+CMD_IMPORT_EPILOG = """
+The dump is a Special:Export or dumpBackup.php XML file, plain or compressed
+with bzip2 or gzip (e.g. 'enwiki-latest-pages-articles.xml.bz2').
+The wiki text is stored as written, like 'down --no-expand-templates', and the
+pages are marked as imported with no templates expanded. The next 'down --all
+--sync' or 'sync' refetches them with templates expanded; With
+'--no-expand-templates', only pages with a newer revision are refetched.
+"""
+
 CMD_INDEX: Final[str] = "index"
 CMD_INDEX_HELP: Final[str] = "Export index file"
 
+CMD_MERGE: Final[str] = "merge"
+CMD_MERGE_HELP: Final[str] = "Merge and verify the build reports of sharded builds"
+
 CMD_NAV: Final[str] = "nav"
 CMD_NAV_HELP: Final[str] = "Export nav file"
 
+CMD_SYNC: Final[str] = "sync"
+CMD_SYNC_HELP: Final[str] = "Download, exclude and build pages in one pipeline"
+CMD_SYNC_EPILOG = """
+Pages flow through three stages connected by bounded queues:
+  list    : enumerate title ranges and drop excluded pages
+  fetch   : download changed pages into the cache, read unchanged ones from it
+  convert : convert pages to Markdown as soon as all titles are listed
+The exclude and image pages are downloaded first. Images are not downloaded;
+Run the 'image' command for them.
+"""
+
 EPILOG = f"""
 Apply general debugging options:
   {PROG} -D ...
@@ -67,6 +95,14 @@ Download all template pages:
 Build all wiki files:
   {PROG} -y -D {CMD_BUILD}
 
+Download and build all changed main pages in one pipeline:
+  {PROG} -y {CMD_SYNC} --mkdocs-yml site/mkdocs.yml
+
+Build all pages on two machines from the same cache, then verify the shards:
+  {PROG} -y {CMD_BUILD} -a --shard 1/2 --report shard-1.json
+  {PROG} -y {CMD_BUILD} -a --shard 2/2 --report shard-2.json
+  {PROG} {CMD_MERGE} shard-1.json shard-2.json --output report.json
+
 Builds as version 2, including both debugging and preview modes:
   {PROG} -D -v {CMD_BUILD} -a -m 2
 """
@@ -77,11 +113,42 @@ CMDS: Final[Sequence[str]] = (
     CMD_CLEAN,
     CMD_EXCLUDE,
     CMD_IMAGE,
+    CMD_IMPORT,
     CMD_INDEX,
+    CMD_MERGE,
     CMD_NAV,
+    CMD_SYNC,
 )
 METHOD_VERSIONS: Final[Sequence[int]] = 1, 2
 
+METRICS_FORMAT_JSON: Final[str] = "json"
+METRICS_FORMAT_PROMETHEUS: Final[str] = "prometheus"
+METRICS_FORMATS: Final[Sequence[str]] = METRICS_FORMAT_JSON, METRICS_FORMAT_PROMETHEUS
+
+EXECUTOR_AUTO: Final[str] = "auto"
+EXECUTOR_PROCESS: Final[str] = "process"
+EXECUTOR_THREAD: Final[str] = "thread"
+EXECUTOR_SERIAL: Final[str] = "serial"
+EXECUTORS: Final[Sequence[str]] = (
+    EXECUTOR_AUTO,
+    EXECUTOR_PROCESS,
+    EXECUTOR_THREAD,
+    EXECUTOR_SERIAL,
+)
+
+PAGE_STORE_FILE: Final[str] = "file"
+PAGE_STORE_SQLITE: Final[str] = "sqlite"
+PAGE_STORES: Final[Sequence[str]] = PAGE_STORE_FILE, PAGE_STORE_SQLITE
+
+COMPRESSION_NONE: Final[str] = "none"
+COMPRESSION_GZIP: Final[str] = "gzip"
+COMPRESSION_ZSTD: Final[str] = "zstd"
+COMPRESSIONS: Final[Sequence[str]] = (
+    COMPRESSION_NONE,
+    COMPRESSION_GZIP,
+    COMPRESSION_ZSTD,
+)
+
 LOCAL_DOTENV_FILENAME: Final[str] = ".env.local"
 DEFAULT_CACHE_DIRNAME: Final[str] = ".mwfilter"
 DEFAULT_MKDOCS_YML: Final[str] = "mkdocs.yml"
@@ -101,9 +168,29 @@ DEFAULT_EXCLUDE_YML: Final[str] = "exclude.yml"
 DEFAULT_IMAGE_PAGE: Final[str] = "Mwfilter:Images"
 DEFAULT_IMAGE_OUTPUT_DIR: Final[str] = "docs/assets/images"
 DEFAULT_PAGES_DIRNAME: Final[str] = "pages"
+DEFAULT_PAGES_DB_FILENAME: Final[str] = "pages.sqlite3"
+DEFAULT_PAGES_INDEX_FILENAME: Final[str] = "pages.jsonl"
+DEFAULT_DOWN_STATE_FILENAME: Final[str] = "down.state.{namespace}.json"
+DEFAULT_SITE_CACHE_FILENAME: Final[str] = "site.json"
+DEFAULT_TEMPLATE_INDEX_FILENAME: Final[str] = "templates.json"
+DEFAULT_PAGE_STORE: Final[str] = PAGE_STORE_FILE
+DEFAULT_COMPRESSION: Final[str] = COMPRESSION_NONE
 DEFAULT_MEDIAWIKI_NAMESPACE: Final[int] = 0
 DEFAULT_METHOD_VERSION: Final[int] = 2
 DEFAULT_START_INDEX: Final[int] = 0
+DEFAULT_EXECUTOR: Final[str] = EXECUTOR_AUTO
+DEFAULT_PROFILE_TOP: Final[int] = 10
+DEFAULT_METRICS_FORMAT: Final[str] = METRICS_FORMAT_JSON
+DEFAULT_DOWN_JOBS: Final[int] = 1
+DEFAULT_IMPORT_BATCH_SIZE: Final[int] = 100
+DEFAULT_SYNC_FETCH_JOBS: Final[int] = 4
+DEFAULT_SYNC_QUEUE_SIZE: Final[int] = 64
+DEFAULT_HTTP_RETRIES: Final[int] = 5
+DEFAULT_HTTP_BACKOFF: Final[float] = 0.5
+DEFAULT_HTTP_TIMEOUT: Final[float] = 30.0
+DEFAULT_HTTP_RATE_LIMIT: Final[float] = 0.0
+DEFAULT_HTTP_REPLAY_LATENCY: Final[float] = 0.0
+DEFAULT_SITE_CACHE_TTL: Final[float] = 3600.0
 
 
 @lru_cache
@@ -184,7 +271,52 @@ def add_build_parser(subparsers) -> None:
         default=0,
         help=(
             "Allow N jobs at once; "
-            "If there is no argument, it is automatically selected."
+            "If there is no argument, the number of CPUs usable by this process "
+            "(CPU affinity and cgroup quota) is selected."
+        ),
+    )
+    parser.add_argument(
+        "--executor",
+        choices=EXECUTORS,
+        default=get_eval("EXECUTOR", DEFAULT_EXECUTOR),
+        help=(
+            "Worker type used to convert pages. "
+            f"'{EXECUTOR_AUTO}' selects '{EXECUTOR_THREAD}' for method version 1, "
+            "which is dominated by waiting on the pandoc subprocess, "
+            f"'{EXECUTOR_PROCESS}' for method version 2, "
+            f"and '{EXECUTOR_SERIAL}' when only one job is allowed. "
+            f"(default: '{DEFAULT_EXECUTOR}')"
+        ),
+    )
+    parser.add_argument(
+        "--host",
+        action="append",
+        default=None,
+        dest="hosts",
+        metavar="HOSTNAME=MKDOCS_YML",
+        help=(
+            "Build all pages of a cached host into the docs dir of its MkDocs config; "
+            "May be given more than once to convert the pages of every host "
+            "on one shared pool of '--jobs' workers, instead of '--hostname'"
+        ),
+    )
+    parser.add_argument(
+        "--shard",
+        default=get_eval("BUILD_SHARD", str()),
+        metavar="I/N",
+        help=(
+            "Convert only the I-th of N disjoint slices of the selected pages, "
+            "assigned by a stable hash of the page filename, "
+            "so that N machines can build from the same cache"
+        ),
+    )
+    parser.add_argument(
+        "--report",
+        default=get_eval("BUILD_REPORT", str()),
+        metavar="file",
+        help=(
+            "Save the selected, converted and failed pages to a JSON report, "
+            f"which the '{CMD_MERGE}' command verifies across shards"
         ),
     )
     parser.add_argument(
@@ -247,10 +379,12 @@ def add_down_parser(subparsers) -> None:
     parser.add_argument(
         "--namespace",
         "-n",
-        type=int,
-        default=get_eval("MEDIAWIKI_NAMESPACE", DEFAULT_MEDIAWIKI_NAMESPACE),
+        default=str(get_eval("MEDIAWIKI_NAMESPACE", DEFAULT_MEDIAWIKI_NAMESPACE)),
+        metavar="N[,N...]|all",
         help=(
-            "The namespace number of the MediaWiki page to download. "
+            "Comma separated namespace numbers of the MediaWiki pages to download, "
+            f"or '{ALL_NAMESPACES}' for every namespace of the wiki; "
+            "Multiple namespaces are listed concurrently with '--jobs' "
             f"(default: {DEFAULT_MEDIAWIKI_NAMESPACE})"
         ),
     )
@@ -260,6 +394,29 @@ def add_down_parser(subparsers) -> None:
         default=get_eval("NO_EXPAND_TEMPLATES", False),
         help="Expand templates.",
     )
+    parser.add_argument(
+        "--expand-locally",
+        action="store_true",
+        default=get_eval("EXPAND_LOCALLY", False),
+        help=(
+            "Download the wiki text as written and expand templates locally, "
+            "with parameters, defaults, '#if', '#ifeq', '#switch' and page name "
+            "magic words; Template sources are read from the page store when "
+            "cached at their current revision, or downloaded once per run, "
+            "and a page using anything else is expanded on the server"
+        ),
+    )
+    parser.add_argument(
+        "--compress",
+        choices=COMPRESSIONS,
+        default=get_eval("COMPRESS", DEFAULT_COMPRESSION),
+        help=(
+            "Compress the cached wiki text of downloaded pages. "
+            f"'{COMPRESSION_ZSTD}' requires the optional 'zstandard' package; "
+            "Compressed pages are read transparently by every command "
+            f"(default: '{DEFAULT_COMPRESSION}')"
+        ),
+    )
 
     parser.add_argument(
         "--all",
@@ -269,6 +426,40 @@ def add_down_parser(subparsers) -> None:
         default=False,
         help="Selects all pages in the specified namespace.",
     )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=get_eval("DOWN_JOBS", DEFAULT_DOWN_JOBS),
+        metavar="N",
+        help=(
+            "With '--all', enumerate title ranges and fetch pages with N concurrent "
+            "jobs; Fetching begins while titles are still being enumerated "
+            f"(default: {DEFAULT_DOWN_JOBS})"
+        ),
+    )
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        default=get_eval("SYNC", False),
+        help=(
+            "With '--all', compare the revision and touched time of every listed "
+            "page with the cached page and fetch only the pages that changed, "
+            "or whose expanded templates changed since they were fetched. "
+            "Cached pages that no longer exist on the wiki are reported"
+        ),
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        default=get_eval("RESUME", False),
+        help=(
+            "Continue an interrupted '--all' download where it stopped, "
+            f"using the '{DEFAULT_DOWN_STATE_FILENAME}' file of the namespace "
+            "in the cache directory. "
+            "Titles that failed with '--ignore-errors' are retried at the end"
+        ),
+    )
     parser.add_argument(
         "pages",
         nargs=REMAINDER,
@@ -356,6 +547,50 @@ def add_image_parser(subparsers) -> None:
     )
 
 
+def add_import_parser(subparsers) -> None:
+    # noinspection SpellCheckingInspection
+    parser = subparsers.add_parser(
+        name=CMD_IMPORT,
+        help=CMD_IMPORT_HELP,
+        epilog=CMD_IMPORT_EPILOG,
+        formatter_class=RawDescriptionHelpFormatter,
+    )
+    assert isinstance(parser, ArgumentParser)
+
+    parser.add_argument(
+        "--namespace",
+        "-n",
+        type=int,
+        action="append",
+        default=None,
+        metavar="N",
+        help=(
+            "Import only pages in the namespace; "
+            "May be given more than once (default: all namespaces in the dump)"
+        ),
+    )
+    parser.add_argument(
+        "--compress",
+        choices=COMPRESSIONS,
+        default=get_eval("COMPRESS", DEFAULT_COMPRESSION),
+        help=f"Compress the cached wiki text (default: '{DEFAULT_COMPRESSION}')",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=get_eval("IMPORT_BATCH_SIZE", DEFAULT_IMPORT_BATCH_SIZE),
+        metavar="N",
+        help=(
+            "Number of pages written to the page store at once "
+            f"(default: {DEFAULT_IMPORT_BATCH_SIZE})"
+        ),
+    )
+    parser.add_argument(
+        "dump",
+        help="Path of the XML dump file.",
+    )
+
+
 def add_index_parser(subparsers) -> None:
     # noinspection SpellCheckingInspection
     parser = subparsers.add_parser(
@@ -387,6 +622,32 @@ def add_index_parser(subparsers) -> None:
     )
 
 
+def add_merge_parser(subparsers) -> None:
+    # noinspection SpellCheckingInspection
+    parser = subparsers.add_parser(
+        name=CMD_MERGE,
+        help=CMD_MERGE_HELP,
+        formatter_class=RawDescriptionHelpFormatter,
+    )
+    assert isinstance(parser, ArgumentParser)
+
+    parser.add_argument(
+        "--output",
+        "-o",
+        default=get_eval("MERGE_OUTPUT", str()),
+        metavar="file",
+        help="Save the merged report of all shards as a single build report",
+    )
+    parser.add_argument(
+        "reports",
+        nargs="+",
+        help=(
+            "Build reports of every shard; The merge fails unless each selected "
+            "page was converted exactly once"
+        ),
+    )
+
+
 def add_nav_parser(subparsers) -> None:
     # noinspection SpellCheckingInspection
     parser = subparsers.add_parser(
@@ -419,6 +680,145 @@ def add_nav_parser(subparsers) -> None:
     )
 
 
+def add_sync_parser(subparsers) -> None:
+    # noinspection SpellCheckingInspection
+    parser = subparsers.add_parser(
+        name=CMD_SYNC,
+        help=CMD_SYNC_HELP,
+        epilog=CMD_SYNC_EPILOG,
+        formatter_class=RawDescriptionHelpFormatter,
+    )
+    assert isinstance(parser, ArgumentParser)
+
+    parser.add_argument(
+        "--endpoint-path",
+        default=get_eval("ENDPOINT_PATH", DEFAULT_MEDIAWIKI_PATH),
+        help=(
+            "The API endpoint location on a MediaWiki site depends on the "
+            "configurable $wgScriptPath. Must contain a trailing slash ('/'). "
+            f"(default: '{DEFAULT_MEDIAWIKI_PATH}')"
+        ),
+    )
+    parser.add_argument(
+        "--username",
+        "-u",
+        default=get_eval("MEDIAWIKI_USERNAME"),
+        help="If API authentication is required, this is a UTF-8 encoded username.",
+    )
+    parser.add_argument(
+        "--password",
+        "-p",
+        default=get_eval("MEDIAWIKI_PASSWORD"),
+        help="If API authentication is required, this is a UTF-8 encoded password.",
+    )
+    parser.add_argument(
+        "--namespace",
+        "-n",
+        default=str(get_eval("MEDIAWIKI_NAMESPACE", DEFAULT_MEDIAWIKI_NAMESPACE)),
+        metavar="N[,N...]|all",
+        help=(
+            "Comma separated namespace numbers of the MediaWiki pages to sync, "
+            f"or '{ALL_NAMESPACES}' for every namespace of the wiki; "
+            "Multiple namespaces are listed concurrently with '--fetch-jobs' "
+            f"(default: {DEFAULT_MEDIAWIKI_NAMESPACE})"
+        ),
+    )
+    parser.add_argument(
+        "--no-expand-templates",
+        action="store_true",
+        default=get_eval("NO_EXPAND_TEMPLATES", False),
+        help="Expand templates.",
+    )
+    parser.add_argument(
+        "--expand-locally",
+        action="store_true",
+        default=get_eval("EXPAND_LOCALLY", False),
+        help=(
+            "Download the wiki text as written and expand templates locally, "
+            "with parameters, defaults, '#if', '#ifeq', '#switch' and page name "
+            "magic words; Template sources are read from the page store when "
+            "cached at their current revision, or downloaded once per run, "
+            "and a page using anything else is expanded on the server"
+        ),
+    )
+    parser.add_argument(
+        "--compress",
+        choices=COMPRESSIONS,
+        default=get_eval("COMPRESS", DEFAULT_COMPRESSION),
+        help=f"Compress the cached wiki text (default: '{DEFAULT_COMPRESSION}')",
+    )
+    parser.add_argument(
+        "--exclude-page",
+        default=get_eval("EXCLUDE_PAGE", DEFAULT_EXCLUDE_PAGE),
+        help=(
+            "The name of the MediaWiki page that stores the list of page names to "
+            f"exclude. (default: '{DEFAULT_EXCLUDE_PAGE}')"
+        ),
+    )
+    parser.add_argument(
+        "--image-page",
+        default=get_eval("IMAGE_PAGE", DEFAULT_IMAGE_PAGE),
+        help=(
+            "The name of the MediaWiki page that stores the list of image names. "
+            f"(default: '{DEFAULT_IMAGE_PAGE}')"
+        ),
+    )
+    parser.add_argument(
+        "--method-version",
+        "-m",
+        "-M",
+        type=int,
+        default=get_eval("METHOD_VERSION", DEFAULT_METHOD_VERSION),
+        choices=METHOD_VERSIONS,
+        help=f"Build method version number. (default: '{DEFAULT_METHOD_VERSION}')",
+    )
+    parser.add_argument(
+        "--mkdocs-yml",
+        default=get_eval("MKDOCS_YML", DEFAULT_MKDOCS_YML),
+        help=f"Provide a specific MkDocs config. (default: '{DEFAULT_MKDOCS_YML}')",
+    )
+    parser.add_argument(
+        "--refetch",
+        action="store_true",
+        default=False,
+        help="Download every listed page, even if the cached page is unchanged.",
+    )
+    parser.add_argument(
+        "--fetch-jobs",
+        type=int,
+        default=get_eval("SYNC_FETCH_JOBS", DEFAULT_SYNC_FETCH_JOBS),
+        metavar="N",
+        help=f"Number of concurrent download jobs (default: {DEFAULT_SYNC_FETCH_JOBS})",
+    )
+    parser.add_argument(
+        "--convert-jobs",
+        type=int,
+        default=0,
+        metavar="N",
+        help=(
+            "Number of conversion jobs; "
+            "If there is no argument, the number of CPUs usable by this process "
+            "(CPU affinity and cgroup quota) is selected."
+        ),
+    )
+    parser.add_argument(
+        "--executor",
+        choices=EXECUTORS,
+        default=get_eval("EXECUTOR", DEFAULT_EXECUTOR),
+        help=f"Worker type used to convert pages. (default: '{DEFAULT_EXECUTOR}')",
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=get_eval("SYNC_QUEUE_SIZE", DEFAULT_SYNC_QUEUE_SIZE),
+        metavar="N",
+        help=(
+            "Maximum number of fetched pages waiting for conversion "
+            f"(default: {DEFAULT_SYNC_QUEUE_SIZE})"
+        ),
+    )
+
+
 def default_argument_parser() -> ArgumentParser:
     parser = ArgumentParser(
         prog=PROG,
@@ -450,6 +850,25 @@ def default_argument_parser() -> ArgumentParser:
         default=get_eval("NO_CREATE_CACHE_DIR", False),
         help="Do not automatically create the cache directory if it does not exist.",
     )
+    parser.add_argument(
+        "--page-store",
+        choices=PAGE_STORES,
+        default=get_eval("PAGE_STORE", DEFAULT_PAGE_STORE),
+        help=(
+            f"Storage of the cached pages. '{PAGE_STORE_FILE}' keeps a JSON and a "
+            f"wiki file per page, '{PAGE_STORE_SQLITE}' keeps all pages in a single "
+            f"'{DEFAULT_PAGES_DB_FILENAME}' database (default: '{DEFAULT_PAGE_STORE}')"
+        ),
+    )
+    parser.add_argument(
+        "--fsync",
+        action="store_true",
+        default=get_eval("FSYNC", False),
+        help=(
+            "Flush written pages and documents to disk before they replace the "
+            "previous files. Directories are synced once per run"
+        ),
+    )
     parser.add_argument(
         "--yes",
         "-y",
@@ -465,6 +884,84 @@ def default_argument_parser() -> ArgumentParser:
         help="Do not raise even if an error occurs.",
     )
 
+    parser.add_argument(
+        "--http-retries",
+        type=int,
+        default=get_eval("HTTP_RETRIES", DEFAULT_HTTP_RETRIES),
+        metavar="N",
+        help=(
+            "Number of retries for MediaWiki requests that failed to connect "
+            f"or returned 429/5xx status (default: {DEFAULT_HTTP_RETRIES})"
+        ),
+    )
+    parser.add_argument(
+        "--http-backoff",
+        type=float,
+        default=get_eval("HTTP_BACKOFF", DEFAULT_HTTP_BACKOFF),
+        metavar="sec",
+        help=(
+            "Backoff factor of the exponential delay between retries "
+            f"(default: {DEFAULT_HTTP_BACKOFF})"
+        ),
+    )
+    parser.add_argument(
+        "--http-timeout",
+        type=float,
+        default=get_eval("HTTP_TIMEOUT", DEFAULT_HTTP_TIMEOUT),
+        metavar="sec",
+        help=f"Timeout of MediaWiki requests (default: {DEFAULT_HTTP_TIMEOUT})",
+    )
+    parser.add_argument(
+        "--http-rate-limit",
+        type=float,
+        default=get_eval("HTTP_RATE_LIMIT", DEFAULT_HTTP_RATE_LIMIT),
+        metavar="rps",
+        help=(
+            "Maximum number of MediaWiki requests per second, "
+            "shared by all jobs of a host; 0 is unlimited "
+            f"(default: {DEFAULT_HTTP_RATE_LIMIT})"
+        ),
+    )
+
+    parser.add_argument(
+        "--site-cache-ttl",
+        type=float,
+        default=get_eval("SITE_CACHE_TTL", DEFAULT_SITE_CACHE_TTL),
+        metavar="sec",
+        help=(
+            "Reuse the siteinfo and the login session cookies of an earlier run "
+            f"for this long, from '{DEFAULT_SITE_CACHE_FILENAME}' in the host cache "
+            f"directory; 0 disables the cache (default: {DEFAULT_SITE_CACHE_TTL})"
+        ),
+    )
+
+    http_cassette_group = parser.add_mutually_exclusive_group()
+    http_cassette_group.add_argument(
+        "--http-record",
+        default=get_eval("HTTP_RECORD", str()),
+        metavar="dir",
+        help="Save every MediaWiki response to a cassette directory",
+    )
+    http_cassette_group.add_argument(
+        "--http-replay",
+        default=get_eval("HTTP_REPLAY", str()),
+        metavar="dir",
+        help=(
+            "Serve MediaWiki responses from a cassette directory "
+            "instead of the network"
+        ),
+    )
+    parser.add_argument(
+        "--http-replay-latency",
+        type=float,
+        default=get_eval("HTTP_REPLAY_LATENCY", DEFAULT_HTTP_REPLAY_LATENCY),
+        metavar="sec",
+        help=(
+            "Delay added to each replayed response to simulate the network "
+            f"(default: {DEFAULT_HTTP_REPLAY_LATENCY})"
+        ),
+    )
+
     logging_group = parser.add_mutually_exclusive_group()
     logging_group.add_argument(
         "--colored-logging",
@@ -522,14 +1019,57 @@ def default_argument_parser() -> ArgumentParser:
         help="Same as ['-c', '-d', '-v'] flags",
     )
 
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        default=get_eval("PROFILE", False),
+        help="Print the wall and CPU time of each stage and the slowest pages",
+    )
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=get_eval("PROFILE_TOP", DEFAULT_PROFILE_TOP),
+        metavar="N",
+        help=f"Number of the slowest pages to report (default: {DEFAULT_PROFILE_TOP})",
+    )
+    parser.add_argument(
+        "--profile-output",
+        default=get_eval("PROFILE_OUTPUT", str()),
+        metavar="file",
+        help=(
+            "Dump cProfile statistics of the main process to a pstats file. "
+            "Use '--executor serial' to include the page conversions"
+        ),
+    )
+
+    parser.add_argument(
+        "--metrics-output",
+        default=get_eval("METRICS_OUTPUT", str()),
+        metavar="file",
+        help="Save the counters and histograms of this run to a file",
+    )
+    parser.add_argument(
+        "--metrics-format",
+        choices=METRICS_FORMATS,
+        default=get_eval("METRICS_FORMAT", DEFAULT_METRICS_FORMAT),
+        help=(
+            f"Format of the metrics file. Use '{METRICS_FORMAT_PROMETHEUS}' "
+            "for the node_exporter textfile collector "
+            f"(default: '{DEFAULT_METRICS_FORMAT}')"
+        ),
+    )
+
     subparsers = parser.add_subparsers(dest="cmd")
     add_build_parser(subparsers)
     add_clean_parser(subparsers)
     add_down_parser(subparsers)
     add_exclude_parser(subparsers)
     add_image_parser(subparsers)
+    add_import_parser(subparsers)
     add_index_parser(subparsers)
+    add_merge_parser(subparsers)
     add_nav_parser(subparsers)
+    add_sync_parser(subparsers)
 
     return parser
 
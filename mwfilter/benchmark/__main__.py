@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+
+import json
+from argparse import REMAINDER, ArgumentParser, Namespace, RawDescriptionHelpFormatter
+from pathlib import Path
+from sys import exit as sys_exit
+from sys import stderr
+from typing import Final, List, Optional
+
+from mwfilter.benchmark.corpus import (
+    DEFAULT_CORPUS_PAGES,
+    DEFAULT_CORPUS_SEED,
+    generate_corpus,
+)
+from mwfilter.benchmark.imports import DEFAULT_IMPORT_REPEAT
+from mwfilter.benchmark.runner import DEFAULT_REPEAT, STAGES
+
+PROG: Final[str] = "python -m mwfilter.benchmark"
+DESCRIPTION: Final[str] = "MediaWiki to Markdown conversion benchmark"
+DEFAULT_REGRESSION_THRESHOLD: Final[float] = 1.10
+
+EPILOG = f"""
+Measure the current tree and save the result:
+  {PROG} run -o base.json
+
+Compare two results (fails if a stage is more than 10% slower):
+  {PROG} compare base.json current.json
+
+Export the synthetic corpus as a page cache for 'mwfilter build':
+  {PROG} corpus -o ~/.mwfilter/bench.local/pages
+
+Measure the CLI startup time and check for unnecessary imports:
+  {PROG} imports --check -- --help
+"""
+
+
+def add_corpus_arguments(parser: ArgumentParser) -> None:
+    parser.add_argument(
+        "--pages",
+        type=int,
+        default=DEFAULT_CORPUS_PAGES,
+        help=f"Number of synthetic pages. (default: {DEFAULT_CORPUS_PAGES})",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=DEFAULT_CORPUS_SEED,
+        help=f"Random seed of the synthetic corpus. (default: {DEFAULT_CORPUS_SEED})",
+    )
+
+
+def default_argument_parser() -> ArgumentParser:
+    parser = ArgumentParser(
+        prog=PROG,
+        description=DESCRIPTION,
+        epilog=EPILOG,
+        formatter_class=RawDescriptionHelpFormatter,
+    )
+    subparsers = parser.add_subparsers(dest="cmd")
+
+    run_parser = subparsers.add_parser("run", help="Time each conversion stage")
+    add_corpus_arguments(run_parser)
+    run_parser.add_argument(
+        "--repeat",
+        "-r",
+        type=int,
+        default=DEFAULT_REPEAT,
+        help=f"Number of passes over the corpus. (default: {DEFAULT_REPEAT})",
+    )
+    run_parser.add_argument(
+        "--write-dir",
+        help="Directory to write Markdown files. (default: temporary directory)",
+    )
+    run_parser.add_argument(
+        "--output",
+        "-o",
+        help="Save the JSON result to a file instead of printing it.",
+    )
+
+    compare_parser = subparsers.add_parser("compare", help="Compare two results")
+    compare_parser.add_argument("base", help="Baseline result JSON file.")
+    compare_parser.add_argument("current", help="Current result JSON file.")
+    compare_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_REGRESSION_THRESHOLD,
+        help=(
+            "Fail if a stage time exceeds the baseline by this ratio. "
+            f"(default: {DEFAULT_REGRESSION_THRESHOLD})"
+        ),
+    )
+
+    corpus_parser = subparsers.add_parser("corpus", help="Export the corpus")
+    add_corpus_arguments(corpus_parser)
+    corpus_parser.add_argument(
+        "--output-dir",
+        "-o",
+        required=True,
+        help="Pages cache directory to write '.json' and '.wiki' files.",
+    )
+
+    imports_parser = subparsers.add_parser("imports", help="Measure CLI startup")
+    imports_parser.add_argument(
+        "--repeat",
+        "-r",
+        type=int,
+        default=DEFAULT_IMPORT_REPEAT,
+        help=f"Number of CLI invocations. (default: {DEFAULT_IMPORT_REPEAT})",
+    )
+    imports_parser.add_argument(
+        "--check",
+        action="store_true",
+        default=False,
+        help="Fail if the command imports a heavy dependency it does not need.",
+    )
+    imports_parser.add_argument(
+        "cmdline",
+        nargs=REMAINDER,
+        help="Command line of mwfilter. (default: '--version')",
+    )
+
+    return parser
+
+
+def run_main(args: Namespace) -> int:
+    from mwfilter.benchmark.runner import run_benchmark
+
+    pages = generate_corpus(args.pages, args.seed)
+    result = run_benchmark(
+        pages,
+        args.repeat,
+        seed=args.seed,
+        output_dir=args.write_dir,
+    )
+    result_json = json.dumps(result, indent=2, ensure_ascii=False)
+
+    if args.output:
+        Path(args.output).write_text(result_json)
+        for stage in STAGES:
+            best_total = result["stages"][stage]["best_total"] * 1000
+            print(f"{stage:>8}: {best_total:10.3f}ms")
+    else:
+        print(result_json)
+    return 0
+
+
+def compare_main(args: Namespace) -> int:
+    from mwfilter.benchmark.runner import compare_results
+
+    base = json.loads(Path(args.base).read_text())
+    current = json.loads(Path(args.current).read_text())
+    if base.get("corpus") != current.get("corpus"):
+        print("[WARNING] The results were measured on different corpora", file=stderr)
+
+    regressions = 0
+    for stage, ratio in compare_results(base, current).items():
+        mark = ""
+        if args.threshold < ratio:
+            mark = " (REGRESSION)"
+            regressions += 1
+        print(f"{stage:>8}: {ratio:6.3f}x{mark}")
+    return 1 if regressions else 0
+
+
+def corpus_main(args: Namespace) -> int:
+    from mwfilter.mw.page_meta import PageMeta
+    from mwfilter.store.file_store import FilePageStore
+
+    pages = list()
+    for i, page in enumerate(generate_corpus(args.pages, args.seed), start=1):
+        meta = PageMeta(
+            name=page.name,
+            page_title=page.name,
+            base_title=page.name,
+            base_name=page.name,
+            revision=i,
+            exists=True,
+            length=len(page.text.encode()),
+            page_id=i,
+        )
+        pages.append((meta, page.text))
+    FilePageStore(Path(args.output_dir)).put_many(pages)
+    return 0
+
+
+def imports_main(args: Namespace) -> int:
+    from mwfilter.benchmark.imports import measure_startup
+
+    cmdline = [x for x in args.cmdline if x != "--"] or ["--version"]
+    result = measure_startup(cmdline, args.repeat)
+    print(json.dumps(result, indent=2))
+
+    if args.check and result["heavy_modules"]:
+        modules = ", ".join(result["heavy_modules"])
+        print(f"[ERROR] Unnecessary modules were imported: {modules}", file=stderr)
+        return 1
+    return 0
+
+
+def main(cmdline: Optional[List[str]] = None) -> int:
+    args = default_argument_parser().parse_args(cmdline)
+    match args.cmd:
+        case "run":
+            return run_main(args)
+        case "compare":
+            return compare_main(args)
+        case "corpus":
+            return corpus_main(args)
+        case "imports":
+            return imports_main(args)
+        case _:
+            print("The 'cmd' argument is required.", file=stderr)
+            return 1
+
+
+if __name__ == "__main__":
+    sys_exit(main())
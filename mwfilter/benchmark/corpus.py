@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+
+from dataclasses import dataclass, field
+from io import StringIO
+from random import Random
+from typing import Final, List, Sequence
+
+DEFAULT_CORPUS_SEED: Final[int] = 8979
+DEFAULT_CORPUS_PAGES: Final[int] = 20
+DEFAULT_LARGE_PAGE_SECTIONS: Final[int] = 200
+
+PAGE_KIND_TABLE: Final[str] = "table"
+PAGE_KIND_LIST: Final[str] = "list"
+PAGE_KIND_REFERENCES: Final[str] = "references"
+PAGE_KIND_LINKS: Final[str] = "links"
+PAGE_KIND_LARGE: Final[str] = "large"
+PAGE_KINDS: Final[Sequence[str]] = (
+    PAGE_KIND_TABLE,
+    PAGE_KIND_LIST,
+    PAGE_KIND_REFERENCES,
+    PAGE_KIND_LINKS,
+    PAGE_KIND_LARGE,
+)
+
+_WORDS: Final[Sequence[str]] = (
+    "alpha",
+    "beta",
+    "gamma",
+    "delta",
+    "wiki",
+    "page",
+    "markdown",
+    "filter",
+    "server",
+    "client",
+    "cache",
+    "build",
+    "문서",
+    "위키",
+)
+
+
+@dataclass
+class CorpusPage:
+    name: str
+    kind: str
+    text: str = field(default_factory=str)
+
+
+def _sentence(rng: Random, words: int) -> str:
+    text = " ".join(rng.choice(_WORDS) for _ in range(words))
+    return text[:1].upper() + text[1:] + "."
+
+
+def _paragraph(rng: Random) -> str:
+    sentences = [_sentence(rng, rng.randint(6, 14)) for _ in range(rng.randint(2, 5))]
+    for i in range(len(sentences)):
+        match rng.randint(0, 5):
+            case 0:
+                sentences[i] = f"'''{sentences[i]}'''"
+            case 1:
+                sentences[i] = f"''{sentences[i]}''"
+    return " ".join(sentences)
+
+
+def _table(rng: Random, rows: int, cols: int) -> str:
+    buffer = StringIO()
+    buffer.write('{| class="wikitable"\n')
+    buffer.write("|+ " + _sentence(rng, 3) + "\n")
+    buffer.write("! " + " !! ".join(f"Header {c}" for c in range(cols)) + "\n")
+    for _ in range(rows):
+        buffer.write("|-\n")
+        buffer.write("| " + " || ".join(_sentence(rng, 2) for _ in range(cols)) + "\n")
+    buffer.write("|}\n")
+    return buffer.getvalue()
+
+
+def _nested_list(rng: Random, items: int, depth: int, marker="*") -> str:
+    buffer = StringIO()
+    for _ in range(items):
+        level = rng.randint(1, depth)
+        buffer.write(marker * level + " " + _sentence(rng, rng.randint(3, 8)) + "\n")
+    return buffer.getvalue()
+
+
+def _references(rng: Random, count: int) -> str:
+    buffer = StringIO()
+    for i in range(count):
+        buffer.write(_sentence(rng, rng.randint(5, 10)))
+        buffer.write(f"<ref>{_sentence(rng, 4)} https://example.com/{i}</ref> ")
+    buffer.write("\n\n== References ==\n<references />\n")
+    return buffer.getvalue()
+
+
+def _links(rng: Random, names: Sequence[str], count: int) -> str:
+    buffer = StringIO()
+    for _ in range(count):
+        name = rng.choice(names)
+        match rng.randint(0, 3):
+            case 0:
+                buffer.write(f"[[{name}]] ")
+            case 1:
+                buffer.write(f"[[{name}|{_sentence(rng, 2)}]] ")
+            case 2:
+                buffer.write(f"[https://example.com/{name} {name}] ")
+            case _:
+                buffer.write(f"[[Missing {rng.randint(0, 1000)}]] ")
+        buffer.write(_sentence(rng, rng.randint(2, 6)) + " ")
+    return buffer.getvalue() + "\n"
+
+
+def _section(rng: Random, names: Sequence[str], kind: str, index: int) -> str:
+    buffer = StringIO()
+    buffer.write(f"== Section {index} ==\n")
+    buffer.write(_paragraph(rng) + "\n\n")
+    match kind:
+        case "table":
+            buffer.write(_table(rng, rng.randint(5, 20), rng.randint(2, 6)))
+        case "list":
+            buffer.write(_nested_list(rng, rng.randint(10, 30), 4))
+            buffer.write(_nested_list(rng, rng.randint(5, 10), 3, marker="#"))
+        case "references":
+            buffer.write(_references(rng, rng.randint(5, 15)))
+        case "links":
+            buffer.write(_links(rng, names, rng.randint(30, 80)))
+        case _:
+            raise ValueError(f"Unsupported section kind: {kind}")
+    buffer.write("\n")
+    return buffer.getvalue()
+
+
+def generate_page(rng: Random, names: Sequence[str], name: str, kind: str) -> str:
+    buffer = StringIO()
+    buffer.write(_paragraph(rng) + "\n\n")
+    if kind == PAGE_KIND_LARGE:
+        section_kinds = PAGE_KIND_TABLE, PAGE_KIND_LIST, PAGE_KIND_LINKS
+        for i in range(DEFAULT_LARGE_PAGE_SECTIONS):
+            buffer.write(_section(rng, names, section_kinds[i % 3], i))
+    elif kind == PAGE_KIND_REFERENCES:
+        # A references section can only appear once per page.
+        buffer.write(_section(rng, names, kind, 0))
+    else:
+        for i in range(rng.randint(3, 8)):
+            buffer.write(_section(rng, names, kind, i))
+    return buffer.getvalue()
+
+
+def generate_corpus(
+    count=DEFAULT_CORPUS_PAGES,
+    seed=DEFAULT_CORPUS_SEED,
+) -> List[CorpusPage]:
+    rng = Random(seed)
+    names = [f"Bench_Page_{i}" for i in range(count)]
+    result = list()
+    for i, name in enumerate(names):
+        kind = PAGE_KINDS[i % len(PAGE_KINDS)]
+        result.append(CorpusPage(name, kind, generate_page(rng, names, name, kind)))
+    return result
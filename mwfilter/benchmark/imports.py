@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import sys
+from statistics import median
+from subprocess import check_output, run
+from time import perf_counter
+from typing import Any, Dict, Final, List, Optional, Sequence
+
+HEAVY_MODULES: Final[Sequence[str]] = (
+    "coloredlogs",
+    "mwclient",
+    "pypandoc",
+    "requests",
+    "type_serialize",
+    "yaml",
+    "mwfilter.mw.convert_info",
+    "mwfilter.pandoc.ast.pandoc",
+    "mwfilter.pandoc.markdown.dumper",
+)
+
+DEFAULT_IMPORT_REPEAT: Final[int] = 10
+
+_LOADED_MODULES_CODE: Final[str] = """
+import json
+import sys
+from contextlib import redirect_stdout
+from io import StringIO
+
+from mwfilter.entrypoint import main
+
+with redirect_stdout(StringIO()):
+    try:
+        main(json.loads(sys.argv[1]))
+    except SystemExit:
+        pass
+
+print(json.dumps(sorted(sys.modules.keys())))
+"""
+
+
+def _package_root() -> str:
+    return os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _subprocess_env() -> Dict[str, str]:
+    env = dict(os.environ)
+    paths = [_package_root()]
+    if python_path := env.get("PYTHONPATH"):
+        paths.append(python_path)
+    env["PYTHONPATH"] = os.pathsep.join(paths)
+    return env
+
+
+def loaded_modules(cmdline: List[str]) -> List[str]:
+    args = [sys.executable, "-c", _LOADED_MODULES_CODE, json.dumps(cmdline)]
+    output = check_output(args, env=_subprocess_env())
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def loaded_heavy_modules(cmdline: List[str]) -> List[str]:
+    modules = loaded_modules(cmdline)
+    result = list()
+    for heavy in HEAVY_MODULES:
+        prefix = heavy + "."
+        if any(m == heavy or m.startswith(prefix) for m in modules):
+            result.append(heavy)
+    return result
+
+
+def entrypoint_import_time() -> float:
+    # The last line of '-X importtime' is the top-level module with its
+    # cumulative time in microseconds.
+    args = [sys.executable, "-X", "importtime", "-c", "import mwfilter.entrypoint"]
+    process = run(args, env=_subprocess_env(), capture_output=True, check=True)
+    lines = process.stderr.decode().strip().splitlines()
+    entry = [line for line in lines if line.rstrip().endswith("mwfilter.entrypoint")]
+    return int(entry[-1].split("|")[1].strip()) / 1_000_000
+
+
+def measure_startup(
+    cmdline: List[str],
+    repeat=DEFAULT_IMPORT_REPEAT,
+    *,
+    cwd: Optional[str] = None,
+) -> Dict[str, Any]:
+    samples = list()
+    args = [sys.executable, "-m", "mwfilter", *cmdline]
+    for _ in range(repeat):
+        begin = perf_counter()
+        run(args, env=_subprocess_env(), cwd=cwd, capture_output=True)
+        samples.append(perf_counter() - begin)
+
+    return {
+        "cmdline": cmdline,
+        "repeat": repeat,
+        "min": min(samples),
+        "median": median(samples),
+        "import": entrypoint_import_time(),
+        "heavy_modules": loaded_heavy_modules(cmdline),
+    }
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+
+import os
+import platform
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from json import loads
+from pathlib import Path
+from statistics import median
+from subprocess import DEVNULL, CalledProcessError, check_output
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Any, Dict, Final, List, Optional, Sequence
+
+from pypandoc import convert_text
+
+from mwfilter import __version__
+from mwfilter.benchmark.corpus import CorpusPage
+from mwfilter.mw.page_meta import PageMeta
+from mwfilter.pandoc.ast.pandoc import Pandoc
+from mwfilter.pandoc.ast.validator.mediawiki import mediawiki_validator
+from mwfilter.pandoc.markdown.dumper import PandocToMarkdownDumper
+
+RESULT_SCHEMA_VERSION: Final[int] = 1
+DEFAULT_REPEAT: Final[int] = 3
+
+STAGE_PANDOC: Final[str] = "pandoc"
+STAGE_PARSE: Final[str] = "parse"
+STAGE_DUMP: Final[str] = "dump"
+STAGE_WRITE: Final[str] = "write"
+STAGES: Final[Sequence[str]] = STAGE_PANDOC, STAGE_PARSE, STAGE_DUMP, STAGE_WRITE
+
+
+@dataclass
+class StageStats:
+    count: int
+    total: float
+    mean: float
+    median: float
+    min: float
+    max: float
+
+    @classmethod
+    def from_samples(cls, samples: Sequence[float]):
+        if not samples:
+            return cls(0, 0.0, 0.0, 0.0, 0.0, 0.0)
+        total = sum(samples)
+        return cls(
+            count=len(samples),
+            total=total,
+            mean=total / len(samples),
+            median=median(samples),
+            min=min(samples),
+            max=max(samples),
+        )
+
+
+def git_commit(cwd: Optional[str] = None) -> Optional[str]:
+    try:
+        output = check_output(["git", "rev-parse", "HEAD"], cwd=cwd, stderr=DEVNULL)
+    except (OSError, CalledProcessError):
+        return None
+    return output.decode().strip() or None
+
+
+def time_page(
+    page: CorpusPage,
+    dumper: PandocToMarkdownDumper,
+    output_dir: Path,
+) -> Dict[str, float]:
+    meta = PageMeta(name=page.name, page_title=page.name, length=len(page.text))
+
+    t0 = perf_counter()
+    json_text = convert_text(page.text, to="json", format="mediawiki")
+    t1 = perf_counter()
+    json_obj = loads(json_text)
+    mediawiki_validator(json_obj)
+    pandoc = Pandoc.parse_object(json_obj)
+    t2 = perf_counter()
+    markdown = dumper.dump(pandoc, meta)
+    t3 = perf_counter()
+    (output_dir / meta.markdown_filename).write_text(markdown)
+    t4 = perf_counter()
+
+    return {
+        STAGE_PANDOC: t1 - t0,
+        STAGE_PARSE: t2 - t1,
+        STAGE_DUMP: t3 - t2,
+        STAGE_WRITE: t4 - t3,
+    }
+
+
+def run_benchmark(
+    pages: Sequence[CorpusPage],
+    repeat=DEFAULT_REPEAT,
+    *,
+    seed: Optional[int] = None,
+    output_dir: Optional[str] = None,
+) -> Dict[str, Any]:
+    assert 1 <= repeat
+    names = [page.name for page in pages]
+    dumper = PandocToMarkdownDumper(names, no_abspath=True)
+    samples: Dict[str, List[float]] = {stage: list() for stage in STAGES}
+    page_samples: Dict[str, Dict[str, List[float]]] = {
+        page.name: {stage: list() for stage in STAGES} for page in pages
+    }
+
+    with TemporaryDirectory() as tmpdir:
+        write_dir = Path(output_dir if output_dir else tmpdir)
+        write_dir.mkdir(parents=True, exist_ok=True)
+        for _ in range(repeat):
+            for page in pages:
+                for stage, elapsed in time_page(page, dumper, write_dir).items():
+                    samples[stage].append(elapsed)
+                    page_samples[page.name][stage].append(elapsed)
+
+    stages = {k: asdict(StageStats.from_samples(v)) for k, v in samples.items()}
+    for stage in STAGES:
+        # The sum of each page's fastest pass is the least noisy figure to compare.
+        best = (min(page_samples[page.name][stage]) for page in pages)
+        stages[stage]["best_total"] = sum(best)
+
+    return {
+        "schema": RESULT_SCHEMA_VERSION,
+        "created": datetime.now().astimezone().isoformat(),
+        "mwfilter": __version__,
+        "commit": git_commit(os.path.dirname(__file__)),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "corpus": {
+            "seed": seed,
+            "pages": len(pages),
+            "bytes": sum(len(page.text.encode()) for page in pages),
+        },
+        "repeat": repeat,
+        "stages": stages,
+        "pages": {
+            page.name: {
+                "kind": page.kind,
+                "bytes": len(page.text.encode()),
+                **{k: min(v) for k, v in page_samples[page.name].items()},
+            }
+            for page in pages
+        },
+    }
+
+
+def compare_results(
+    base: Dict[str, Any],
+    current: Dict[str, Any],
+    key="best_total",
+) -> Dict[str, float]:
+    result = dict()
+    base_stages = base.get("stages", dict())
+    current_stages = current.get("stages", dict())
+    for stage in STAGES:
+        if stage not in base_stages or stage not in current_stages:
+            continue
+        base_value = base_stages[stage][key]
+        current_value = current_stages[stage][key]
+        if base_value <= 0:
+            continue
+        result[stage] = current_value / base_value
+    return result
@@ -1,9 +1,11 @@
 # -*- coding: utf-8 -*-
 
 import os
+from argparse import Namespace
 from copy import copy
 from sys import exit as sys_exit
 from sys import stderr
+from time import monotonic, time
 from typing import List, Optional
 
 from mwfilter.apps import run_app
@@ -40,8 +42,14 @@ def main(cmdline: Optional[List[str]] = None) -> int:
     assert isinstance(args.debug, bool)
     assert isinstance(args.verbose, int)
     assert isinstance(args.D, bool)
-
-    if not args.hostname:
+    assert isinstance(args.profile, bool)
+    assert isinstance(args.profile_top, int)
+    assert isinstance(args.profile_output, str)
+    assert isinstance(args.metrics_output, str)
+    assert isinstance(args.metrics_format, str)
+
+    # Every build host carries its own hostname.
+    if not args.hostname and not getattr(args, "hosts", None):
         print("The 'hostname' argument is required.", file=stderr)
         return 1
 
@@ -96,7 +104,70 @@ def main(cmdline: Optional[List[str]] = None) -> int:
             setattr(ns, "password", "****")
         logger.debug(f"The command line argument is {ns}")
 
-    return run_app(cmd, args)
+    if args.metrics_output:
+        from mwfilter.system.metrics import metrics
+
+        metrics().set_constant_labels(command=cmd, host=args.hostname)
+
+    begin = monotonic()
+    if args.profile or args.profile_output:
+        code = run_app_with_profile(cmd, args)
+    else:
+        code = run_app(cmd, args)
+
+    if args.metrics_output:
+        save_metrics(args, code, monotonic() - begin)
+    return code
+
+
+def save_metrics(args: Namespace, code: int, duration: float) -> None:
+    from mwfilter.system.metrics import (
+        ERRORS,
+        RUN_DURATION,
+        RUN_SUCCESS,
+        RUN_TIMESTAMP,
+        SKIPPED,
+        metrics,
+    )
+
+    registry = metrics()
+    # Always export the failure counters so that alerts never see a missing series.
+    registry.inc(ERRORS, 0)
+    registry.inc(SKIPPED, 0)
+    registry.set(RUN_DURATION, duration)
+    registry.set(RUN_SUCCESS, 1 if code == 0 else 0)
+    registry.set(RUN_TIMESTAMP, time())
+    try:
+        registry.save(args.metrics_output, args.metrics_format)
+    except OSError as e:
+        logger.error(f"Failed to save metrics file: {e}")
+    else:
+        logger.debug(f"Saved metrics file: '{args.metrics_output}'")
+
+
+def run_app_with_profile(cmd: str, args: Namespace) -> int:
+    from cProfile import Profile
+
+    from mwfilter.system.timing import StageTimer, use_timer
+
+    timer = StageTimer() if args.profile else None
+    profiler = Profile() if args.profile_output else None
+
+    try:
+        with use_timer(timer):
+            if profiler is not None:
+                profiler.enable()
+            try:
+                return run_app(cmd, args)
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+    finally:
+        if timer is not None:
+            print(timer.report(args.profile_top), file=stderr)
+        if profiler is not None:
+            profiler.dump_stats(args.profile_output)
+            print(f"Saved profile statistics: '{args.profile_output}'", file=stderr)
 
 
 if __name__ == "__main__":
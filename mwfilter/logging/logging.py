@@ -13,7 +13,6 @@ from logging import (
     StreamHandler,
     getLogger,
 )
-from logging.handlers import TimedRotatingFileHandler
 from sys import stdout
 from typing import Final, Literal, Optional, Sequence, Union, get_args
 
@@ -141,6 +140,8 @@ def add_default_rotate_file_logging(
     when: Union[str, TimedRotatingWhenLiteral] = DEFAULT_TIMED_ROTATING_WHEN,
     level=DEBUG,
 ) -> None:
+    from logging.handlers import TimedRotatingFileHandler
+
     formatter = Formatter(
         fmt=DEFAULT_FORMAT,
         datefmt=DEFAULT_DATEFMT,
@@ -199,11 +200,11 @@ def add_simple_logging(level=DEBUG) -> None:
 
 
 def silent_unnecessary_loggers() -> None:
-    import mwclient
-    import pypandoc
-
-    mwclient.client.log.setLevel(CRITICAL)
-    pypandoc.logger.setLevel(CRITICAL)
+    # [IMPORTANT]
+    # Configure the loggers by name so that 'mwclient' and 'pypandoc' are not
+    # imported by commands that never use them.
+    getLogger("mwclient.client").setLevel(CRITICAL)
+    getLogger("pypandoc").setLevel(CRITICAL)
 
     getLogger("pandoc").setLevel(CRITICAL)
     getLogger("urllib3").setLevel(CRITICAL)
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+
+from math import ceil
+from typing import Any, Dict, Final, Iterator, List, NamedTuple, Optional, Sequence
+
+from mwclient import Site
+from mwclient.page import Page
+
+# [IMPORTANT]
+# The distribution of titles is unknown before they are listed,
+# so the title space is split at leading characters where most titles begin.
+TITLE_RANGE_BOUNDARIES: Final[Sequence[str]] = tuple(
+    "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+)
+
+# A range smaller than this many chunks is not worth its own request chain.
+MIN_CHUNKS_PER_RANGE: Final[int] = 2
+
+Continuation = Dict[str, str]
+
+
+class TitleRange(NamedTuple):
+    # Inclusive lower bound; None from the beginning.
+    start: Optional[str] = None
+
+    # Exclusive upper bound; None to the end.
+    end: Optional[str] = None
+
+    def includes(self, title: str) -> bool:
+        if self.start is not None and title < self.start:
+            return False
+        if self.end is not None and self.end <= title:
+            return False
+        return True
+
+    def __str__(self) -> str:
+        return f"[{self.start or str()!r}, {self.end or str()!r})"
+
+
+class AllPagesChunk(NamedTuple):
+    pages: List[Page]
+
+    # The arguments that request the next chunk; None after the last chunk.
+    continuation: Optional[Continuation]
+
+
+def page_title(info: Dict[str, Any]) -> str:
+    # 'apfrom' and 'apto' are compared with titles without the namespace prefix.
+    title = str(info.get("title", str()))
+    if info.get("ns", 0) and ":" in title:
+        return title.split(":", 1)[1]
+    return title
+
+
+def plan_title_ranges(page_count: int, jobs: int, chunk_size: int) -> List[TitleRange]:
+    capacity = max(1, ceil(page_count / (chunk_size * MIN_CHUNKS_PER_RANGE)))
+    count = min(jobs, capacity, len(TITLE_RANGE_BOUNDARIES) + 1)
+    if count <= 1:
+        return [TitleRange()]
+
+    step = len(TITLE_RANGE_BOUNDARIES) / count
+    bounds = [TITLE_RANGE_BOUNDARIES[round(step * i)] for i in range(1, count)]
+    starts: List[Optional[str]] = [None, *bounds]
+    ends: List[Optional[str]] = [*bounds, None]
+    return [TitleRange(s, e) for s, e in zip(starts, ends)]
+
+
+def allpages_args(
+    namespace: int,
+    chunk_size: int,
+    continuation: Optional[Continuation] = None,
+    title_range=TitleRange(),
+) -> Dict[str, Any]:
+    # The same generator query as 'Site.allpages()',
+    # so that every page arrives with its info and protection.
+    args: Dict[str, Any] = {
+        "generator": "allpages",
+        "gapnamespace": str(namespace),
+        "gaplimit": str(chunk_size),
+        "gapfilterredir": "all",
+        "gapdir": "ascending",
+        "prop": "info",
+        "inprop": "protection",
+    }
+    if title_range.start is not None:
+        args["gapfrom"] = title_range.start
+    if title_range.end is not None:
+        # 'apto' is inclusive; A title equal to the bound is dropped by the caller.
+        args["gapto"] = title_range.end
+    if continuation:
+        args.update(continuation)
+    return args
+
+
+def next_continuation(data: Dict[str, Any]) -> Optional[Continuation]:
+    if data.get("continue"):
+        # New style continuation, added in MediaWiki 1.21
+        return {str(k): str(v) for k, v in data["continue"].items()}
+    if "allpages" in data.get("query-continue", dict()):
+        # Old style continuation
+        return {str(k): str(v) for k, v in data["query-continue"]["allpages"].items()}
+    return None
+
+
+def iter_allpages_chunks(
+    site: Site,
+    namespace: int,
+    continuation: Optional[Continuation] = None,
+    chunk_size: Optional[int] = None,
+    title_range=TitleRange(),
+) -> Iterator[AllPagesChunk]:
+    # [IMPORTANT]
+    # Unlike 'Site.allpages()', the continuation of every chunk is exposed,
+    # so that an interrupted enumeration can be continued by a later process.
+    size = chunk_size if chunk_size else site.api_limit
+    while True:
+        args = allpages_args(namespace, size, continuation, title_range)
+        data = site.get("query", **args)
+        infos = data.get("query", dict()).get("pages", dict())
+        if isinstance(infos, dict):
+            infos = list(infos.values())
+        infos = sorted(infos, key=lambda x: x.get("title", str()))
+        infos = [x for x in infos if title_range.includes(page_title(x))]
+        pages = [Page(site, str(), info) for info in infos]
+
+        continuation = next_continuation(data)
+        yield AllPagesChunk(pages, continuation)
+        if continuation is None:
+            break
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Final, List, Optional, Sequence, Set
+
+from type_serialize import deserialize, serialize
+
+from mwfilter.system.atomic import atomic_write_text
+from mwfilter.system.shard import Shard, selection_digest
+
+BUILD_REPORT_VERSION: Final[int] = 1
+
+
+@dataclass
+class BuildFailure:
+    filename: str = field(default_factory=str)
+    error: str = field(default_factory=str)
+
+
+@dataclass
+class BuildReport:
+    version: int = BUILD_REPORT_VERSION
+    hostname: str = field(default_factory=str)
+    shard_index: int = 1
+    shard_count: int = 1
+
+    # All selected pages before sharding; The same in every shard of a build.
+    total: int = 0
+    selection: str = field(default_factory=str)
+
+    # Pages of this shard, and what became of them.
+    assigned: List[str] = field(default_factory=list)
+    converted: List[str] = field(default_factory=list)
+    failed: List[BuildFailure] = field(default_factory=list)
+
+    elapsed: float = 0.0
+    problems: List[str] = field(default_factory=list)
+
+    @property
+    def shard(self) -> Shard:
+        return Shard(self.shard_index, self.shard_count)
+
+    @classmethod
+    def load(cls, path: Path):
+        report = deserialize(json.loads(path.read_text(encoding="utf-8")), cls)
+        assert isinstance(report, cls)
+        return report
+
+    def save(self, path: Path, fsync=False) -> None:
+        text = json.dumps(serialize(self), ensure_ascii=False, indent=2)
+        atomic_write_text(path, text, fsync=fsync)
+
+
+def _values(reports: Sequence[BuildReport], attr: str) -> Set[object]:
+    return set(getattr(r, attr) for r in reports)
+
+
+def verify_reports(
+    reports: Sequence[BuildReport],
+    hostname: Optional[str] = None,
+) -> List[str]:
+    if not reports:
+        return ["No build reports"]
+
+    problems: List[str] = list()
+    for attr in ("version", "hostname", "shard_count", "total", "selection"):
+        values = _values(reports, attr)
+        if 1 < len(values):
+            problems.append(f"Shards disagree on '{attr}': {sorted(map(str, values))}")
+    if problems:
+        # Reports of different builds cannot be compared page by page.
+        return problems
+
+    first = reports[0]
+    if first.version != BUILD_REPORT_VERSION:
+        problems.append(f"Unsupported build report version: {first.version}")
+    if hostname is not None and first.hostname != hostname:
+        problems.append(f"The reports are for host '{first.hostname}'")
+
+    indices = [r.shard_index for r in reports]
+    for index in range(1, first.shard_count + 1):
+        found = indices.count(index)
+        if found == 0:
+            problems.append(f"Missing shard: {index}/{first.shard_count}")
+        elif 1 < found:
+            problems.append(f"Duplicated shard: {index}/{first.shard_count}")
+
+    owners: Dict[str, Shard] = dict()
+    converted: Dict[str, int] = dict()
+    for report in reports:
+        shard = report.shard
+        for filename in report.assigned:
+            if not shard.includes(filename):
+                problems.append(f"Page of another shard in {shard}: {filename}")
+            if filename in owners and owners[filename] != shard:
+                problems.append(
+                    f"Page in shards {owners[filename]} and {shard}: {filename}"
+                )
+            owners.setdefault(filename, shard)
+        for filename in report.converted:
+            converted[filename] = converted.get(filename, 0) + 1
+            if filename not in report.assigned:
+                problems.append(f"Unassigned page converted in {shard}: {filename}")
+        for failure in report.failed:
+            problems.append(f"Failed in {shard}: {failure.filename}: {failure.error}")
+
+    if len(owners) != first.total:
+        problems.append(f"{len(owners)} of {first.total} pages are assigned")
+    elif selection_digest(owners) != first.selection:
+        problems.append("The assigned pages are not the selected pages")
+    for filename in sorted(owners):
+        times = converted.get(filename, 0)
+        if times == 0:
+            problems.append(f"Not converted: {filename}")
+        elif 1 < times:
+            problems.append(f"Converted {times} times: {filename}")
+    return problems
+
+
+def merge_reports(
+    reports: Sequence[BuildReport],
+    hostname: Optional[str] = None,
+) -> BuildReport:
+    # The merged report is the report of an unsharded build, so it is the same
+    # whatever the order of the shards.
+    assert reports
+    first = reports[0]
+    failed = [f for r in reports for f in r.failed]
+    return BuildReport(
+        version=first.version,
+        hostname=first.hostname,
+        total=first.total,
+        selection=first.selection,
+        assigned=sorted(set(f for r in reports for f in r.assigned)),
+        converted=sorted(set(f for r in reports for f in r.converted)),
+        failed=sorted(failed, key=lambda x: (x.filename, x.error)),
+        elapsed=max(r.elapsed for r in reports),
+        problems=verify_reports(reports, hostname),
+    )
@@ -2,7 +2,15 @@
 
 from pathlib import Path
 
-from mwfilter.arguments import DEFAULT_EXCLUDE_YML, DEFAULT_PAGES_DIRNAME
+from mwfilter.arguments import (
+    DEFAULT_DOWN_STATE_FILENAME,
+    DEFAULT_EXCLUDE_YML,
+    DEFAULT_PAGES_DB_FILENAME,
+    DEFAULT_PAGES_DIRNAME,
+    DEFAULT_PAGES_INDEX_FILENAME,
+    DEFAULT_SITE_CACHE_FILENAME,
+    DEFAULT_TEMPLATE_INDEX_FILENAME,
+)
 
 
 def pages_cache_dirpath(
@@ -13,9 +21,51 @@ def pages_cache_dirpath(
     return Path(cache_dir) / hostname / pages_dirname
 
 
+def pages_db_filepath(
+    cache_dir: str,
+    hostname: str,
+    pages_db_filename=DEFAULT_PAGES_DB_FILENAME,
+) -> Path:
+    return Path(cache_dir) / hostname / pages_db_filename
+
+
+def pages_index_filepath(
+    cache_dir: str,
+    hostname: str,
+    pages_index_filename=DEFAULT_PAGES_INDEX_FILENAME,
+) -> Path:
+    return Path(cache_dir) / hostname / pages_index_filename
+
+
 def exclude_filepath(
     cache_dir: str,
     hostname: str,
     exclude_filename=DEFAULT_EXCLUDE_YML,
 ) -> Path:
     return Path(cache_dir) / hostname / exclude_filename
+
+
+def down_state_filepath(
+    cache_dir: str,
+    hostname: str,
+    namespace: int,
+    down_state_filename=DEFAULT_DOWN_STATE_FILENAME,
+) -> Path:
+    filename = down_state_filename.format(namespace=namespace)
+    return Path(cache_dir) / hostname / filename
+
+
+def site_cache_filepath(
+    cache_dir: str,
+    hostname: str,
+    site_cache_filename=DEFAULT_SITE_CACHE_FILENAME,
+) -> Path:
+    return Path(cache_dir) / hostname / site_cache_filename
+
+
+def template_index_filepath(
+    cache_dir: str,
+    hostname: str,
+    template_index_filename=DEFAULT_TEMPLATE_INDEX_FILENAME,
+) -> Path:
+    return Path(cache_dir) / hostname / template_index_filename
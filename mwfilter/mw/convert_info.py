@@ -1,14 +1,11 @@
 # -*- coding: utf-8 -*-
 
-import json
 import urllib.parse
 from dataclasses import dataclass, field
 from io import StringIO
-from pathlib import Path
 from typing import Optional
 
-from pypandoc import convert_file
-from type_serialize import deserialize
+from pypandoc import convert_file, convert_text
 
 from mwfilter.arguments import DEFAULT_METHOD_VERSION
 from mwfilter.assets import get_markdown_filter_lua
@@ -16,22 +13,29 @@ from mwfilter.mw.page_meta import PageMeta
 from mwfilter.mw.redirect import parse_redirect_pagename
 from mwfilter.pandoc.ast.pandoc import Pandoc
 from mwfilter.pandoc.markdown.dumper import PandocToMarkdownDumper
+from mwfilter.store.page_store import PageStore
+from mwfilter.system.timing import (
+    STAGE_DUMP,
+    STAGE_PANDOC,
+    STAGE_READ,
+    timing,
+)
 
 
 @dataclass
 class ConvertInfo:
-    meta_path: str = field(default_factory=str)
     text_path: str = field(default_factory=str)
     meta: PageMeta = field(default_factory=lambda: PageMeta())
     text: str = field(default_factory=str)
 
     @classmethod
-    def from_paths(cls, meta_path: Path, text_path: Path):
+    def from_store(cls, store: PageStore, filename: str):
+        with timing(STAGE_READ):
+            meta, text = store.get_page(filename)
         return cls(
-            meta_path=str(meta_path),
-            text_path=str(text_path),
-            meta=deserialize(json.loads(meta_path.read_bytes()), PageMeta),
-            text=text_path.read_text(),
+            text_path=store.text_path(filename) or str(),
+            meta=meta,
+            text=text,
         )
 
     @property
@@ -42,18 +46,14 @@ class ConvertInfo:
     def filename(self):
         return self.meta.filename
 
-    @property
-    def json_filename(self) -> str:
-        return self.meta.json_filename
-
-    @property
-    def wiki_filename(self) -> str:
-        return self.meta.wiki_filename
-
     @property
     def markdown_filename(self) -> str:
         return self.meta.markdown_filename
 
+    @property
+    def cost(self) -> int:
+        return len(self.text) if self.text else self.meta.length
+
     @property
     def date(self):
         return self.meta.date
@@ -94,17 +94,23 @@ class ConvertInfo:
                 raise ValueError(f"Unsupported method version: {version}")
 
     def as_markdown_v1(self) -> str:
-        return self.yaml_frontmatter + convert_file(
-            self.text_path,
+        kwargs = dict(
             to="markdown",
             format="mediawiki",
             filters=[get_markdown_filter_lua()],
         )
+        with timing(STAGE_PANDOC):
+            if self.text_path:
+                markdown = convert_file(self.text_path, **kwargs)
+            else:
+                # Pages kept in a database have no file that pandoc could read.
+                markdown = convert_text(self.text, **kwargs)
+        return self.yaml_frontmatter + markdown
 
     def as_markdown_v2(self, dumper: Optional[PandocToMarkdownDumper] = None) -> str:
         if dumper is None:
             dumper = PandocToMarkdownDumper(no_abspath=True)
         assert dumper is not None
-        with open(self.text_path, "rt") as f:
-            pandoc = Pandoc.parse_text(f.read())
+        pandoc = Pandoc.parse_text(self.text)
+        with timing(STAGE_DUMP):
             return dumper.dump(pandoc, self.meta)
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from type_serialize import deserialize, serialize
+
+from mwfilter.system.atomic import atomic_write_text
+
+
+@dataclass
+class DownState:
+    namespace: int = 0
+
+    # The arguments that request the first chunk not yet fully downloaded;
+    # None before the first chunk and once the enumeration is finished.
+    continuation: Optional[Dict[str, str]] = None
+    finished: bool = False
+
+    # Titles of the current chunk that are already in the page store.
+    completed: List[str] = field(default_factory=list)
+
+    # Titles that failed with '--ignore-errors'; They are retried at the end.
+    failed: List[str] = field(default_factory=list)
+
+    @classmethod
+    def load(cls, path: Path):
+        if not path.is_file():
+            return None
+        state = deserialize(json.loads(path.read_text()), cls)
+        assert isinstance(state, cls)
+        return state
+
+    def save(self, path: Path) -> None:
+        atomic_write_text(path, json.dumps(serialize(self), ensure_ascii=False))
+
+    def complete(self, title: str) -> None:
+        if title in self.failed:
+            self.failed.remove(title)
+        if title not in self.completed:
+            self.completed.append(title)
+
+    def fail(self, title: str) -> None:
+        if title not in self.failed:
+            self.failed.append(title)
+
+    def next_chunk(self, continuation: Optional[Dict[str, str]]) -> None:
+        # Everything before the continuation is done, so the titles are dropped
+        # and the state file stays small however large the wiki is.
+        self.continuation = continuation
+        self.finished = continuation is None
+        self.completed.clear()
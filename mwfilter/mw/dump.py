@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+
+import bz2
+import gzip
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import IO, Dict, Final, Iterator, Optional, Set, Tuple, Union
+from xml.etree.ElementTree import Element, iterparse
+
+from mwfilter.mw.page_meta import PageMeta
+from mwfilter.mw.redirect import parse_redirect_pagename
+
+BZIP2_MAGIC: Final[bytes] = b"BZh"
+GZIP_MAGIC: Final[bytes] = b"\x1f\x8b"
+
+DUMP_TIMESTAMP_FORMAT: Final[str] = "%Y-%m-%dT%H:%M:%SZ"
+
+
+DumpFile = Union[IO[bytes], bz2.BZ2File, gzip.GzipFile]
+
+
+def open_dump(path: str) -> DumpFile:
+    with open(path, "rb") as f:
+        magic = f.read(3)
+    if magic.startswith(BZIP2_MAGIC):
+        return bz2.open(path, "rb")
+    if magic.startswith(GZIP_MAGIC):
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def local_name(tag: str) -> str:
+    # The export schema version is part of the namespace URI,
+    # e.g. '{http://www.mediawiki.org/xml/export-0.11/}page'
+    return tag.rsplit("}", 1)[-1]
+
+
+def child_element(elem: Element, name: str) -> Optional[Element]:
+    for child in elem:
+        if local_name(child.tag) == name:
+            return child
+    return None
+
+
+def child_text(elem: Element, name: str) -> Optional[str]:
+    child = child_element(elem, name)
+    return child.text if child is not None else None
+
+
+def parse_timestamp(text: Optional[str]) -> Optional[datetime]:
+    if not text:
+        return None
+    return datetime.strptime(text, DUMP_TIMESTAMP_FORMAT)
+
+
+@dataclass
+class DumpRevision:
+    revision: int = 0
+    timestamp: Optional[datetime] = None
+    author: Optional[str] = None
+    content_model: str = field(default_factory=str)
+    text: str = field(default_factory=str)
+
+    @classmethod
+    def from_element(cls, elem: Element):
+        result = cls()
+        for child in elem:
+            match local_name(child.tag):
+                case "id":
+                    result.revision = int(child.text or 0)
+                case "timestamp":
+                    result.timestamp = parse_timestamp(child.text)
+                case "contributor":
+                    result.author = child_text(child, "username")
+                    if result.author is None:
+                        result.author = child_text(child, "ip")
+                case "model":
+                    result.content_model = child.text or str()
+                case "text":
+                    result.text = child.text or str()
+        return result
+
+
+class DumpReader:
+    def __init__(self, file: DumpFile, namespaces: Optional[Set[int]] = None):
+        self._file = file
+        self._namespaces = namespaces
+        self._namespace_names: Dict[int, str] = dict()
+
+    @property
+    def namespace_names(self) -> Dict[int, str]:
+        return self._namespace_names
+
+    def page_title(self, namespace: int, title: str) -> str:
+        prefix = self._namespace_names.get(namespace)
+        if namespace and prefix and title.startswith(prefix + ":"):
+            return title[len(prefix) + 1 :]
+        return title
+
+    def create_meta(
+        self,
+        elem: Element,
+        latest: Optional[DumpRevision],
+        authors: Set[str],
+    ) -> Optional[Tuple[PageMeta, str]]:
+        title = child_text(elem, "title") or str()
+        namespace = int(child_text(elem, "ns") or 0)
+        if self._namespaces is not None and namespace not in self._namespaces:
+            return None
+        if latest is None:
+            return None
+
+        page_title = self.page_title(namespace, title)
+        redirect = child_element(elem, "redirect")
+        touched = latest.timestamp or datetime.now()
+        meta = PageMeta(
+            namespace=namespace,
+            name=title,
+            page_title=page_title,
+            base_title=page_title.split("/")[0],
+            base_name=title.split("/")[0],
+            touched=touched,
+            revision=latest.revision,
+            exists=True,
+            length=len(latest.text.encode()),
+            redirect=redirect is not None,
+            page_id=int(child_text(elem, "id") or 0),
+            content_model=latest.content_model,
+            last_rev_time=latest.timestamp,
+            authors=sorted(authors),
+            templates_expanded=False,
+            from_dump=True,
+        )
+        if redirect is not None:
+            try:
+                redirect_pagename = parse_redirect_pagename(latest.text)
+            except ValueError:
+                redirect_pagename = redirect.get("title", str())
+            meta.redirect_pagename = PageMeta.normalize_page_name(redirect_pagename)
+        return meta, latest.text
+
+    def __iter__(self) -> Iterator[Tuple[PageMeta, str]]:
+        root: Optional[Element] = None
+        latest: Optional[DumpRevision] = None
+        authors: Set[str] = set()
+
+        # [IMPORTANT]
+        # Every finished element is cleared from the tree, so memory stays constant
+        # however large the dump is; Of a full history dump, only the text of the
+        # latest revision and the author names of the others are kept.
+        for event, elem in iterparse(self._file, events=("start", "end")):
+            if event == "start":
+                if root is None:
+                    root = elem
+                continue
+
+            match local_name(elem.tag):
+                case "namespace":
+                    key = int(elem.get("key", 0))
+                    self._namespace_names[key] = elem.text or str()
+                case "revision":
+                    revision = DumpRevision.from_element(elem)
+                    elem.clear()
+                    if revision.author:
+                        authors.add(revision.author)
+                    if latest is None or latest.revision < revision.revision:
+                        latest = revision
+                case "page":
+                    page = self.create_meta(elem, latest, authors)
+                    latest = None
+                    authors = set()
+                    elem.clear()
+                    if root is not None:
+                        root.clear()
+                    if page is not None:
+                        yield page
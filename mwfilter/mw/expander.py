@@ -0,0 +1,400 @@
+# -*- coding: utf-8 -*-
+
+import re
+from threading import Lock
+from typing import Callable, Dict, Final, List, Mapping, Optional, Set, Tuple, Union
+
+from mwfilter.mw.namespace import TEMPLATE_NAMESPACE, create_default_namespaces
+from mwfilter.mw.preprocessor import (
+    Argument,
+    Node,
+    Template,
+    Text,
+    page_text,
+    parse,
+    split_named,
+    transclusion_text,
+)
+from mwfilter.mw.redirect import REDIRECT_REGEX, parse_redirect_pagename
+
+# The same limit as the default $wgMaxTemplateDepth
+MAX_TEMPLATE_DEPTH: Final[int] = 40
+
+# The same limit as the default $wgMaxRedirects
+MAX_TEMPLATE_REDIRECTS: Final[int] = 1
+
+TEMPLATE_PREFIX: Final[str] = "Template:"
+
+# Like PHP is_numeric(), without the hexadecimal, infinite and NaN values
+# that float() also accepts.
+NUMBER_PATTERN: Final = re.compile(r"[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?")
+
+# A template output that begins with these starts a new line (T14974).
+BLOCK_STARTS: Final[Tuple[str, ...]] = ("{|", ":", ";", "#", "*")
+
+# Magic words that depend on the time, the wiki or the page revision,
+# which only the server can expand.
+UNSUPPORTED_PREFIXES: Final[Tuple[str, ...]] = (
+    "CURRENT",
+    "LOCAL",
+    "NUMBEROF",
+    "REVISION",
+)
+UNSUPPORTED_VARIABLES: Final[Set[str]] = {
+    "ARTICLEPAGENAME",
+    "BASEPAGENAMEE",
+    "CONTENTLANGUAGE",
+    "DIRMARK",
+    "FULLPAGENAMEE",
+    "NAMESPACEE",
+    "PAGEID",
+    "PAGENAMEE",
+    "PAGESIZE",
+    "ROOTPAGENAMEE",
+    "SCRIPTPATH",
+    "SERVER",
+    "SERVERNAME",
+    "STYLEPATH",
+    "SUBJECTPAGENAME",
+    "SUBJECTSPACE",
+    "SUBPAGENAMEE",
+    "TALKPAGENAME",
+    "TALKSPACE",
+}
+
+SourceLoader = Callable[[str], Optional[str]]
+
+
+class UnsupportedExpansion(Exception):
+    pass
+
+
+def normalize_title(title: str) -> str:
+    title = " ".join(title.replace("_", " ").split())
+    return title[:1].upper() + title[1:]
+
+
+def template_title(name: str, prefixes: Optional[Set[str]] = None) -> str:
+    # The prefixes of the template namespace, in lower case.
+    if prefixes is None:
+        prefixes = {TEMPLATE_PREFIX[:-1].lower()}
+
+    name = normalize_title(name)
+    if name.startswith(":"):
+        raise UnsupportedExpansion(f"Transclusion of a non-template page: {name}")
+    if ":" in name:
+        prefix, rest = name.split(":", 1)
+        if normalize_title(prefix).lower() not in prefixes:
+            raise UnsupportedExpansion(f"Unsupported transclusion: {name}")
+        name = rest.strip()
+    return TEMPLATE_PREFIX + normalize_title(name)
+
+
+def is_redirect(source: str) -> bool:
+    return REDIRECT_REGEX.match(source.strip()) is not None
+
+
+def redirect_target(source: str) -> str:
+    # The target of '#REDIRECT [[Template:Name#Section|Label]]' is 'Template:Name'.
+    pagename = parse_redirect_pagename(source)
+    return pagename.split("|", 1)[0].split("#", 1)[0]
+
+
+def _to_number(value: str) -> Optional[float]:
+    if NUMBER_PATTERN.fullmatch(value) is None:
+        return None
+    return float(value)
+
+
+def split_part(part: List[Node], equals: int) -> Tuple[List[Node], List[Node]]:
+    node = part[equals]
+    assert isinstance(node, Text)
+    key, value = node.text.split("=", 1)
+    return [*part[:equals], Text(key)], [Text(value), *part[equals + 1 :]]
+
+
+def is_equal(left: str, right: str) -> bool:
+    # Parser functions compare numbers by value, e.g. '01' equals '1.0'
+    a = _to_number(left)
+    b = _to_number(right)
+    if a is not None and b is not None:
+        return a == b
+    return left == right
+
+
+class Frame:
+    def __init__(
+        self,
+        title: str,
+        expander: "TemplateExpander",
+        parts: Optional[List[List[Node]]] = None,
+        parent: Optional["Frame"] = None,
+        namespace: int = 0,
+        page_title: Optional[str] = None,
+    ):
+        self.title = title
+        self.expander = expander
+        self.parent = parent
+        self.namespace = namespace
+        self.page_title = page_title if page_title is not None else title
+        self.depth: int = parent.depth + 1 if parent is not None else 0
+        self._unexpanded: Dict[str, Tuple[List[Node], bool]] = dict()
+        self._expanded: Dict[str, str] = dict()
+
+        index = 0
+        for part in parts if parts else list():
+            equals = split_named(part)
+            if equals is None:
+                index += 1
+                self._unexpanded[str(index)] = part, False
+                continue
+            assert parent is not None
+            key, value = split_part(part, equals)
+            name = expander.expand_nodes(key, parent).strip()
+            self._unexpanded[name] = value, True
+
+    @property
+    def root(self) -> "Frame":
+        frame = self
+        while frame.parent is not None:
+            frame = frame.parent
+        return frame
+
+    def titles(self) -> Set[str]:
+        result = set()
+        frame: Optional[Frame] = self
+        while frame is not None:
+            result.add(frame.title)
+            frame = frame.parent
+        return result
+
+    def argument(self, name: str) -> Optional[str]:
+        if name in self._expanded:
+            return self._expanded[name]
+        item = self._unexpanded.get(name)
+        if item is None:
+            return None
+
+        # Arguments are expanded lazily in the frame of the caller, so that the
+        # branches of parser functions that are not taken are never expanded.
+        nodes, named = item
+        assert self.parent is not None
+        value = self.expander.expand_nodes(nodes, self.parent)
+        if named:
+            value = value.strip()
+        self._expanded[name] = value
+        return value
+
+
+class TemplateExpander:
+    def __init__(
+        self,
+        loader: SourceLoader,
+        site_name: str = str(),
+        namespaces: Optional[Mapping[int, str]] = None,
+    ):
+        self._loader = loader
+        self._site_name = site_name
+        self._namespaces = namespaces if namespaces else create_default_namespaces()
+        local_prefix = self._namespaces.get(TEMPLATE_NAMESPACE, TEMPLATE_PREFIX[:-1])
+        self._template_prefixes = {TEMPLATE_PREFIX[:-1].lower(), local_prefix.lower()}
+        self._lock = Lock()
+        # The parsed template, or the reason it cannot be expanded.
+        self._sources: Dict[str, Union[List[Node], str]] = dict()
+
+    def template_source(self, title: str) -> str:
+        # A redirected template is transcluded from its target, as the parser does.
+        titles = [title]
+        source = self._loader(title)
+        while source is not None and is_redirect(source):
+            if MAX_TEMPLATE_REDIRECTS < len(titles):
+                raise UnsupportedExpansion(f"Too many template redirects: {title}")
+            target = template_title(redirect_target(source), self._template_prefixes)
+            if target in titles:
+                raise UnsupportedExpansion(f"Template redirect loop: {title}")
+            titles.append(target)
+            source = self._loader(target)
+        if source is None:
+            raise UnsupportedExpansion(f"Missing template: {titles[-1]}")
+        return source
+
+    def template_nodes(self, title: str) -> List[Node]:
+        # [IMPORTANT]
+        # Every template is loaded and parsed once per expander,
+        # and the parsed tree is shared by all pages that transclude it.
+        with self._lock:
+            nodes = self._sources.get(title)
+        if nodes is None:
+            try:
+                nodes = parse(transclusion_text(self.template_source(title)))
+            except UnsupportedExpansion as e:
+                nodes = str(e)
+            with self._lock:
+                self._sources[title] = nodes
+        if isinstance(nodes, str):
+            raise UnsupportedExpansion(nodes)
+        return nodes
+
+    def namespace_name(self, namespace: int) -> str:
+        name = self._namespaces.get(namespace)
+        if name is None:
+            raise UnsupportedExpansion(f"Unknown namespace: {namespace}")
+        return name
+
+    def expand(self, text: str, page_title: str, namespace: int = 0) -> str:
+        # The title is given without its namespace, as in 'PageMeta.page_title',
+        # because the main namespace allows colons in page titles.
+        prefix = self.namespace_name(namespace)
+        title = f"{prefix}:{page_title}" if prefix else page_title
+        frame = Frame(title, self, namespace=namespace, page_title=page_title)
+        return self.expand_nodes(parse(page_text(text)), frame)
+
+    def expand_nodes(self, nodes: List[Node], frame: Frame) -> str:
+        result = list()
+        for node in nodes:
+            if isinstance(node, Text):
+                result.append(node.text)
+            elif isinstance(node, Argument):
+                result.append(self.expand_argument(node, frame))
+            else:
+                assert isinstance(node, Template)
+                result.append(self.expand_template(node, frame))
+        return "".join(result)
+
+    def expand_argument(self, node: Argument, frame: Frame) -> str:
+        name = self.expand_nodes(node.parts[0], frame).strip()
+        value = frame.argument(name)
+        if value is not None:
+            return value
+        if 2 <= len(node.parts):
+            return self.expand_nodes(node.parts[1], frame)
+        return "{{{" + name + "}}}"
+
+    def expand_template(self, node: Template, frame: Frame) -> str:
+        name = self.expand_nodes(node.parts[0], frame).strip()
+        args = node.parts[1:]
+
+        if name.startswith("#"):
+            return self.parser_function(name, args, frame)
+
+        if ":" in name:
+            prefix, first = name.split(":", 1)
+            func = prefix.strip().lower()
+            if func == "safesubst":
+                name = first.strip()
+            elif func in ("lc", "uc", "lcfirst", "ucfirst"):
+                return self.case_function(func, first.strip())
+            elif func not in self._template_prefixes:
+                raise UnsupportedExpansion(f"Unsupported magic word: {prefix}")
+
+        variable = self.magic_variable(name, frame)
+        if variable is not None and not args:
+            return variable
+
+        title = template_title(name, self._template_prefixes)
+        if title in frame.titles():
+            raise UnsupportedExpansion(f"Template loop: {title}")
+        if MAX_TEMPLATE_DEPTH <= frame.depth:
+            raise UnsupportedExpansion(f"Template depth exceeded: {title}")
+
+        nodes = self.template_nodes(title)
+        text = self.expand_nodes(nodes, Frame(title, self, args, frame))
+        if text.startswith(BLOCK_STARTS):
+            return "\n" + text
+        return text
+
+    @staticmethod
+    def case_function(func: str, value: str) -> str:
+        match func:
+            case "lc":
+                return value.lower()
+            case "uc":
+                return value.upper()
+            case "lcfirst":
+                return value[:1].lower() + value[1:]
+            case "ucfirst":
+                return value[:1].upper() + value[1:]
+        raise UnsupportedExpansion(f"Unsupported case function: {func}")
+
+    def magic_variable(self, name: str, frame: Frame) -> Optional[str]:
+        root = frame.root
+        title = root.page_title
+
+        match name:
+            case "!":
+                return "|"
+            case "=":
+                return "="
+            case "FULLPAGENAME":
+                return root.title
+            case "PAGENAME":
+                return title
+            case "BASEPAGENAME":
+                return title.rsplit("/", 1)[0]
+            case "ROOTPAGENAME":
+                return title.split("/", 1)[0]
+            case "SUBPAGENAME":
+                return title.rsplit("/", 1)[-1]
+            case "NAMESPACE":
+                return self.namespace_name(root.namespace)
+            case "NAMESPACENUMBER":
+                return str(root.namespace)
+            case "SITENAME":
+                if self._site_name:
+                    return self._site_name
+        if name in UNSUPPORTED_VARIABLES or name.startswith(UNSUPPORTED_PREFIXES):
+            raise UnsupportedExpansion(f"Unsupported magic word: {name}")
+        return None
+
+    def parser_function(
+        self,
+        name: str,
+        args: List[List[Node]],
+        frame: Frame,
+    ) -> str:
+        func, first = name.split(":", 1) if ":" in name else (name, str())
+        first = first.strip()
+
+        def _arg(index: int) -> str:
+            if index < len(args):
+                return self.expand_nodes(args[index], frame).strip()
+            return str()
+
+        match func.lower():
+            case "#if":
+                return _arg(0) if first else _arg(1)
+            case "#ifeq":
+                return _arg(1) if is_equal(first, _arg(0)) else _arg(2)
+            case "#switch":
+                return self.switch(first, args, frame)
+        raise UnsupportedExpansion(f"Unsupported parser function: {func}")
+
+    def switch(self, value: str, args: List[List[Node]], frame: Frame) -> str:
+        found = False
+        default: Optional[List[Node]] = None
+        last: Optional[str] = None
+        for part in args:
+            equals = split_named(part)
+            if equals is None:
+                # A case without a value falls through to the next value.
+                last = self.expand_nodes(part, frame).strip()
+                if is_equal(last, value):
+                    found = True
+                continue
+
+            last = None
+            key_nodes, result = split_part(part, equals)
+            if found:
+                return self.expand_nodes(result, frame).strip()
+            key = self.expand_nodes(key_nodes, frame).strip()
+            if is_equal(key, value):
+                return self.expand_nodes(result, frame).strip()
+            if key == "#default":
+                default = result
+
+        if last is not None:
+            # The last case without a value is the default.
+            return last
+        if default is not None:
+            return self.expand_nodes(default, frame).strip()
+        return str()
@@ -2,7 +2,7 @@
 
 from functools import lru_cache
 from types import MappingProxyType
-from typing import Final
+from typing import Final, Iterable, List, Optional
 
 NamespaceMap = MappingProxyType[int, str]
 
@@ -36,3 +36,27 @@ def create_default_namespaces() -> NamespaceMap:
             15: "Category talk",
         }
     )
+
+
+ALL_NAMESPACES: Final[str] = "all"
+
+
+def parse_namespaces(value: str) -> Optional[List[int]]:
+    # A comma separated list of namespace numbers, or None for 'all'.
+    if value.strip().lower() == ALL_NAMESPACES:
+        return None
+
+    result: List[int] = list()
+    for item in value.split(","):
+        try:
+            namespace = int(item.strip())
+        except ValueError:
+            raise ValueError(f"Unexpected namespace number: {item.strip()!r}")
+        if namespace not in result:
+            result.append(namespace)
+    return result
+
+
+def listable_namespaces(namespaces: Iterable[int]) -> List[int]:
+    # The 'Media' and 'Special' namespaces have no pages to list.
+    return sorted(namespace for namespace in namespaces if 0 <= namespace)
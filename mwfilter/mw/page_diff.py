@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+
+from typing import Iterable, List, Set
+
+from mwfilter.mw.page_meta import PageMeta
+
+
+def is_unchanged(cached: PageMeta, listed: PageMeta, expanded=True) -> bool:
+    if cached.templates_expanded != expanded:
+        # The cached text would not be the text this download stores.
+        return False
+    if not expanded:
+        # Text stored as written only changes with a new revision.
+        return cached.revision == listed.revision
+    # [IMPORTANT]
+    # 'touched' also changes when a used template is edited,
+    # which matters because the cached text is stored with templates expanded.
+    return cached.revision == listed.revision and cached.touched == listed.touched
+
+
+def vanished_filenames(
+    cached: Iterable[PageMeta],
+    namespace: int,
+    seen: Set[str],
+) -> List[str]:
+    result = list()
+    for meta in cached:
+        if meta.namespace == namespace and meta.filename not in seen:
+            result.append(meta.filename)
+    result.sort()
+    return result
@@ -34,6 +34,12 @@ class PageMeta:
     redirect_pagename: Optional[str] = None
     authors: List[str] = field(default_factory=list)
 
+    # Text stored as written, by 'down --no-expand-templates' or from a dump,
+    # has no templates expanded. The revision timestamp of a dump is also its
+    # 'touched' time.
+    templates_expanded: bool = True
+    from_dump: bool = False
+
     @classmethod
     def from_page(cls, page: Page):
         try:
@@ -82,14 +88,6 @@ class PageMeta:
         dt = self.last_rev_time or self.touched
         return dt.date().isoformat()
 
-    @property
-    def json_filename(self) -> str:
-        return self.filename + ".json"
-
-    @property
-    def wiki_filename(self) -> str:
-        return self.filename + ".wiki"
-
     @property
     def markdown_filename(self) -> str:
         return self.filename + ".md"
@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+
+import re
+from dataclasses import dataclass, field
+from typing import Final, List, Optional, Sequence, Union
+
+# The content of these tags is passed through without expanding templates,
+# the same as the MediaWiki preprocessor does for extension tags.
+VERBATIM_TAGS: Final[Sequence[str]] = (
+    "nowiki",
+    "pre",
+    "math",
+    "chem",
+    "syntaxhighlight",
+    "source",
+    "ref",
+    "references",
+    "gallery",
+    "score",
+    "timeline",
+    "templatedata",
+)
+
+COMMENT_PATTERN: Final = re.compile(r"<!--.*?(?:-->|\Z)", re.DOTALL)
+VERBATIM_PATTERN: Final = re.compile(
+    r"<(?P<tag>" + "|".join(VERBATIM_TAGS) + r")(?:\s[^>]*?)?(?:/>|>.*?</(?P=tag)\s*>)",
+    re.DOTALL | re.IGNORECASE,
+)
+ONLYINCLUDE_PATTERN: Final = re.compile(
+    r"<onlyinclude>(.*?)</onlyinclude>",
+    re.DOTALL | re.IGNORECASE,
+)
+
+
+def _section_pattern(tag: str) -> re.Pattern:
+    return re.compile(rf"<{tag}>.*?(?:</{tag}>|\Z)", re.DOTALL | re.IGNORECASE)
+
+
+def _tag_pattern(tag: str) -> re.Pattern:
+    return re.compile(rf"</?{tag}\s*/?>", re.IGNORECASE)
+
+
+NOINCLUDE_SECTION: Final = _section_pattern("noinclude")
+INCLUDEONLY_SECTION: Final = _section_pattern("includeonly")
+NOINCLUDE_TAG: Final = _tag_pattern("noinclude")
+INCLUDEONLY_TAG: Final = _tag_pattern("includeonly")
+ONLYINCLUDE_TAG: Final = _tag_pattern("onlyinclude")
+
+
+@dataclass
+class Text:
+    text: str = field(default_factory=str)
+
+
+@dataclass
+class Template:
+    # The name is the first part; The arguments are the following parts.
+    parts: List[List["Node"]] = field(default_factory=list)
+
+
+@dataclass
+class Argument:
+    # '{{{name|default}}}'; Parts after the default are ignored.
+    parts: List[List["Node"]] = field(default_factory=list)
+
+
+Node = Union[Text, Template, Argument]
+
+
+def transclusion_text(source: str) -> str:
+    # The part of a template page that is included in other pages.
+    if ONLYINCLUDE_PATTERN.search(source):
+        source = "".join(ONLYINCLUDE_PATTERN.findall(source))
+    source = NOINCLUDE_SECTION.sub(str(), source)
+    return INCLUDEONLY_TAG.sub(str(), source)
+
+
+def page_text(source: str) -> str:
+    # The part of a page that is rendered on the page itself.
+    source = INCLUDEONLY_SECTION.sub(str(), source)
+    source = NOINCLUDE_TAG.sub(str(), source)
+    return ONLYINCLUDE_TAG.sub(str(), source)
+
+
+class _Open:
+    def __init__(self, opening: str, count: int):
+        self.opening = opening
+        self.count = count
+        self.parts: List[List[Node]] = [list()]
+
+    @property
+    def is_brace(self) -> bool:
+        return self.opening == "{"
+
+    def flatten(self) -> List[Node]:
+        # An element that is never closed is literal text.
+        result: List[Node] = [Text(self.opening * self.count)]
+        for i, part in enumerate(self.parts):
+            if 0 < i:
+                result.append(Text("|"))
+            result.extend(part)
+        return result
+
+
+def _append(nodes: List[Node], node: Node) -> None:
+    if isinstance(node, Text):
+        if not node.text:
+            return
+        if nodes and isinstance(nodes[-1], Text):
+            nodes[-1] = Text(nodes[-1].text + node.text)
+            return
+    nodes.append(node)
+
+
+def _run_length(text: str, i: int, char: str) -> int:
+    j = i
+    while j < len(text) and text[j] == char:
+        j += 1
+    return j - i
+
+
+def parse(text: str) -> List[Node]:
+    # [IMPORTANT]
+    # A run of opening braces is matched with the closing run in the same way as
+    # the MediaWiki preprocessor: three braces make an argument, two a template,
+    # and the rest stays open, so '{{{{{x}}}}}' is a template named by an argument.
+    # Pipes inside '[[...]]' belong to the link, not to the enclosing template.
+    text = COMMENT_PATTERN.sub(str(), text)
+    root: List[Node] = list()
+    stack: List[_Open] = list()
+
+    def _current() -> List[Node]:
+        return stack[-1].parts[-1] if stack else root
+
+    i = 0
+    size = len(text)
+    while i < size:
+        c = text[i]
+
+        if c == "<":
+            verbatim = VERBATIM_PATTERN.match(text, i)
+            if verbatim is not None:
+                _append(_current(), Text(verbatim.group(0)))
+                i = verbatim.end()
+                continue
+
+        if c == "{":
+            n = _run_length(text, i, "{")
+            if 2 <= n:
+                stack.append(_Open("{", n))
+            else:
+                _append(_current(), Text(c))
+            i += n
+            continue
+
+        if c == "[" and text.startswith("[[", i):
+            stack.append(_Open("[", 2))
+            i += 2
+            continue
+
+        if c == "|" and stack:
+            stack[-1].parts.append(list())
+            i += 1
+            continue
+
+        if c == "]" and text.startswith("]]", i) and stack and not stack[-1].is_brace:
+            link = stack.pop()
+            for node in [*link.flatten(), Text("]]")]:
+                _append(_current(), node)
+            i += 2
+            continue
+
+        if c == "}" and stack and stack[-1].is_brace:
+            closing = _run_length(text, i, "}")
+            while 2 <= closing and stack and stack[-1].is_brace:
+                top = stack[-1]
+                used = 3 if 3 <= min(top.count, closing) else 2
+                closed: Node = Argument(top.parts) if used == 3 else Template(top.parts)
+                top.count -= used
+                closing -= used
+                if 2 <= top.count:
+                    top.parts = [[closed]]
+                    continue
+                stack.pop()
+                if top.count == 1:
+                    _append(_current(), Text("{"))
+                _append(_current(), closed)
+            _append(_current(), Text("}" * closing))
+            i += _run_length(text, i, "}")
+            continue
+
+        j = i + 1
+        while j < size and text[j] not in "<{}[]|":
+            j += 1
+        _append(_current(), Text(text[i:j]))
+        i = j
+
+    while stack:
+        for node in stack.pop().flatten():
+            _append(_current(), node)
+    return root
+
+
+def split_named(part: List[Node]) -> Optional[int]:
+    # Index of the text node with the first top-level '=', which names an argument.
+    for index, node in enumerate(part):
+        if isinstance(node, Text) and "=" in node.text:
+            return index
+    return None
@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+from base64 import b64decode, b64encode
+from hashlib import sha1
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from threading import Lock
+from time import sleep
+from typing import Any, Dict, Final, List, Optional, Sequence, Tuple, Union
+from urllib.parse import parse_qsl, urlsplit
+
+from requests import PreparedRequest, Response
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError
+from requests.structures import CaseInsensitiveDict
+
+CASSETTE_MODE_RECORD: Final[str] = "record"
+CASSETTE_MODE_REPLAY: Final[str] = "replay"
+CASSETTE_MODES: Final[Sequence[str]] = CASSETTE_MODE_RECORD, CASSETTE_MODE_REPLAY
+CASSETTE_SCHEMA_VERSION: Final[int] = 1
+
+# [IMPORTANT]
+# Credentials and tokens must never be written to the cassette directory,
+# and they change between runs, so they are not part of the request key either.
+SECRET_PARAMS: Final[Sequence[str]] = (
+    "lgpassword",
+    "lgtoken",
+    "logintoken",
+    "password",
+    "token",
+)
+
+# The body of a replayed response is stored already decoded,
+# and the session cookies of a login are never stored.
+IGNORED_RESPONSE_HEADERS: Final[Sequence[str]] = (
+    "content-encoding",
+    "content-length",
+    "transfer-encoding",
+    "connection",
+    "keep-alive",
+    "set-cookie",
+)
+
+# Login, CSRF and other tokens in a JSON body are stored with this value.
+# They are left out of the request key, so a replayed token is never checked.
+REDACTED_VALUE: Final[str] = "REDACTED"
+
+Params = List[Tuple[str, str]]
+
+
+def request_params(request: PreparedRequest) -> Params:
+    params = parse_qsl(urlsplit(request.url or str()).query, keep_blank_values=True)
+    body: Optional[str] = None
+    if isinstance(request.body, bytes):
+        try:
+            body = request.body.decode()
+        except UnicodeDecodeError:
+            body = None
+    elif isinstance(request.body, str):
+        body = request.body
+    content_type = str(request.headers.get("Content-Type", str()))
+    if body and content_type.startswith("application/x-www-form-urlencoded"):
+        params += parse_qsl(body, keep_blank_values=True)
+    return sorted((k, v) for k, v in params if k not in SECRET_PARAMS)
+
+
+def redact_tokens(obj: Any) -> Any:
+    if isinstance(obj, dict):
+        return {
+            k: (
+                REDACTED_VALUE
+                if isinstance(v, str) and str(k).endswith("token")
+                else redact_tokens(v)
+            )
+            for k, v in obj.items()
+        }
+    elif isinstance(obj, list):
+        return [redact_tokens(v) for v in obj]
+    else:
+        return obj
+
+
+def redact_content(content: bytes, content_type: str) -> bytes:
+    if not content_type.startswith("application/json"):
+        return content
+    try:
+        obj = json.loads(content)
+    except ValueError:
+        return content
+    redacted = redact_tokens(obj)
+    if redacted == obj:
+        return content
+    return json.dumps(redacted, ensure_ascii=False).encode()
+
+
+def request_key(method: str, url: str, params: Params) -> str:
+    parts = urlsplit(url)
+    query = "&".join(f"{k}={v}" for k, v in params)
+    text = f"{method.upper()} {parts.netloc}{parts.path}?{query}"
+    return sha1(text.encode()).hexdigest()
+
+
+class CassetteEntry:
+    def __init__(
+        self,
+        method: str,
+        url: str,
+        params: Params,
+        status: int,
+        headers: Dict[str, str],
+        content: bytes,
+        reason: Optional[str] = None,
+    ):
+        self.method = method.upper()
+        self.url = url
+        self.params = params
+        self.status = status
+        self.headers = headers
+        self.content = content
+        self.reason = reason
+
+    @property
+    def key(self) -> str:
+        return request_key(self.method, self.url, self.params)
+
+    @classmethod
+    def from_response(cls, request: PreparedRequest, response: Response):
+        headers = {
+            k: v
+            for k, v in response.headers.items()
+            if k.lower() not in IGNORED_RESPONSE_HEADERS
+        }
+        assert request.method is not None
+        assert request.url is not None
+        return cls(
+            method=request.method,
+            url=urlsplit(request.url)._replace(query=str()).geturl(),
+            params=request_params(request),
+            status=response.status_code,
+            headers=headers,
+            content=redact_content(
+                response.content,
+                str(response.headers.get("Content-Type", str())),
+            ),
+            reason=response.reason,
+        )
+
+    @classmethod
+    def from_object(cls, obj: Dict[str, Any]):
+        if "text" in obj:
+            content = str(obj["text"]).encode()
+        else:
+            content = b64decode(obj.get("base64", str()))
+        return cls(
+            method=obj["method"],
+            url=obj["url"],
+            params=[(str(k), str(v)) for k, v in obj.get("params", list())],
+            status=obj.get("status", 200),
+            headers=dict(obj.get("headers", dict())),
+            content=content,
+            reason=obj.get("reason"),
+        )
+
+    def as_object(self) -> Dict[str, Any]:
+        result: Dict[str, Any] = {
+            "schema": CASSETTE_SCHEMA_VERSION,
+            "method": self.method,
+            "url": self.url,
+            "params": self.params,
+            "status": self.status,
+            "reason": self.reason,
+            "headers": self.headers,
+        }
+        try:
+            result["text"] = self.content.decode()
+        except UnicodeDecodeError:
+            result["base64"] = b64encode(self.content).decode()
+        return result
+
+    def as_response(self, request: PreparedRequest) -> Response:
+        response = Response()
+        response.status_code = self.status
+        response.reason = self.reason or str()
+        response.headers = CaseInsensitiveDict(self.headers)
+        response._content = self.content  # noqa
+        response.url = request.url or self.url
+        response.request = request
+        response.encoding = "utf-8"
+        return response
+
+
+class Cassette:
+    def __init__(self, root: Union[str, os.PathLike]):
+        self._root = Path(root)
+
+    @property
+    def root(self) -> Path:
+        return self._root
+
+    def path(self, key: str) -> Path:
+        return self._root / key[:2] / f"{key}.json"
+
+    def load(self, key: str) -> Optional[CassetteEntry]:
+        try:
+            text = self.path(key).read_text()
+        except FileNotFoundError:
+            return None
+        return CassetteEntry.from_object(json.loads(text))
+
+    def save(self, entry: CassetteEntry) -> Path:
+        path = self.path(entry.key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        text = json.dumps(entry.as_object(), indent=2, ensure_ascii=False)
+        with NamedTemporaryFile("wt", dir=path.parent, delete=False) as f:
+            f.write(text)
+        os.replace(f.name, path)
+        return path
+
+
+class CassetteAdapter(HTTPAdapter):
+    def __init__(
+        self,
+        cassette: Cassette,
+        mode=CASSETTE_MODE_REPLAY,
+        latency=0.0,
+        **kwargs,
+    ):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"Unsupported cassette mode: {mode}")
+        assert 0 <= latency
+
+        super().__init__(**kwargs)
+        self._cassette = cassette
+        self._mode = mode
+        self._latency = latency
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def cassette(self) -> Cassette:
+        return self._cassette
+
+    @property
+    def mode(self) -> str:
+        return self._mode
+
+    def send(self, request: PreparedRequest, **kwargs) -> Response:  # type: ignore
+        if self._mode == CASSETTE_MODE_RECORD:
+            return self.record(request, **kwargs)
+        else:
+            return self.replay(request)
+
+    def record(self, request: PreparedRequest, **kwargs) -> Response:
+        response = super().send(request, **kwargs)
+        entry = CassetteEntry.from_response(request, response)
+        with self._lock:
+            self._cassette.save(entry)
+            self.misses += 1
+        return response
+
+    def replay(self, request: PreparedRequest) -> Response:
+        assert request.method is not None
+        assert request.url is not None
+        key = request_key(request.method, request.url, request_params(request))
+        entry = self._cassette.load(key)
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if entry is None:
+            raise ConnectionError(
+                f"No recorded response for {request.method} {request.url} "
+                f"in '{str(self._cassette.root)}' ({key})",
+                request=request,
+            )
+
+        if self._latency:
+            sleep(self._latency)
+        return entry.as_response(request)
@@ -0,0 +1,344 @@
+# -*- coding: utf-8 -*-
+
+from argparse import Namespace
+from dataclasses import dataclass
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Final, Optional, Sequence, Tuple
+
+from mwclient import Site
+from mwclient.client import USER_AGENT
+from mwclient.errors import APIError, MaximumRetriesExceeded
+from mwclient.sleep import Sleeper, Sleepers
+from requests import PreparedRequest, Response, Session
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from mwfilter.arguments import (
+    DEFAULT_HTTP_BACKOFF,
+    DEFAULT_HTTP_RATE_LIMIT,
+    DEFAULT_HTTP_REPLAY_LATENCY,
+    DEFAULT_HTTP_RETRIES,
+    DEFAULT_HTTP_TIMEOUT,
+    DEFAULT_SITE_CACHE_TTL,
+    version,
+)
+from mwfilter.logging.logging import logger
+from mwfilter.mw.cache_dirs import site_cache_filepath
+from mwfilter.mw.site_cache import SiteCache
+from mwfilter.system.rate_limit import RateLimiter
+
+RETRY_STATUS_CODES: Final[Sequence[int]] = 429, 500, 502, 503, 504
+RETRY_METHODS: Final[Sequence[str]] = "GET", "HEAD", "OPTIONS", "POST"
+
+# Number of hosts whose connections are kept alive;
+# The API host and the upload host of images are usually enough.
+DEFAULT_POOL_CONNECTIONS: Final[int] = 4
+
+SiteKey = Tuple[str, str, Optional[str], "HttpOptions"]
+
+
+@dataclass(frozen=True)
+class HttpOptions:
+    retries: int = DEFAULT_HTTP_RETRIES
+    backoff: float = DEFAULT_HTTP_BACKOFF
+    timeout: float = DEFAULT_HTTP_TIMEOUT
+    rate_limit: float = DEFAULT_HTTP_RATE_LIMIT
+    record_dir: Optional[str] = None
+    replay_dir: Optional[str] = None
+    replay_latency: float = DEFAULT_HTTP_REPLAY_LATENCY
+    site_cache_path: Optional[str] = None
+    site_cache_ttl: float = DEFAULT_SITE_CACHE_TTL
+    fsync: bool = False
+
+    @classmethod
+    def from_namespace(cls, args: Namespace):
+        assert isinstance(args.cache_dir, str)
+        assert isinstance(args.hostname, str)
+        assert isinstance(args.site_cache_ttl, float)
+        assert isinstance(args.fsync, bool)
+        assert isinstance(args.http_retries, int)
+        assert isinstance(args.http_backoff, float)
+        assert isinstance(args.http_timeout, float)
+        assert isinstance(args.http_rate_limit, float)
+        assert isinstance(args.http_record, str)
+        assert isinstance(args.http_replay, str)
+        assert isinstance(args.http_replay_latency, float)
+
+        # [IMPORTANT]
+        # A cassette must contain the handshake of the session it was recorded in,
+        # so the site cache is not used while recording or replaying.
+        site_cache_path: Optional[str] = None
+        cassette = args.http_record or args.http_replay
+        if 0 < args.site_cache_ttl and not cassette:
+            site_cache_path = str(site_cache_filepath(args.cache_dir, args.hostname))
+
+        return cls(
+            retries=args.http_retries,
+            backoff=args.http_backoff,
+            timeout=args.http_timeout,
+            rate_limit=args.http_rate_limit,
+            record_dir=args.http_record or None,
+            replay_dir=args.http_replay or None,
+            replay_latency=args.http_replay_latency,
+            site_cache_path=site_cache_path,
+            site_cache_ttl=args.site_cache_ttl,
+            fsync=args.fsync,
+        )
+
+
+_sites: Dict[SiteKey, Site] = dict()
+_sites_lock = Lock()
+
+
+def user_agent() -> str:
+    return f"mwfilter/{version()} {USER_AGENT}"
+
+
+def create_retry(retries=DEFAULT_HTTP_RETRIES, backoff=DEFAULT_HTTP_BACKOFF) -> Retry:
+    return Retry(
+        total=retries,
+        backoff_factor=backoff,
+        status_forcelist=RETRY_STATUS_CODES,
+        # [IMPORTANT]
+        # MediaWiki API queries are sent as POST requests by mwclient.
+        allowed_methods=frozenset(RETRY_METHODS),
+        respect_retry_after_header=True,
+        # Return the last response so that mwclient raises its own error.
+        raise_on_status=False,
+    )
+
+
+def create_adapter(pool_size=1, options: Optional[HttpOptions] = None) -> HTTPAdapter:
+    assert 1 <= pool_size
+    opts = options if options is not None else HttpOptions()
+    assert 0 <= opts.retries
+    assert 0 <= opts.backoff
+
+    kwargs = dict(
+        pool_connections=DEFAULT_POOL_CONNECTIONS,
+        pool_maxsize=pool_size,
+        max_retries=create_retry(opts.retries, opts.backoff),
+        pool_block=True,
+    )
+
+    if opts.record_dir and opts.replay_dir:
+        raise ValueError("Cannot record and replay HTTP responses at the same time")
+
+    if opts.record_dir or opts.replay_dir:
+        from mwfilter.mw.replay import (
+            CASSETTE_MODE_RECORD,
+            CASSETTE_MODE_REPLAY,
+            Cassette,
+            CassetteAdapter,
+        )
+
+        if opts.record_dir:
+            cassette = Cassette(opts.record_dir)
+            mode = CASSETTE_MODE_RECORD
+        else:
+            assert opts.replay_dir
+            cassette = Cassette(opts.replay_dir)
+            mode = CASSETTE_MODE_REPLAY
+        return CassetteAdapter(cassette, mode, opts.replay_latency, **kwargs)
+
+    return HTTPAdapter(**kwargs)
+
+
+def grow_pool(session: Session, pool_size: int) -> None:
+    # Connections already checked out of a replaced pool are released to it,
+    # so requests in flight are not disturbed.
+    for adapter in set(session.adapters.values()):
+        if not isinstance(adapter, HTTPAdapter):
+            continue
+        if pool_size <= adapter._pool_maxsize:  # noqa
+            continue
+        adapter.init_poolmanager(
+            adapter._pool_connections,  # noqa
+            pool_size,
+            block=adapter._pool_block,  # noqa
+        )
+
+
+class RateLimitedSession(Session):
+    def __init__(self, limiter: RateLimiter):
+        super().__init__()
+        self.limiter = limiter
+
+    def send(self, request: PreparedRequest, **kwargs) -> Response:  # type: ignore
+        self.limiter.acquire()
+        return super().send(request, **kwargs)
+
+
+def create_session(pool_size=1, options: Optional[HttpOptions] = None) -> Session:
+    opts = options if options is not None else HttpOptions()
+    assert 0 <= opts.rate_limit
+    adapter = create_adapter(pool_size, opts)
+
+    # [IMPORTANT]
+    # The limit is on the session, so every job sharing the site shares it;
+    # Replayed responses never reach the server and are not limited.
+    session: Session
+    if 0 < opts.rate_limit and not opts.replay_dir:
+        session = RateLimitedSession(RateLimiter(opts.rate_limit))
+    else:
+        session = Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["User-Agent"] = user_agent()
+    session.headers["Accept-Encoding"] = "gzip, deflate"
+    session.headers["Connection"] = "keep-alive"
+    return session
+
+
+class LagSleeper(Sleeper):
+    def sleep(self, min_time=0):
+        # [IMPORTANT]
+        # mwclient sleeps with a minimum time only when the server asks to wait,
+        # with the 'Retry-After' of a 'maxlag' response. Connection errors and 5xx
+        # responses were already retried by the session adapter with backoff,
+        # so retrying them here again would square the number of attempts.
+        if min_time <= 0:
+            raise MaximumRetriesExceeded(self, self.args)
+        super().sleep(min_time)
+
+
+class LagSleepers(Sleepers):
+    def make(self, args=None):
+        return LagSleeper(args, self.max_retries, self.retry_timeout, self.callback)
+
+
+def site_key(
+    hostname: str,
+    endpoint_path: str,
+    auth: Optional[Tuple[str, str]] = None,
+    options: Optional[HttpOptions] = None,
+) -> SiteKey:
+    opts = options if options is not None else HttpOptions()
+    return hostname, endpoint_path, auth[0] if auth else None, opts
+
+
+def init_site(site: Site) -> None:
+    try:
+        site.site_init()
+    except APIError as e:
+        # Private wiki, do init after login
+        if e.args[0] not in {"unknown_action", "readapidenied"}:
+            raise
+
+
+def has_login_session(site: Site) -> bool:
+    # Cookies without an expiry pass the cache validation, but the server may
+    # have ended their session; Its requests are then anonymous or denied.
+    try:
+        result = site.get("query", meta="userinfo")
+    except APIError as e:
+        if e.args[0] == "readapidenied":
+            return False
+        raise
+    userinfo = result.get("query", dict()).get("userinfo", dict())
+    return "anon" not in userinfo and bool(userinfo.get("id"))
+
+
+def load_site_cache(
+    options: HttpOptions,
+    endpoint_path: str,
+    username: Optional[str] = None,
+) -> Optional[SiteCache]:
+    if not options.site_cache_path:
+        return None
+
+    path = Path(options.site_cache_path)
+    cache = SiteCache.load(path)
+    if cache is None:
+        return None
+    if not cache.is_valid(endpoint_path, username, options.site_cache_ttl):
+        logger.debug(f"Expired site cache: '{str(path)}'")
+        return None
+
+    logger.debug(f"Use site cache: '{str(path)}'")
+    return cache
+
+
+def create_site(
+    hostname: str,
+    endpoint_path: str,
+    auth: Optional[Tuple[str, str]] = None,
+    *,
+    pool_size=1,
+    options: Optional[HttpOptions] = None,
+    scheme="https",
+) -> Site:
+    opts = options if options is not None else HttpOptions()
+    username = auth[0] if auth else None
+    cache = load_site_cache(opts, endpoint_path, username)
+    session = create_session(pool_size, opts)
+    site = Site(
+        host=hostname,
+        path=endpoint_path,
+        pool=session,
+        max_retries=opts.retries,
+        retry_timeout=opts.backoff,
+        connection_options={"timeout": opts.timeout},
+        scheme=scheme,
+        do_init=False,
+    )
+    # Only the 'maxlag' waits are retried by mwclient; a database error reported
+    # in an API result fails at once instead of sleeping and retrying.
+    site.sleepers = LagSleepers(opts.retries, opts.backoff, site.sleepers.callback)
+
+    if cache is not None:
+        # A warm start skips both the siteinfo request and the login;
+        # Only the session of a logged-in user is checked with a userinfo request.
+        cache.apply(site)
+        if not auth or has_login_session(site):
+            return site
+
+        assert opts.site_cache_path
+        logger.info("The cached login session has ended; Log in again")
+        Path(opts.site_cache_path).unlink(missing_ok=True)
+        site.connection.cookies.clear()
+        site.initialized = False
+
+    init_site(site)
+    if auth:
+        site.login(*auth)
+
+    if opts.site_cache_path and site.initialized:
+        cache = SiteCache.from_site(site, endpoint_path, username)
+        cache.save(Path(opts.site_cache_path), opts.fsync)
+    return site
+
+
+def shared_site(
+    hostname: str,
+    endpoint_path: str,
+    auth: Optional[Tuple[str, str]] = None,
+    *,
+    pool_size=1,
+    options: Optional[HttpOptions] = None,
+) -> Site:
+    # A caller asking for other HTTP options gets a session of its own;
+    # Otherwise the authenticated session is shared, with the largest pool asked.
+    key = site_key(hostname, endpoint_path, auth, options)
+    with _sites_lock:
+        if site := _sites.get(key):
+            grow_pool(site.connection, pool_size)
+            return site
+
+        site = create_site(
+            hostname,
+            endpoint_path,
+            auth,
+            pool_size=pool_size,
+            options=options,
+        )
+        _sites[key] = site
+        return site
+
+
+def clear_shared_sites() -> None:
+    with _sites_lock:
+        for site in _sites.values():
+            site.connection.close()
+        _sites.clear()
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from time import time
+from typing import Any, Dict, Final, List, Optional
+
+from mwclient import Site
+from mwclient.errors import MediaWikiVersionError
+from type_serialize import deserialize, serialize
+from type_serialize.obj.errors import DeserializeError
+
+from mwfilter.system.atomic import atomic_write_text
+
+SITE_CACHE_VERSION: Final[int] = 1
+
+# The file holds the session cookies of the logged-in user.
+SITE_CACHE_PERMISSIONS = 0o600
+
+
+@dataclass
+class SiteCookie:
+    name: str = field(default_factory=str)
+    value: str = field(default_factory=str)
+    domain: str = field(default_factory=str)
+    path: str = "/"
+    expires: Optional[int] = None
+    secure: bool = False
+
+
+@dataclass
+class SiteCache:
+    version: int = SITE_CACHE_VERSION
+    endpoint_path: str = field(default_factory=str)
+    username: Optional[str] = None
+    saved_at: float = 0.0
+
+    # The 'general' and 'namespaces' siteinfo and the userinfo of 'Site.site_init()'
+    general: Dict[str, Any] = field(default_factory=dict)
+    namespaces: Dict[str, str] = field(default_factory=dict)
+    user: str = field(default_factory=str)
+    groups: List[str] = field(default_factory=list)
+    rights: List[str] = field(default_factory=list)
+
+    cookies: List[SiteCookie] = field(default_factory=list)
+
+    @classmethod
+    def from_site(cls, site: Site, endpoint_path: str, username: Optional[str]):
+        cookies = [
+            SiteCookie(
+                name=c.name,
+                value=c.value or str(),
+                domain=c.domain,
+                path=c.path,
+                expires=c.expires,
+                secure=c.secure,
+            )
+            for c in site.connection.cookies
+        ]
+        return cls(
+            endpoint_path=endpoint_path,
+            username=username,
+            saved_at=time(),
+            general=dict(site.site),
+            namespaces={str(k): str(v) for k, v in site.namespaces.items()},
+            user=site.username,
+            groups=list(site.groups),
+            rights=list(site.rights),
+            cookies=cookies,
+        )
+
+    @classmethod
+    def load(cls, path: Path):
+        # Any cache that cannot be applied as is only costs a siteinfo request.
+        if not path.is_file():
+            return None
+        try:
+            obj = json.loads(path.read_text())
+            if not isinstance(obj, dict):
+                return None
+            if obj.get("version") != SITE_CACHE_VERSION:
+                return None
+            cache = deserialize(obj, cls)
+        except (ValueError, TypeError, KeyError, DeserializeError):
+            return None
+        if not isinstance(cache, cls) or not cache.is_complete():
+            return None
+        return cache
+
+    def is_complete(self) -> bool:
+        generator = self.general.get("generator")
+        if not isinstance(generator, str):
+            return False
+        try:
+            Site.version_tuple_from_generator(generator)
+        except MediaWikiVersionError:
+            return False
+        return all(k.lstrip("-").isdigit() for k in self.namespaces)
+
+    def save(self, path: Path, fsync=False) -> None:
+        text = json.dumps(serialize(self), ensure_ascii=False)
+        atomic_write_text(path, text, fsync=fsync, permissions=SITE_CACHE_PERMISSIONS)
+
+    def is_valid(
+        self,
+        endpoint_path: str,
+        username: Optional[str],
+        ttl: float,
+        now: Optional[float] = None,
+    ) -> bool:
+        if self.endpoint_path != endpoint_path or self.username != username:
+            return False
+        current = now if now is not None else time()
+        if self.saved_at + ttl <= current:
+            return False
+        # A session that expires before the TTL must be logged in again.
+        return all(c.expires is None or current < c.expires for c in self.cookies)
+
+    def apply(self, site: Site) -> None:
+        site.site = dict(self.general)
+        site.namespaces = {int(k): v for k, v in self.namespaces.items()}
+        site.version = site.version_tuple_from_generator(self.general["generator"])
+        site.username = self.user
+        site.groups = list(self.groups)
+        site.rights = list(self.rights)
+        site.initialized = True
+        for c in self.cookies:
+            site.connection.cookies.set(
+                c.name,
+                c.value,
+                domain=c.domain,
+                path=c.path,
+                expires=c.expires,
+                secure=c.secure,
+            )
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+import json
+from pathlib import Path
+from typing import Dict, Final, List, Mapping, Optional, Set
+
+from mwfilter.system.atomic import atomic_write_text
+
+TEMPLATE_INDEX_VERSION: Final[int] = 1
+
+# Template title -> {filename of a transcluding page -> template revision}
+Dependents = Dict[str, Dict[str, int]]
+
+
+# [IMPORTANT]
+# The index is stored reversed, by template, because a sync looks up the pages
+# of each changed template; Every page keeps the template revision its cached
+# text was expanded with, so a failed refetch is retried by the next sync.
+class TemplateIndex:
+    def __init__(self, dependents: Optional[Dependents] = None):
+        self._dependents: Dependents = dependents if dependents else dict()
+        self._templates: Dict[str, Set[str]] = dict()
+        for template, pages in self._dependents.items():
+            for filename in pages:
+                self._templates.setdefault(filename, set()).add(template)
+
+    @classmethod
+    def load(cls, path: Path):
+        try:
+            obj = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return cls()
+        except ValueError:
+            # A broken index only costs the refetch of pages it would have found.
+            return cls()
+        if not isinstance(obj, dict):
+            return cls()
+        if obj.get("version") != TEMPLATE_INDEX_VERSION:
+            return cls()
+        return cls(obj.get("templates"))
+
+    def save(self, path: Path, fsync=False) -> None:
+        obj = {"version": TEMPLATE_INDEX_VERSION, "templates": self._dependents}
+        text = json.dumps(obj, ensure_ascii=False, sort_keys=True)
+        atomic_write_text(path, text, fsync=fsync)
+
+    @property
+    def templates(self) -> List[str]:
+        return sorted(self._dependents.keys())
+
+    def templates_of(self, filename: str) -> List[str]:
+        return sorted(self._templates.get(filename, set()))
+
+    def dependents(self, template: str) -> List[str]:
+        return sorted(self._dependents.get(template, dict()).keys())
+
+    def remove(self, filename: str) -> None:
+        for template in self._templates.pop(filename, set()):
+            pages = self._dependents[template]
+            pages.pop(filename, None)
+            if not pages:
+                del self._dependents[template]
+
+    def update(self, filename: str, revisions: Mapping[str, int]) -> None:
+        self.remove(filename)
+        for template, revision in revisions.items():
+            self._dependents.setdefault(template, dict())[filename] = revision
+        if revisions:
+            self._templates[filename] = set(revisions.keys())
+
+    def affected_pages(self, current: Mapping[str, int]) -> Set[str]:
+        result: Set[str] = set()
+        for template, revision in current.items():
+            for filename, expanded in self._dependents.get(template, dict()).items():
+                if expanded != revision:
+                    result.add(filename)
+        return result
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+
+from typing import Any, Dict, Final, Iterator, List, Sequence
+
+from mwclient import Site
+
+# Titles per request; The API allows 50 titles to clients without 'apihighlimits'.
+TEMPLATES_BATCH_SIZE: Final[int] = 50
+
+
+def iter_batches(
+    titles: Sequence[str],
+    size=TEMPLATES_BATCH_SIZE,
+) -> Iterator[List[str]]:
+    assert 1 <= size
+    for i in range(0, len(titles), size):
+        yield list(titles[i : i + size])
+
+
+def iter_query_pages(site: Site, **kwargs) -> Iterator[Dict[str, Any]]:
+    # A 'prop' query splits a long property list of a single page across
+    # continued responses, so the same page may be yielded more than once.
+    continuation: Dict[str, Any] = dict()
+    while True:
+        data = site.get("query", **kwargs, **continuation)
+        pages = data.get("query", dict()).get("pages", dict())
+        if isinstance(pages, dict):
+            pages = list(pages.values())
+        yield from pages
+        if not data.get("continue"):
+            break
+        continuation = dict(data["continue"])
+
+
+def request_templates(site: Site, titles: Sequence[str]) -> Dict[str, List[str]]:
+    result: Dict[str, List[str]] = {title: list() for title in titles}
+    for batch in iter_batches(titles):
+        args = dict(
+            prop="templates",
+            titles="|".join(batch),
+            tllimit="max",
+        )
+        for page in iter_query_pages(site, **args):
+            templates = result.setdefault(page.get("title", str()), list())
+            templates.extend(t["title"] for t in page.get("templates", list()))
+    return {title: sorted(set(templates)) for title, templates in result.items()}
+
+
+def request_revisions(site: Site, titles: Sequence[str]) -> Dict[str, int]:
+    # A missing template has no revision; Creating it changes every page using it.
+    result: Dict[str, int] = {title: 0 for title in titles}
+    for batch in iter_batches(titles):
+        for page in iter_query_pages(site, prop="info", titles="|".join(batch)):
+            result[page.get("title", str())] = int(page.get("lastrevid", 0))
+    return result
@@ -11,6 +11,7 @@ from mwfilter.pandoc.ast.blocks.block import Block
 from mwfilter.pandoc.ast.blocks.parser import parse_blocks
 from mwfilter.pandoc.ast.metas.meta import Meta
 from mwfilter.pandoc.ast.validator.mediawiki import mediawiki_validator
+from mwfilter.system.timing import STAGE_PANDOC, STAGE_PARSE, timing
 
 
 @dataclass
@@ -21,11 +22,13 @@ class Pandoc:
 
     @classmethod
     def parse_text(cls, content: str, content_format="mediawiki"):
-        json_text = convert_text(content, to="json", format=content_format)
-        json_obj = loads(json_text)
-        if content_format == "mediawiki":
-            mediawiki_validator(json_obj)
-        return cls.parse_object(json_obj)
+        with timing(STAGE_PANDOC):
+            json_text = convert_text(content, to="json", format=content_format)
+        with timing(STAGE_PARSE):
+            json_obj = loads(json_text)
+            if content_format == "mediawiki":
+                mediawiki_validator(json_obj)
+            return cls.parse_object(json_obj)
 
     @classmethod
     def parse_object(cls, e):
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+
+from mwfilter.arguments import (
+    COMPRESSION_NONE,
+    COMPRESSION_ZSTD,
+    DEFAULT_PAGE_STORE,
+    PAGE_STORE_FILE,
+    PAGE_STORE_SQLITE,
+    PAGE_STORES,
+)
+from mwfilter.mw.cache_dirs import (
+    pages_cache_dirpath,
+    pages_db_filepath,
+    pages_index_filepath,
+)
+from mwfilter.store.page_store import PageStore
+
+
+def open_page_store(
+    cache_dir: str,
+    hostname: str,
+    page_store=DEFAULT_PAGE_STORE,
+    compression=COMPRESSION_NONE,
+    fsync=False,
+) -> PageStore:
+    if compression == COMPRESSION_ZSTD:
+        from mwfilter.store.compression import zstd_available
+
+        if not zstd_available():
+            raise ImportError("zstd compression requires the 'zstandard' package")
+
+    # A bare name in a 'case' pattern would capture instead of compare.
+    if page_store == PAGE_STORE_FILE:
+        from mwfilter.store.file_store import FilePageStore
+
+        pages_dir = pages_cache_dirpath(cache_dir, hostname)
+        index_path = pages_index_filepath(cache_dir, hostname)
+        return FilePageStore(pages_dir, compression, index_path, fsync)
+    if page_store == PAGE_STORE_SQLITE:
+        from mwfilter.store.sqlite_store import SqlitePageStore
+
+        db_path = pages_db_filepath(cache_dir, hostname)
+        return SqlitePageStore(db_path, compression, fsync)
+    raise ValueError(f"Unsupported page store: {page_store} (use {PAGE_STORES})")
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+import gzip
+from functools import lru_cache
+from typing import Dict, Final
+
+from mwfilter.arguments import COMPRESSION_GZIP, COMPRESSION_NONE, COMPRESSION_ZSTD
+
+GZIP_MAGIC: Final[bytes] = b"\x1f\x8b"
+ZSTD_MAGIC: Final[bytes] = b"\x28\xb5\x2f\xfd"
+
+DEFAULT_GZIP_LEVEL: Final[int] = 6
+DEFAULT_ZSTD_LEVEL: Final[int] = 10
+
+COMPRESSION_SUFFIXES: Final[Dict[str, str]] = {
+    COMPRESSION_NONE: "",
+    COMPRESSION_GZIP: ".gz",
+    COMPRESSION_ZSTD: ".zst",
+}
+
+
+@lru_cache
+def zstd_available() -> bool:
+    try:
+        import zstandard  # noqa
+    except ImportError:
+        return False
+    else:
+        return True
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError(
+            "zstd compressed pages require the optional 'zstandard' package"
+        ) from e
+    return zstandard
+
+
+def detect_compression(data: bytes) -> str:
+    # [IMPORTANT]
+    # Neither magic number is a valid UTF-8 prefix, so plain text is never mistaken.
+    if data.startswith(GZIP_MAGIC):
+        return COMPRESSION_GZIP
+    if data.startswith(ZSTD_MAGIC):
+        return COMPRESSION_ZSTD
+    return COMPRESSION_NONE
+
+
+def compress(data: bytes, compression=COMPRESSION_NONE) -> bytes:
+    # A bare name in a 'case' pattern would capture instead of compare.
+    if compression == COMPRESSION_NONE:
+        return data
+    if compression == COMPRESSION_GZIP:
+        return gzip.compress(data, compresslevel=DEFAULT_GZIP_LEVEL, mtime=0)
+    if compression == COMPRESSION_ZSTD:
+        return _zstandard().ZstdCompressor(level=DEFAULT_ZSTD_LEVEL).compress(data)
+    raise ValueError(f"Unsupported compression: {compression}")
+
+
+def decompress(data: bytes) -> bytes:
+    compression = detect_compression(data)
+    if compression == COMPRESSION_GZIP:
+        return gzip.decompress(data)
+    if compression == COMPRESSION_ZSTD:
+        return _zstandard().ZstdDecompressor().decompressobj().decompress(data)
+    return data
+
+
+def encode_text(text: str, compression=COMPRESSION_NONE) -> bytes:
+    return compress(text.encode(), compression)
+
+
+def decode_text(data: bytes) -> str:
+    return decompress(data).decode()
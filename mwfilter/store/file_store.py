@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+
+from pathlib import Path
+from typing import Dict, Final, Iterator, List, Optional
+
+from mwfilter.arguments import COMPRESSION_NONE
+from mwfilter.mw.page_meta import PageMeta
+from mwfilter.store.compression import COMPRESSION_SUFFIXES, decode_text, encode_text
+from mwfilter.store.meta_index import MetaIndex
+from mwfilter.store.page_store import PageStore, meta_from_json, meta_to_json
+from mwfilter.system.atomic import DirSync, atomic_write_bytes, atomic_write_text
+
+META_SUFFIX: Final[str] = ".json"
+TEXT_SUFFIX: Final[str] = ".wiki"
+
+
+class FilePageStore(PageStore):
+    def __init__(
+        self,
+        pages_dir: Path,
+        compression=COMPRESSION_NONE,
+        index_path: Optional[Path] = None,
+        fsync=False,
+    ):
+        if compression not in COMPRESSION_SUFFIXES:
+            raise ValueError(f"Unsupported compression: {compression}")
+        self._pages_dir = pages_dir
+        self._compression = compression
+        self._index = MetaIndex(index_path) if index_path else None
+        self._index_checked = False
+        self._fsync = fsync
+        self._dir_sync = DirSync(fsync)
+
+    @property
+    def pages_dir(self) -> Path:
+        return self._pages_dir
+
+    def close(self) -> None:
+        self._dir_sync.sync()
+
+    def meta_path(self, filename: str) -> Path:
+        return self._pages_dir / (filename + META_SUFFIX)
+
+    def wiki_path(self, filename: str, compression=COMPRESSION_NONE) -> Path:
+        suffix = TEXT_SUFFIX + COMPRESSION_SUFFIXES[compression]
+        return self._pages_dir / (filename + suffix)
+
+    def wiki_paths(self, filename: str) -> List[Path]:
+        return [self.wiki_path(filename, c) for c in COMPRESSION_SUFFIXES]
+
+    def find_wiki_path(self, filename: str) -> Optional[Path]:
+        for path in self.wiki_paths(filename):
+            if path.is_file():
+                return path
+        return None
+
+    def location(self, filename: str) -> str:
+        path = self.find_wiki_path(filename)
+        return str(path if path else self.wiki_path(filename, self._compression))
+
+    def exists(self, filename: str) -> bool:
+        return self.meta_path(filename).is_file()
+
+    @property
+    def index(self) -> Optional[MetaIndex]:
+        return self._index
+
+    def walk_filenames(self) -> List[str]:
+        result: List[str] = list()
+        if not self._pages_dir.is_dir():
+            return result
+        for dirpath, dirnames, filenames in self._pages_dir.walk():
+            for filename in filenames:
+                if filename.endswith(META_SUFFIX):
+                    path = (dirpath / filename).relative_to(self._pages_dir)
+                    result.append(str(path).removesuffix(META_SUFFIX))
+        result.sort()
+        return result
+
+    def rebuild_index(self) -> None:
+        if self._index is None:
+            return
+        self._index.rewrite(self.get_meta(f) for f in self.walk_filenames())
+        self._index_checked = True
+
+    def index_metas(self) -> Dict[str, PageMeta]:
+        assert self._index is not None
+        metas = self._index.load()
+        if metas is not None and not self._index_checked:
+            # [IMPORTANT]
+            # Pages added or deleted by an older version or by hand do not update
+            # the index. Once per store, the page names in the tree are compared
+            # with the index; This walk reads no files.
+            self._index_checked = True
+            if self.walk_filenames() != sorted(metas):
+                metas = None
+        if metas is None:
+            # Pages cached before the index existed, a stale index,
+            # or an interrupted index write.
+            self.rebuild_index()
+            metas = self._index.load()
+            assert metas is not None
+        return metas
+
+    def filenames(self) -> List[str]:
+        if self._index is None:
+            return self.walk_filenames()
+        return sorted(self.index_metas())
+
+    def iter_metas(self) -> Iterator[PageMeta]:
+        if self._index is None:
+            yield from super().iter_metas()
+            return
+        metas = self.index_metas()
+        for filename in sorted(metas):
+            yield metas[filename]
+
+    def get_meta(self, filename: str) -> PageMeta:
+        path = self.meta_path(filename)
+        if not path.is_file():
+            raise FileNotFoundError(f"Not found JSON file: '{str(path)}'")
+        return meta_from_json(path.read_bytes())
+
+    def get_text(self, filename: str) -> str:
+        path = self.find_wiki_path(filename)
+        if path is None:
+            raise FileNotFoundError(f"File not found: '{self.location(filename)}'")
+        return decode_text(path.read_bytes())
+
+    def text_path(self, filename: str) -> Optional[str]:
+        # Compressed text has no file that pandoc could read directly.
+        path = self.find_wiki_path(filename)
+        if path is None or path != self.wiki_path(filename):
+            return None
+        return str(path)
+
+    def put(self, meta: PageMeta, text: str) -> None:
+        meta_path = self.meta_path(meta.filename)
+        wiki_path = self.wiki_path(meta.filename, self._compression)
+        # [IMPORTANT]
+        # The JSON file marks a page as present, so it is replaced after the text;
+        # An interrupted write leaves the previous version of the page intact.
+        data = encode_text(text, self._compression)
+        atomic_write_bytes(wiki_path, data, fsync=self._fsync)
+        atomic_write_text(meta_path, meta_to_json(meta), fsync=self._fsync)
+        self._dir_sync.add(meta_path)
+
+        # A page downloaded with another compression setting must not shadow this one.
+        for path in self.wiki_paths(meta.filename):
+            if path != wiki_path:
+                path.unlink(missing_ok=True)
+
+        if self._index is not None:
+            self.index_metas()
+            self._index.put(meta)
+
+    def delete(self, filename: str) -> bool:
+        exists = self.exists(filename)
+        self.meta_path(filename).unlink(missing_ok=True)
+        for path in self.wiki_paths(filename):
+            path.unlink(missing_ok=True)
+        if self._index is not None:
+            self._index.remove(filename)
+        return exists
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+
+import json
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, Final, Iterable, List, Optional
+
+from type_serialize import deserialize, serialize
+
+from mwfilter.mw.page_meta import PageMeta
+from mwfilter.system.atomic import atomic_open
+
+META_INDEX_VERSION: Final[int] = 1
+
+# Rewrite the index once the replaced and deleted records outnumber the live ones.
+COMPACT_RATIO: Final[float] = 1.0
+
+
+# A JSON Lines file with a header line followed by one PageMeta record per line.
+# Records are only appended while pages are stored; The last record of a filename
+# wins and a record without 'meta' is a deletion.
+class MetaIndex:
+    def __init__(self, path: Path):
+        self._path = path
+        self._lock = Lock()
+        self._metas: Optional[Dict[str, PageMeta]] = None
+        self._stale = 0
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    @staticmethod
+    def header() -> str:
+        return json.dumps({"version": META_INDEX_VERSION}) + "\n"
+
+    @staticmethod
+    def record(filename: str, meta: Optional[PageMeta] = None) -> str:
+        obj: Dict[str, Any] = {"filename": filename}
+        if meta is not None:
+            obj["meta"] = serialize(meta)
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+    def _read(self) -> Optional[Dict[str, PageMeta]]:
+        try:
+            f = self._path.open("rt", encoding="utf-8")
+        except FileNotFoundError:
+            return None
+
+        metas: Dict[str, PageMeta] = dict()
+        records = 0
+        with f:
+            try:
+                header = json.loads(f.readline())
+            except json.JSONDecodeError:
+                return None
+            if not isinstance(header, dict):
+                return None
+            if header.get("version") != META_INDEX_VERSION:
+                return None
+
+            for line in f:
+                if not line.endswith("\n"):
+                    # An interrupted append; The next append would corrupt the line.
+                    return None
+                try:
+                    obj = json.loads(line)
+                except json.JSONDecodeError:
+                    return None
+                records += 1
+                filename = obj["filename"]
+                if "meta" in obj:
+                    meta = deserialize(obj["meta"], PageMeta)
+                    assert isinstance(meta, PageMeta)
+                    metas[filename] = meta
+                else:
+                    metas.pop(filename, None)
+
+        self._stale = records - len(metas)
+        return metas
+
+    def load(self) -> Optional[Dict[str, PageMeta]]:
+        with self._lock:
+            if self._metas is None:
+                self._metas = self._read()
+            return None if self._metas is None else dict(self._metas)
+
+    def rewrite(self, metas: Iterable[PageMeta]) -> None:
+        with self._lock:
+            self._rewrite({meta.filename: meta for meta in metas})
+
+    def _rewrite(self, metas: Dict[str, PageMeta]) -> None:
+        with atomic_open(self._path, "wt") as f:
+            f.write(self.header())
+            for filename in sorted(metas):
+                f.write(self.record(filename, metas[filename]))
+        self._metas = metas
+        self._stale = 0
+
+    def _append(self, lines: List[str]) -> None:
+        if self._metas is None:
+            # Without a valid index there is nothing to update incrementally;
+            # The next listing rebuilds it from the page files.
+            return
+        with self._path.open("at", encoding="utf-8") as f:
+            f.writelines(lines)
+        if COMPACT_RATIO * max(len(self._metas), 1) < self._stale:
+            self._rewrite(self._metas)
+
+    def put(self, meta: PageMeta) -> None:
+        with self._lock:
+            if self._metas is None:
+                self._metas = self._read()
+            if self._metas is None:
+                return
+            if meta.filename in self._metas:
+                self._stale += 1
+            self._metas[meta.filename] = meta
+            self._append([self.record(meta.filename, meta)])
+
+    def remove(self, filename: str) -> None:
+        with self._lock:
+            if self._metas is None:
+                self._metas = self._read()
+            if self._metas is None or filename not in self._metas:
+                return
+            del self._metas[filename]
+            self._stale += 2
+            self._append([self.record(filename)])
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._path.unlink(missing_ok=True)
+            self._metas = None
+            self._stale = 0
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+import json
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+from type_serialize import deserialize, serialize
+
+from mwfilter.mw.page_meta import PageMeta
+
+
+def meta_to_json(meta: PageMeta) -> str:
+    return json.dumps(serialize(meta))
+
+
+def meta_from_json(text: Union[str, bytes]) -> PageMeta:
+    meta = deserialize(json.loads(text), PageMeta)
+    assert isinstance(meta, PageMeta)
+    return meta
+
+
+Page = Tuple[PageMeta, str]
+
+
+class PageStore:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self) -> None:
+        pass
+
+    def location(self, filename: str) -> str:
+        raise NotImplementedError
+
+    def exists(self, filename: str) -> bool:
+        raise NotImplementedError
+
+    def filenames(self) -> List[str]:
+        raise NotImplementedError
+
+    def get_meta(self, filename: str) -> PageMeta:
+        raise NotImplementedError
+
+    def get_text(self, filename: str) -> str:
+        raise NotImplementedError
+
+    def text_path(self, filename: str) -> Optional[str]:
+        # Only stores that keep the text in a plain file can return its path.
+        return None
+
+    def put(self, meta: PageMeta, text: str) -> None:
+        raise NotImplementedError
+
+    def delete(self, filename: str) -> bool:
+        raise NotImplementedError
+
+    def get_page(self, filename: str) -> Page:
+        return self.get_meta(filename), self.get_text(filename)
+
+    def put_many(self, pages: Iterable[Page]) -> int:
+        count = 0
+        for meta, text in pages:
+            self.put(meta, text)
+            count += 1
+        return count
+
+    def iter_metas(self) -> Iterator[PageMeta]:
+        for filename in self.filenames():
+            yield self.get_meta(filename)
+
+    def iter_pages(self, filenames: Optional[Iterable[str]] = None) -> Iterator[Page]:
+        for filename in self.filenames() if filenames is None else filenames:
+            yield self.get_page(filename)
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+
+import sqlite3
+from pathlib import Path
+from threading import Lock
+from typing import Final, Iterable, Iterator, List, Optional, Tuple
+
+from mwfilter.arguments import COMPRESSION_NONE
+from mwfilter.mw.page_meta import PageMeta
+from mwfilter.store.compression import decode_text, encode_text
+from mwfilter.store.page_store import Page, PageStore, meta_from_json, meta_to_json
+
+SQLITE_SCHEMA_VERSION: Final[int] = 1
+
+# [IMPORTANT]
+# The meta columns duplicate some PageMeta fields so that pages can be listed and
+# filtered without decoding every JSON document; The 'meta' column is authoritative.
+SQLITE_SCHEMA: Final[str] = """
+CREATE TABLE IF NOT EXISTS pages (
+    filename TEXT PRIMARY KEY NOT NULL,
+    name TEXT NOT NULL,
+    title TEXT NOT NULL,
+    namespace INTEGER NOT NULL,
+    revision INTEGER NOT NULL,
+    page_id INTEGER NOT NULL,
+    touched TEXT NOT NULL,
+    length INTEGER NOT NULL,
+    redirect INTEGER NOT NULL,
+    meta TEXT NOT NULL,
+    text BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pages_title ON pages (title);
+CREATE INDEX IF NOT EXISTS pages_namespace ON pages (namespace);
+CREATE INDEX IF NOT EXISTS pages_revision ON pages (revision);
+"""
+
+INSERT_PAGE: Final[str] = """
+INSERT OR REPLACE INTO pages (
+    filename, name, title, namespace, revision, page_id,
+    touched, length, redirect, meta, text
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Stay well below SQLITE_MAX_VARIABLE_NUMBER of old SQLite builds.
+SELECT_BATCH_SIZE: Final[int] = 500
+
+PageRow = Tuple[str, str, str, int, int, int, str, int, int, str, bytes]
+
+
+def page_row(meta: PageMeta, text: str, compression=COMPRESSION_NONE) -> PageRow:
+    return (
+        meta.filename,
+        meta.name,
+        meta.page_title,
+        meta.namespace,
+        meta.revision,
+        meta.page_id,
+        meta.touched.isoformat(),
+        meta.length,
+        int(meta.redirect),
+        meta_to_json(meta),
+        encode_text(text, compression),
+    )
+
+
+class SqlitePageStore(PageStore):
+    def __init__(self, db_path: Path, compression=COMPRESSION_NONE, fsync=False):
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db_path = db_path
+        self._compression = compression
+        self._lock = Lock()
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            synchronous = "FULL" if fsync else "NORMAL"
+            self._conn.execute(f"PRAGMA synchronous={synchronous}")
+            self._conn.executescript(SQLITE_SCHEMA)
+            self._conn.execute(f"PRAGMA user_version={SQLITE_SCHEMA_VERSION}")
+            self._conn.commit()
+
+    @property
+    def db_path(self) -> Path:
+        return self._db_path
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def location(self, filename: str) -> str:
+        return f"{str(self._db_path)}#{filename}"
+
+    def exists(self, filename: str) -> bool:
+        sql = "SELECT 1 FROM pages WHERE filename = ?"
+        with self._lock:
+            row = self._conn.execute(sql, (filename,)).fetchone()
+        return row is not None
+
+    def filenames(self) -> List[str]:
+        sql = "SELECT filename FROM pages ORDER BY filename"
+        with self._lock:
+            rows = self._conn.execute(sql).fetchall()
+        return [row[0] for row in rows]
+
+    def get_meta(self, filename: str) -> PageMeta:
+        sql = "SELECT meta FROM pages WHERE filename = ?"
+        with self._lock:
+            row = self._conn.execute(sql, (filename,)).fetchone()
+        if row is None:
+            raise FileNotFoundError(f"Page not found: '{self.location(filename)}'")
+        return meta_from_json(row[0])
+
+    def get_text(self, filename: str) -> str:
+        sql = "SELECT text FROM pages WHERE filename = ?"
+        with self._lock:
+            row = self._conn.execute(sql, (filename,)).fetchone()
+        if row is None:
+            raise FileNotFoundError(f"Page not found: '{self.location(filename)}'")
+        return decode_text(bytes(row[0]))
+
+    def get_page(self, filename: str) -> Page:
+        sql = "SELECT meta, text FROM pages WHERE filename = ?"
+        with self._lock:
+            row = self._conn.execute(sql, (filename,)).fetchone()
+        if row is None:
+            raise FileNotFoundError(f"Page not found: '{self.location(filename)}'")
+        return meta_from_json(row[0]), decode_text(bytes(row[1]))
+
+    def put(self, meta: PageMeta, text: str) -> None:
+        row = page_row(meta, text, self._compression)
+        with self._lock, self._conn:
+            self._conn.execute(INSERT_PAGE, row)
+
+    def put_many(self, pages: Iterable[Page]) -> int:
+        rows = [page_row(m, t, self._compression) for m, t in pages]
+        with self._lock, self._conn:
+            self._conn.executemany(INSERT_PAGE, rows)
+        return len(rows)
+
+    def delete(self, filename: str) -> bool:
+        sql = "DELETE FROM pages WHERE filename = ?"
+        with self._lock, self._conn:
+            cursor = self._conn.execute(sql, (filename,))
+        return 0 < cursor.rowcount
+
+    def iter_metas(self) -> Iterator[PageMeta]:
+        sql = "SELECT meta FROM pages ORDER BY filename"
+        with self._lock:
+            rows = self._conn.execute(sql).fetchall()
+        for row in rows:
+            yield meta_from_json(row[0])
+
+    def iter_pages(self, filenames: Optional[Iterable[str]] = None) -> Iterator[Page]:
+        # Read in batches so that the whole wiki is never held in memory at once.
+        names = self.filenames() if filenames is None else list(filenames)
+        for begin in range(0, len(names), SELECT_BATCH_SIZE):
+            batch = names[begin : begin + SELECT_BATCH_SIZE]
+            marks = ",".join("?" * len(batch))
+            sql = f"SELECT filename, meta, text FROM pages WHERE filename IN ({marks})"
+            with self._lock:
+                rows = self._conn.execute(sql, batch).fetchall()
+            pages = {row[0]: (row[1], row[2]) for row in rows}
+            for filename in batch:
+                if filename not in pages:
+                    location = self.location(filename)
+                    raise FileNotFoundError(f"Page not found: '{location}'")
+                meta_json, text = pages[filename]
+                yield meta_from_json(meta_json), decode_text(bytes(text))
@@ -4,16 +4,17 @@ from pathlib import Path
 
 
 def ask_overwrite(file: Path, *, force_yes=False) -> bool:
+    # [IMPORTANT]
+    # The file is kept until it is atomically replaced by the new content,
+    # so an interrupted run never loses the previous version.
     if not file.is_file():
         return True
 
     if force_yes:
-        file.unlink()
         return True
 
     answer = input(f"Overwrite file '{str(file)}' (Y/n/s): ").strip().lower()
     if answer == "y":
-        file.unlink()
         return True
     elif answer == "s":
         return False
@@ -21,6 +22,19 @@ def ask_overwrite(file: Path, *, force_yes=False) -> bool:
         raise FileExistsError(f"Already exists file: '{str(file)}'")
 
 
+def ask_overwrite_page(location: str, *, force_yes=False) -> bool:
+    if force_yes:
+        return True
+
+    answer = input(f"Overwrite page '{location}' (Y/n/s): ").strip().lower()
+    if answer == "y":
+        return True
+    elif answer == "s":
+        return False
+    else:
+        raise FileExistsError(f"Already exists page: '{location}'")
+
+
 def ask_continue(*, force_yes=False) -> bool:
     if force_yes:
         return True
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from threading import Lock
+from typing import IO, Any, Final, Iterable, Iterator, Optional, Set, Union
+
+TEMP_SUFFIX: Final[str] = ".tmp"
+
+
+def _read_umask() -> int:
+    # There is no way to read the umask without setting it, so it is read once
+    # at import time, before any worker thread could create a file.
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return umask
+
+
+UMASK: Final[int] = _read_umask()
+
+
+def default_permissions(path: Path) -> int:
+    # A replaced file keeps its mode; A new file gets the mode of open().
+    try:
+        return path.stat().st_mode & 0o7777
+    except FileNotFoundError:
+        return 0o666 & ~UMASK
+
+
+def fsync_dir(dirpath: Path) -> None:
+    # Directories cannot be opened for fsync on Windows; Rename is durable there.
+    if os.name == "nt":
+        return
+    fd = os.open(dirpath, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class DirSync:
+    def __init__(self, enabled=False):
+        self._enabled = enabled
+        self._lock = Lock()
+        self._dirs: Set[Path] = set()
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    def add(self, path: Path) -> None:
+        if not self._enabled:
+            return
+        with self._lock:
+            self._dirs.add(path.parent)
+
+    def update(self, paths: Iterable[Path]) -> None:
+        for path in paths:
+            self.add(path)
+
+    def sync(self) -> int:
+        # [IMPORTANT]
+        # The renames of a whole batch are made durable with one fsync per
+        # directory instead of one per file.
+        with self._lock:
+            dirs = sorted(self._dirs)
+            self._dirs.clear()
+        for dirpath in dirs:
+            fsync_dir(dirpath)
+        return len(dirs)
+
+
+@contextmanager
+def atomic_open(
+    path: Union[str, os.PathLike],
+    mode="wb",
+    *,
+    fsync=False,
+    encoding="utf-8",
+    permissions: Optional[int] = None,
+) -> Iterator[IO[Any]]:
+    if mode not in ("wb", "wt"):
+        raise ValueError(f"Unsupported atomic write mode: {mode}")
+
+    # [IMPORTANT]
+    # The temporary file is created next to the destination so that the rename
+    # stays on the same filesystem; Readers see either the old or the new file.
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    f = NamedTemporaryFile(
+        mode,
+        encoding=encoding if mode == "wt" else None,
+        dir=path.parent,
+        prefix=f".{path.name}.",
+        suffix=TEMP_SUFFIX,
+        delete=False,
+    )
+    try:
+        with f:
+            yield f
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        # NamedTemporaryFile always creates the file with 0600.
+        mode_bits = default_permissions(path) if permissions is None else permissions
+        os.chmod(f.name, mode_bits)
+        os.replace(f.name, path)
+    except BaseException:
+        Path(f.name).unlink(missing_ok=True)
+        raise
+
+
+def atomic_write_bytes(path: Union[str, os.PathLike], data: bytes, *, fsync=False):
+    with atomic_open(path, "wb", fsync=fsync) as f:
+        f.write(data)
+
+
+def atomic_write_text(
+    path: Union[str, os.PathLike],
+    text: str,
+    *,
+    fsync=False,
+    permissions: Optional[int] = None,
+):
+    with atomic_open(path, "wt", fsync=fsync, permissions=permissions) as f:
+        f.write(text)
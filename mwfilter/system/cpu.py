@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+import os
+from math import ceil
+from pathlib import Path
+from typing import Final, Optional
+
+CGROUP_ROOT_DIR: Final[str] = "/sys/fs/cgroup"
+
+
+def _read_text(path: Path) -> Optional[str]:
+    try:
+        return path.read_text().strip()
+    except OSError:
+        return None
+
+
+def affinity_cpu_count() -> Optional[int]:
+    if not hasattr(os, "sched_getaffinity"):
+        return None
+    try:
+        return len(os.sched_getaffinity(0))
+    except OSError:
+        return None
+
+
+def cgroup_v2_cpu_quota(root_dir=CGROUP_ROOT_DIR) -> Optional[float]:
+    # https://docs.kernel.org/admin-guide/cgroup-v2.html#cpu-interface-files
+    text = _read_text(Path(root_dir) / "cpu.max")
+    if not text:
+        return None
+
+    fields = text.split()
+    if len(fields) != 2 or fields[0] == "max":
+        return None
+
+    try:
+        quota, period = int(fields[0]), int(fields[1])
+    except ValueError:
+        return None
+    if quota <= 0 or period <= 0:
+        return None
+    return quota / period
+
+
+def cgroup_v1_cpu_quota(root_dir=CGROUP_ROOT_DIR) -> Optional[float]:
+    for controller in ("cpu", "cpu,cpuacct"):
+        quota_text = _read_text(Path(root_dir) / controller / "cpu.cfs_quota_us")
+        period_text = _read_text(Path(root_dir) / controller / "cpu.cfs_period_us")
+        if not quota_text or not period_text:
+            continue
+
+        try:
+            quota, period = int(quota_text), int(period_text)
+        except ValueError:
+            continue
+        if quota <= 0 or period <= 0:
+            return None
+        return quota / period
+    return None
+
+
+def cgroup_cpu_quota(root_dir=CGROUP_ROOT_DIR) -> Optional[float]:
+    quota = cgroup_v2_cpu_quota(root_dir)
+    if quota is None:
+        quota = cgroup_v1_cpu_quota(root_dir)
+    return quota
+
+
+def usable_cpu_count(root_dir=CGROUP_ROOT_DIR) -> int:
+    count = affinity_cpu_count() or os.cpu_count() or 1
+    quota = cgroup_cpu_quota(root_dir)
+    if quota is not None:
+        count = min(count, ceil(quota))
+    return max(1, count)
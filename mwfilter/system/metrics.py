@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+
+import json
+from bisect import bisect_left
+from io import StringIO
+from threading import Lock
+from time import time
+from typing import Any, Dict, Final, List, Optional, Sequence, Tuple
+
+from mwfilter.arguments import METRICS_FORMAT_JSON, METRICS_FORMAT_PROMETHEUS
+from mwfilter.system.atomic import atomic_write_text
+
+METRIC_TYPE_COUNTER: Final[str] = "counter"
+METRIC_TYPE_GAUGE: Final[str] = "gauge"
+METRIC_TYPE_HISTOGRAM: Final[str] = "histogram"
+
+DEFAULT_LATENCY_BUCKETS: Final[Sequence[float]] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+PAGES_FETCHED: Final[str] = "mwfilter_pages_fetched_total"
+PAGES_EXPANDED: Final[str] = "mwfilter_pages_expanded_locally_total"
+EXPANSION_FALLBACKS: Final[str] = "mwfilter_expansion_fallbacks_total"
+IMAGES_FETCHED: Final[str] = "mwfilter_images_fetched_total"
+BYTES_DOWNLOADED: Final[str] = "mwfilter_downloaded_bytes_total"
+HTTP_LATENCY: Final[str] = "mwfilter_http_request_duration_seconds"
+PAGES_CONVERTED: Final[str] = "mwfilter_pages_converted_total"
+CONVERSION_LATENCY: Final[str] = "mwfilter_conversion_duration_seconds"
+ERRORS: Final[str] = "mwfilter_errors_total"
+SKIPPED: Final[str] = "mwfilter_skipped_total"
+RUN_DURATION: Final[str] = "mwfilter_run_duration_seconds"
+RUN_SUCCESS: Final[str] = "mwfilter_run_success"
+RUN_TIMESTAMP: Final[str] = "mwfilter_run_timestamp_seconds"
+
+METRIC_HELPS: Final[Dict[str, str]] = {
+    PAGES_FETCHED: "Number of pages downloaded from MediaWiki",
+    PAGES_EXPANDED: "Number of pages whose templates were expanded locally",
+    EXPANSION_FALLBACKS: "Number of pages expanded on the server instead",
+    IMAGES_FETCHED: "Number of images downloaded from MediaWiki",
+    BYTES_DOWNLOADED: "Number of page text and image bytes downloaded",
+    HTTP_LATENCY: "Latency of MediaWiki requests per page or image",
+    PAGES_CONVERTED: "Number of pages converted to Markdown",
+    CONVERSION_LATENCY: "Latency of converting one page to Markdown",
+    ERRORS: "Number of pages or images that failed",
+    SKIPPED: "Number of pages or images skipped because a cached file was kept",
+    RUN_DURATION: "Wall time of the whole command",
+    RUN_SUCCESS: "1 if the command finished without an error, otherwise 0",
+    RUN_TIMESTAMP: "Unix time when the command finished",
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((str(k), str(v)) for k, v in labels.items()))
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: LabelKey, extra: Optional[LabelKey] = None) -> str:
+    items = labels + (extra if extra else tuple())
+    if not items:
+        return str()
+    return "{" + ",".join(f'{k}="{_escape_label_value(v)}"' for k, v in items) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        result = list()
+        total = 0
+        for upper, count in zip(self.buckets, self.counts):
+            total += count
+            result.append((upper, total))
+        result.append((float("inf"), self.count))
+        return result
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = Lock()
+        self._types: Dict[str, str] = dict()
+        self._values: Dict[str, Dict[LabelKey, float]] = dict()
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = dict()
+        self._constant_labels: Dict[str, str] = dict()
+
+    @property
+    def constant_labels(self) -> Dict[str, str]:
+        return dict(self._constant_labels)
+
+    def set_constant_labels(self, **labels: Any) -> None:
+        with self._lock:
+            self._constant_labels = {k: str(v) for k, v in labels.items()}
+
+    def _register(self, name: str, metric_type: str) -> None:
+        registered_type = self._types.setdefault(name, metric_type)
+        if registered_type != metric_type:
+            raise TypeError(f"Metric '{name}' is already a {registered_type}")
+
+    def inc(self, name: str, amount: float = 1, **labels: Any) -> None:
+        assert 0 <= amount
+        key = _label_key(labels)
+        with self._lock:
+            self._register(name, METRIC_TYPE_COUNTER)
+            values = self._values.setdefault(name, dict())
+            values[key] = values.get(key, 0) + amount
+
+    def set(self, name: str, value: float, **labels: Any) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._register(name, METRIC_TYPE_GAUGE)
+            self._values.setdefault(name, dict())[key] = value
+
+    def observe(
+        self,
+        name: str,
+        value: float,
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+        **labels: Any,
+    ) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._register(name, METRIC_TYPE_HISTOGRAM)
+            histograms = self._histograms.setdefault(name, dict())
+            if key not in histograms:
+                histograms[key] = Histogram(buckets)
+            histograms[key].observe(value)
+
+    def value(self, name: str, **labels: Any) -> float:
+        with self._lock:
+            return self._values.get(name, dict()).get(_label_key(labels), 0)
+
+    def histogram(self, name: str, **labels: Any) -> Optional[Histogram]:
+        with self._lock:
+            return self._histograms.get(name, dict()).get(_label_key(labels))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._types.clear()
+            self._values.clear()
+            self._histograms.clear()
+
+    def as_json_object(self) -> Dict[str, Any]:
+        constant = _label_key(self._constant_labels)
+        metrics: Dict[str, Any] = dict()
+        with self._lock:
+            for name, metric_type in sorted(self._types.items()):
+                samples: List[Dict[str, Any]] = list()
+                if metric_type == METRIC_TYPE_HISTOGRAM:
+                    for key, h in self._histograms.get(name, dict()).items():
+                        buckets = {_format_value(le): n for le, n in h.cumulative()}
+                        samples.append(
+                            {
+                                "labels": dict(constant + key),
+                                "count": h.count,
+                                "sum": h.sum,
+                                "buckets": buckets,
+                            }
+                        )
+                else:
+                    for key, value in self._values.get(name, dict()).items():
+                        samples.append({"labels": dict(constant + key), "value": value})
+                metrics[name] = {
+                    "type": metric_type,
+                    "help": METRIC_HELPS.get(name, str()),
+                    "samples": samples,
+                }
+        return {"timestamp": time(), "metrics": metrics}
+
+    def as_json(self) -> str:
+        return json.dumps(self.as_json_object(), indent=2, ensure_ascii=False)
+
+    def as_prometheus(self) -> str:
+        # https://prometheus.io/docs/instrumenting/exposition_formats/
+        constant = _label_key(self._constant_labels)
+        buffer = StringIO()
+        with self._lock:
+            for name, metric_type in sorted(self._types.items()):
+                if help_text := METRIC_HELPS.get(name):
+                    buffer.write(f"# HELP {name} {help_text}\n")
+                buffer.write(f"# TYPE {name} {metric_type}\n")
+
+                if metric_type != METRIC_TYPE_HISTOGRAM:
+                    for key, value in self._values.get(name, dict()).items():
+                        labels = _format_labels(constant + key)
+                        buffer.write(f"{name}{labels} {_format_value(value)}\n")
+                    continue
+
+                for key, h in self._histograms.get(name, dict()).items():
+                    for upper, count in h.cumulative():
+                        le = (("le", _format_value(upper)),)
+                        labels = _format_labels(constant + key, le)
+                        buffer.write(f"{name}_bucket{labels} {count}\n")
+                    labels = _format_labels(constant + key)
+                    buffer.write(f"{name}_sum{labels} {_format_value(h.sum)}\n")
+                    buffer.write(f"{name}_count{labels} {h.count}\n")
+        return buffer.getvalue()
+
+    def dumps(self, metrics_format=METRICS_FORMAT_JSON) -> str:
+        # A bare name in a 'case' pattern would capture instead of compare.
+        if metrics_format == METRICS_FORMAT_JSON:
+            return self.as_json()
+        if metrics_format == METRICS_FORMAT_PROMETHEUS:
+            return self.as_prometheus()
+        raise ValueError(f"Unsupported metrics format: {metrics_format}")
+
+    def save(self, path: str, metrics_format=METRICS_FORMAT_JSON) -> None:
+        # The textfile collector may read the file at any moment,
+        # so it must never observe a partially written file.
+        atomic_write_text(path, self.dumps(metrics_format))
+
+
+_default_registry = MetricsRegistry()
+
+
+def metrics() -> MetricsRegistry:
+    return _default_registry
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+
+from queue import Empty, Full, Queue
+from threading import Event
+from typing import Any, Final, Iterator
+
+QUEUE_POLL_INTERVAL: Final[float] = 0.1
+
+
+# [IMPORTANT]
+# Every stage of a pipeline waits on its bounded queues with a timeout,
+# so that a failure in any other stage stops it instead of leaving it blocked.
+def put_until_stopped(queue: Queue, item: Any, stop: Event) -> bool:
+    while not stop.is_set():
+        try:
+            queue.put(item, timeout=QUEUE_POLL_INTERVAL)
+        except Full:
+            continue
+        else:
+            return True
+    return False
+
+
+def iter_until_stopped(queue: Queue, stop: Event) -> Iterator[Any]:
+    # A None item marks the end of the stream.
+    while not stop.is_set():
+        try:
+            item = queue.get(timeout=QUEUE_POLL_INTERVAL)
+        except Empty:
+            continue
+        if item is None:
+            return
+        yield item
+
+
+def wait_until_stopped(event: Event, stop: Event) -> bool:
+    while not stop.is_set():
+        if event.wait(QUEUE_POLL_INTERVAL):
+            return True
+    return False
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+from time import monotonic
+from typing import Optional
+
+
+def format_seconds(seconds: float) -> str:
+    minutes, sec = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{sec:02d}"
+
+
+class Progress:
+    def __init__(self, total: int, *, start: Optional[float] = None):
+        assert 0 <= total
+        self._total = total
+        self._done = 0
+        self._start = start if start is not None else monotonic()
+
+    @property
+    def total(self) -> int:
+        return self._total
+
+    @property
+    def done(self) -> int:
+        return self._done
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self._total - self._done)
+
+    @property
+    def elapsed(self) -> float:
+        return monotonic() - self._start
+
+    @property
+    def percent(self) -> float:
+        if self._total == 0:
+            return 100.0
+        return self._done * 100.0 / self._total
+
+    @property
+    def throughput(self) -> float:
+        elapsed = self.elapsed
+        if elapsed <= 0:
+            return 0.0
+        return self._done / elapsed
+
+    @property
+    def eta(self) -> Optional[float]:
+        throughput = self.throughput
+        if throughput <= 0:
+            return None
+        return self.remaining / throughput
+
+    def update(self, count=1) -> None:
+        self._done += count
+
+    def cancel(self, count=1) -> None:
+        # Tasks that were counted in the total, but will never be done.
+        self._total = max(self._done, self._total - count)
+
+    def __str__(self) -> str:
+        eta = self.eta
+        eta_text = format_seconds(eta) if eta is not None else "--:--:--"
+        return (
+            f"{self._done}/{self._total} ({self.percent:.1f}%) "
+            f"{self.throughput:.2f}/s ETA {eta_text}"
+        )
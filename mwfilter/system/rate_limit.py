@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+
+from threading import Lock
+from time import monotonic, sleep
+
+
+class RateLimiter:
+    def __init__(self, rate: float):
+        assert 0 < rate
+        self._interval = 1.0 / rate
+        self._lock = Lock()
+        self._next = 0.0
+
+    @property
+    def interval(self) -> float:
+        return self._interval
+
+    def acquire(self) -> float:
+        # [IMPORTANT]
+        # Every caller reserves its own slot under the lock and sleeps outside it,
+        # so concurrent jobs are spaced evenly instead of waking up together.
+        with self._lock:
+            now = monotonic()
+            start = max(now, self._next)
+            self._next = start + self._interval
+        delay = start - now
+        if 0 < delay:
+            sleep(delay)
+        return delay
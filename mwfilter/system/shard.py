@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+
+from hashlib import sha1
+from typing import Iterable, NamedTuple
+
+
+class Shard(NamedTuple):
+    # 1-based, e.g. '1/4' to '4/4'
+    number: int = 1
+    total: int = 1
+
+    def includes(self, key: str) -> bool:
+        return shard_index(key, self.total) == self.number
+
+    def __str__(self) -> str:
+        return f"{self.number}/{self.total}"
+
+
+def parse_shard(value: str) -> Shard:
+    number, separator, total = value.partition("/")
+    try:
+        shard = Shard(int(number), int(total))
+    except ValueError:
+        raise ValueError(f"Expected a shard like '1/4', not {value!r}")
+    if not separator or not (1 <= shard.number <= shard.total):
+        raise ValueError(f"Expected a shard like '1/4', not {value!r}")
+    return shard
+
+
+def shard_index(key: str, count: int) -> int:
+    # [IMPORTANT]
+    # The built-in 'hash()' of a str is salted per process,
+    # so every machine would split the pages differently.
+    assert 1 <= count
+    digest = sha1(key.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+
+def selection_digest(keys: Iterable[str]) -> str:
+    # Shards of the same build select the same pages from the same cache.
+    return sha1("\n".join(sorted(keys)).encode("utf-8")).hexdigest()
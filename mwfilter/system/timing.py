@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+
+from contextlib import contextmanager
+from functools import wraps
+from io import StringIO
+from threading import Lock, local
+from time import perf_counter, thread_time
+from typing import Callable, Dict, Final, Iterable, List, NamedTuple, Optional, TypeVar
+
+from mwfilter.arguments import DEFAULT_PROFILE_TOP
+
+STAGE_DISCOVER: Final[str] = "discover"
+STAGE_META: Final[str] = "meta"
+STAGE_READ: Final[str] = "read"
+STAGE_HTTP: Final[str] = "http"
+STAGE_EXPAND: Final[str] = "expand"
+STAGE_PANDOC: Final[str] = "pandoc"
+STAGE_PARSE: Final[str] = "parse"
+STAGE_DUMP: Final[str] = "dump"
+STAGE_WRITE: Final[str] = "write"
+
+_local = local()
+
+_T = TypeVar("_T")
+
+
+class StageRecord(NamedTuple):
+    stage: str
+    page: Optional[str]
+    wall: float
+    cpu: float
+
+
+class StageSummary:
+    def __init__(self):
+        self.count = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.max_wall = 0.0
+
+    def add(self, wall: float, cpu: float) -> None:
+        self.count += 1
+        self.wall += wall
+        self.cpu += cpu
+        self.max_wall = max(self.max_wall, wall)
+
+
+class StageTimer:
+    def __init__(self, *, keep_records=False):
+        self._stages: Dict[str, StageSummary] = dict()
+        self._pages: Dict[str, Dict[str, float]] = dict()
+        self._records: List[StageRecord] = list()
+        self._keep_records = keep_records
+        self._lock = Lock()
+
+    @property
+    def stages(self) -> Dict[str, StageSummary]:
+        return self._stages
+
+    @property
+    def pages(self) -> Dict[str, Dict[str, float]]:
+        return self._pages
+
+    def add(self, stage: str, wall: float, cpu: float, page: Optional[str] = None):
+        with self._lock:
+            self._stages.setdefault(stage, StageSummary()).add(wall, cpu)
+            if self._keep_records:
+                self._records.append(StageRecord(stage, page, wall, cpu))
+            if page is not None:
+                page_stages = self._pages.setdefault(page, dict())
+                page_stages[stage] = page_stages.get(stage, 0.0) + wall
+
+    def merge(self, records: Iterable[StageRecord]) -> None:
+        for record in records:
+            self.add(record.stage, record.wall, record.cpu, record.page)
+
+    def records(self) -> List[StageRecord]:
+        return list(self._records)
+
+    @contextmanager
+    def measure(self, stage: str, page: Optional[str] = None):
+        wall_begin = perf_counter()
+        cpu_begin = thread_time()
+        try:
+            yield
+        finally:
+            wall = perf_counter() - wall_begin
+            cpu = thread_time() - cpu_begin
+            self.add(stage, wall, cpu, page)
+
+    def slowest_pages(self, top=DEFAULT_PROFILE_TOP) -> List[str]:
+        return sorted(self._pages, key=lambda x: -sum(self._pages[x].values()))[:top]
+
+    def report(self, top=DEFAULT_PROFILE_TOP) -> str:
+        buffer = StringIO()
+        buffer.write(
+            f"{'Stage':<10} {'Count':>8} {'Wall(s)':>10} {'CPU(s)':>10} "
+            f"{'Mean(ms)':>10} {'Max(ms)':>10}\n"
+        )
+        for name, s in self._stages.items():
+            mean = s.wall / s.count * 1000 if s.count else 0.0
+            buffer.write(
+                f"{name:<10} {s.count:>8} {s.wall:>10.3f} {s.cpu:>10.3f} "
+                f"{mean:>10.3f} {s.max_wall * 1000:>10.3f}\n"
+            )
+
+        if self._pages and 1 <= top:
+            buffer.write(f"\nTop {top} slowest pages:\n")
+            for page in self.slowest_pages(top):
+                stages = self._pages[page]
+                total = sum(stages.values())
+                details = ", ".join(f"{k} {v:.3f}s" for k, v in stages.items())
+                buffer.write(f"{total:>10.3f}s {page} ({details})\n")
+
+        return buffer.getvalue()
+
+
+def current_timer() -> Optional[StageTimer]:
+    return getattr(_local, "timer", None)
+
+
+def current_page() -> Optional[str]:
+    return getattr(_local, "page", None)
+
+
+@contextmanager
+def use_timer(timer: Optional[StageTimer], page: Optional[str] = None):
+    prev_timer = current_timer()
+    prev_page = current_page()
+    _local.timer = timer
+    _local.page = page
+    try:
+        yield timer
+    finally:
+        _local.timer = prev_timer
+        _local.page = prev_page
+
+
+def bind_timer(func: Callable[..., _T]) -> Callable[..., _T]:
+    # [IMPORTANT]
+    # The timer is thread-local, so a function submitted to a thread pool
+    # is bound to the timer of the submitting thread.
+    timer = current_timer()
+
+    @wraps(func)
+    def _wrapper(*args, **kwargs) -> _T:
+        with use_timer(timer):
+            return func(*args, **kwargs)
+
+    return _wrapper
+
+
+@contextmanager
+def timing_page(page: Optional[str]):
+    with use_timer(current_timer(), page):
+        yield
+
+
+@contextmanager
+def timing(stage: str):
+    timer = current_timer()
+    if timer is None:
+        yield
+        return
+
+    with timer.measure(stage, current_page()):
+        yield
@@ -27,4 +27,5 @@ if __name__ == "__main__":
     setup(
         install_requires=install_requires(REQUIREMENTS_MAIN),
         tests_require=install_requires(REQUIREMENTS_TEST),
+        extras_require={"zstd": ["zstandard>=0.22.0"]},
     )
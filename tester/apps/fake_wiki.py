@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+
+import json
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+from typing import Any, Dict, List, Optional, Sequence, Set
+from urllib.parse import parse_qsl, urlsplit
+
+from mwfilter.mw.site import HttpOptions, create_site
+
+TOUCHED = "2024-01-01T00:00:00Z"
+TEMPLATE_PREFIX = "Template:"
+SESSION_COOKIE = "fake_session"
+
+
+# A MediaWiki API with just enough of the query actions for 'down' and 'sync';
+# Titles listed in 'failures' answer every content request with '404 Not Found'.
+# A login starts a session, which lasts until 'sessions' is cleared.
+class FakeWiki:
+    def __init__(
+        self,
+        texts: Dict[str, str],
+        failures: Sequence[str] = (),
+        templates: Optional[Dict[str, List[str]]] = None,
+    ):
+        self.texts = texts
+        self.templates = templates if templates else dict()
+        self.titles = sorted(texts)
+        self.failures: Set[str] = set(failures)
+        self.requests: List[Dict[str, str]] = list()
+        self.sessions: Set[str] = set()
+        self.logins = 0
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[Thread] = None
+
+    @property
+    def host(self) -> str:
+        assert self._server is not None
+        return f"127.0.0.1:{self._server.server_address[1]}"
+
+    def __enter__(self):
+        wiki = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def _respond(self, params: Dict[str, str]) -> None:
+                wiki.requests.append(params)
+                cookie = SimpleCookie(self.headers.get("Cookie", str()))
+                morsel = cookie.get(SESSION_COOKIE)
+                session = morsel.value if morsel is not None else None
+                if params.get("action") == "login":
+                    session = wiki.login()
+                status, obj = wiki.respond(params, session in wiki.sessions)
+                body = json.dumps(obj).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                if params.get("action") == "login":
+                    self.send_header("Set-Cookie", f"{SESSION_COOKIE}={session}")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):  # noqa
+                self._respond(dict(parse_qsl(urlsplit(self.path).query)))
+
+            def do_POST(self):  # noqa
+                length = int(self.headers.get("Content-Length", 0))
+                self._respond(dict(parse_qsl(self.rfile.read(length).decode())))
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._thread = Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        assert self._server is not None
+        assert self._thread is not None
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def create_site(self, options: Optional[HttpOptions] = None):
+        return create_site(self.host, "/w/", options=options, scheme="http")
+
+    @staticmethod
+    def namespace(title: str) -> int:
+        return 10 if title.startswith(TEMPLATE_PREFIX) else 0
+
+    def info(self, title: str) -> Dict[str, Any]:
+        if title not in self.texts:
+            return {"ns": self.namespace(title), "title": title, "missing": ""}
+        i = self.titles.index(title)
+        return {
+            "pageid": i + 1,
+            "ns": self.namespace(title),
+            "title": title,
+            "lastrevid": 100 + i,
+            "touched": TOUCHED,
+            "length": len(self.texts[title]),
+            "contentmodel": "wikitext",
+            "pagelanguage": "en",
+        }
+
+    def login(self) -> str:
+        self.logins += 1
+        session = f"session{self.logins}"
+        self.sessions.add(session)
+        return session
+
+    @staticmethod
+    def userinfo(logged_in: bool) -> Dict[str, Any]:
+        if logged_in:
+            return {"id": 1, "name": "User", "groups": ["*", "user"], "rights": []}
+        return {"id": 0, "name": "127.0.0.1", "anon": "", "groups": ["*"]}
+
+    def siteinfo(self, logged_in: bool) -> Dict[str, Any]:
+        count = len(self.titles)
+        return {
+            "general": {"generator": "MediaWiki 1.39.0", "sitename": "Fake"},
+            "namespaces": {
+                "0": {"id": 0, "*": ""},
+                "10": {"id": 10, "*": TEMPLATE_PREFIX[:-1]},
+            },
+            "userinfo": dict(self.userinfo(logged_in), rights=["read"]),
+            "statistics": {
+                "pages": count,
+                "articles": count,
+                "edits": count,
+                "images": 0,
+                "users": 1,
+                "activeusers": 1,
+                "admins": 1,
+                "jobs": 0,
+            },
+        }
+
+    def allpages(self, params: Dict[str, str]) -> Dict[str, Any]:
+        namespace = int(params.get("gapnamespace", 0))
+        titles = [t for t in self.titles if self.namespace(t) == namespace]
+        if "gapfrom" in params:
+            titles = [t for t in titles if params["gapfrom"] <= t]
+        if "gapto" in params:
+            titles = [t for t in titles if t <= params["gapto"]]
+        if "gapcontinue" in params:
+            titles = [t for t in titles if params["gapcontinue"] <= t]
+        limit = int(params.get("gaplimit", 500))
+        pages = {str(i): self.info(t) for i, t in enumerate(titles[:limit])}
+        result: Dict[str, Any] = {"query": {"pages": pages}}
+        if limit < len(titles):
+            result["continue"] = {"gapcontinue": titles[limit], "continue": "-||"}
+        return result
+
+    def revisions(self, title: str, content: bool) -> Dict[str, Any]:
+        i = self.titles.index(title)
+        rev: Dict[str, Any] = {"revid": 100 + i, "user": "Alice", "timestamp": TOUCHED}
+        if content:
+            text = self.texts[title]
+            rev["slots"] = {"main": {"contentmodel": "wikitext", "*": text}}
+        page = dict(self.info(title), revisions=[rev])
+        return {"query": {"pages": {str(i + 1): page}}}
+
+    def respond(self, params: Dict[str, str], logged_in=False):
+        title = params.get("titles", str())
+        meta = params.get("meta", str())
+        if "siteinfo" in meta:
+            return 200, {"query": self.siteinfo(logged_in)}
+        elif "tokens" in meta:
+            return 200, {"query": {"tokens": {"logintoken": "token+\\"}}}
+        elif params.get("action") == "login":
+            return 200, {"login": {"result": "Success", "lgusername": "User"}}
+        elif meta.startswith("userinfo") and not title and "prop" not in params:
+            return 200, {"query": {"userinfo": self.userinfo(logged_in)}}
+        elif params.get("action") == "expandtemplates":
+            return 200, {"expandtemplates": {"*": params.get("text", str())}}
+        elif params.get("generator") == "allpages":
+            return 200, self.allpages(params)
+        elif params.get("prop") == "templates":
+            pages = dict()
+            for i, t in enumerate(title.split("|")):
+                templates = [{"ns": 10, "title": x} for x in self.templates.get(t, [])]
+                pages[str(i)] = dict(self.info(t), templates=templates)
+            return 200, {"query": {"pages": pages}}
+        elif title and title not in self.texts:
+            return 200, {"query": {"pages": {"-1": self.info(title)}}}
+        elif title and "revisions" in params.get("prop", str()):
+            content = "content" in params.get("rvprop", str())
+            if content and title in self.failures:
+                return 404, {}
+            return 200, self.revisions(title, content)
+        elif title:
+            i = self.titles.index(title)
+            return 200, {"query": {"pages": {str(i + 1): self.info(title)}}}
+        return 200, {"error": {"code": "unknown", "info": json.dumps(params)}}
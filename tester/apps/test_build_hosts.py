@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+
+from unittest import TestCase, main
+
+from mwfilter.apps.build.app import (
+    BuildLinks,
+    init_build_worker,
+    parse_build_host,
+    worker_dumper,
+)
+
+
+class BuildHostsTestCase(TestCase):
+    def test_parse_build_host(self):
+        self.assertTupleEqual(
+            ("wiki.local:8080", "site/mkdocs.yml"),
+            parse_build_host(" wiki.local:8080 = site/mkdocs.yml"),
+        )
+        for value in ("wiki.local", "=mkdocs.yml", "wiki.local="):
+            with self.subTest(value=value):
+                with self.assertRaises(ValueError):
+                    parse_build_host(value)
+
+    def test_worker_dumper(self):
+        init_build_worker(
+            {
+                "a.local": BuildLinks(["A1", "A2"], list()),
+                "b.local": BuildLinks(["B1"], ["B.png"]),
+            }
+        )
+        a = worker_dumper("a.local")
+        b = worker_dumper("b.local")
+        self.assertIsNot(a, b)
+        self.assertIs(a, worker_dumper("a.local"))
+        with self.assertRaises(KeyError):
+            worker_dumper("c.local")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+
+from pathlib import Path
+from unittest import TestCase, main
+
+from mwfilter.apps.build.app import BuildTuple, schedule_largest_first
+from mwfilter.mw.convert_info import ConvertInfo
+from mwfilter.mw.page_meta import PageMeta
+
+
+def _item(i: int, text: str, length=0) -> BuildTuple:
+    info = ConvertInfo(meta=PageMeta(name=f"P{i}", length=length), text=text)
+    return BuildTuple(i, 3, Path(), 2, info)
+
+
+class ScheduleTestCase(TestCase):
+    def test_largest_first(self):
+        items = [_item(0, "a"), _item(1, "a" * 100), _item(2, "a" * 10)]
+        result = schedule_largest_first(items)
+        self.assertEqual([1, 2, 0], [x.i for x in result])
+
+    def test_meta_length_fallback(self):
+        items = [_item(0, "", length=5), _item(1, "", length=50), _item(2, "aaa")]
+        result = schedule_largest_first(items)
+        self.assertEqual([1, 0, 2], [x.i for x in result])
+
+    def test_stable(self):
+        items = [_item(2, "aa"), _item(0, "aa"), _item(1, "aa")]
+        result = schedule_largest_first(items)
+        self.assertEqual([0, 1, 2], [x.i for x in result])
+
+
+if __name__ == "__main__":
+    main()
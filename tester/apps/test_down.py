@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Optional, Tuple
+from unittest import TestCase, main
+from unittest.mock import patch
+
+from mwfilter.apps.down.app import DownApp
+from mwfilter.arguments import get_default_arguments
+from mwfilter.mw.page_meta import PageMeta
+from mwfilter.mw.site import HttpOptions
+from mwfilter.mw.template_index import TemplateIndex
+from mwfilter.store import open_page_store
+from mwfilter.store.file_store import FilePageStore
+from mwfilter.system.timing import STAGE_HTTP, STAGE_WRITE, StageTimer, use_timer
+from tester.apps.fake_wiki import FakeWiki
+
+TEXTS = {f"Page{i:02}": f"Text of page {i}" for i in range(12)}
+
+
+class _FailingStore(FilePageStore):
+    def put(self, meta: PageMeta, text: str) -> None:
+        raise OSError("No space left on device")
+
+
+class DownTestCase(TestCase):
+    def setUp(self):
+        self.tmpdir = TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def create_app(
+        self,
+        *argv: str,
+        wiki: Optional[FakeWiki] = None,
+        ignore_errors=False,
+    ) -> DownApp:
+        common: Tuple[str, ...] = "-C", self.tmpdir.name, "-H", "wiki.local", "-y"
+        common += ("-i",) if ignore_errors else ()
+        args = get_default_arguments([*common, "down", "--endpoint-path", "/", *argv])
+        app = DownApp(args)
+        if wiki is not None:
+            options = HttpOptions(retries=0)
+            patcher = patch.object(
+                app,
+                "create_site",
+                lambda: wiki.create_site(options),
+            )
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        return app
+
+    def test_check_namespaces(self):
+        self.create_app("-a", "--resume", "--namespace", "0").check_namespaces()
+        for argv in (
+            ("--resume", "--namespace", "0", "Alpha"),
+            ("-a", "--resume", "--namespace", "0,1"),
+            ("-a", "--namespace", "9999"),
+        ):
+            with self.subTest(argv=argv):
+                with self.assertRaises(ValueError):
+                    self.create_app(*argv).check_namespaces()
+
+    def test_namespace_states(self):
+        texts = dict(TEXTS, **{"Template:Box": "[{{{1}}}]"})
+        failures = ["Page03", "Template:Box"]
+        with FakeWiki(texts, failures=failures) as wiki:
+            argv = "-a", "--namespace", "0,10", "--jobs", "1"
+            self.create_app(*argv, wiki=wiki, ignore_errors=True).run()
+
+        # The failures of each namespace are kept for its own '--resume'.
+        app = self.create_app("-a", "--resume", "--namespace", "0")
+        self.assertListEqual(["Page03"], app.load_state(0).failed)
+        app = self.create_app("-a", "--resume", "--namespace", "10")
+        self.assertListEqual(["Template:Box"], app.load_state(10).failed)
+
+    def test_parallel_timing(self):
+        timer = StageTimer()
+        with FakeWiki(TEXTS) as wiki:
+            app = self.create_app("-a", "--jobs", "4", wiki=wiki)
+            with use_timer(timer):
+                app.run()
+
+        # Pages are fetched in worker threads, but timed by the caller's timer.
+        self.assertLessEqual(len(TEXTS), timer.stages[STAGE_HTTP].count)
+        self.assertEqual(len(TEXTS), timer.stages[STAGE_WRITE].count)
+        self.assertSetEqual(set(TEXTS), set(timer.pages))
+
+        with open_page_store(self.tmpdir.name, "wiki.local") as store:
+            self.assertListEqual(sorted(TEXTS), store.filenames())
+
+    def test_failed_write(self):
+        templates = {"Page00": ["Template:Box"]}
+        with FakeWiki(TEXTS, templates=templates) as wiki:
+            app = self.create_app("Page00", wiki=wiki, ignore_errors=True)
+            site = app.create_site()
+            page = app.request_page(site, "Page00")
+            assert page is not None
+
+            # A page that could not be stored is not recorded as fetched.
+            failing = _FailingStore(Path(self.tmpdir.name) / "failing")
+            self.assertFalse(app.download_page(failing, page, 1))
+            index = TemplateIndex()
+            app.save_template_index(site, index)
+            self.assertListEqual([], index.templates)
+
+            page = app.request_page(site, "Page00")
+            assert page is not None
+            with open_page_store(self.tmpdir.name, "wiki.local") as store:
+                self.assertTrue(app.download_page(store, page, 1))
+            app.save_template_index(site, index)
+            self.assertListEqual(["Template:Box"], index.templates_of("Page00"))
+
+    def test_expand_locally(self):
+        texts = {"Page00": "A {{Box|x}}", "Template:Box": "[{{{1}}}]"}
+        with FakeWiki(texts) as wiki:
+            argv = "-a", "--namespace", "0,10", "--expand-locally"
+            self.create_app(*argv, wiki=wiki).run()
+            with open_page_store(self.tmpdir.name, "wiki.local") as store:
+                self.assertEqual("A [x]", store.get_text("Page00"))
+                self.assertTrue(store.get_meta("Page00").templates_expanded)
+
+                # Template pages are the sources of the expansion, kept as written.
+                self.assertEqual("[{{{1}}}]", store.get_text("Template:Box"))
+                self.assertFalse(store.get_meta("Template:Box").templates_expanded)
+
+            def _source_requests():
+                return [
+                    r
+                    for r in wiki.requests
+                    if r.get("titles") == "Template:Box"
+                    and "content" in r.get("rvprop", str())
+                ]
+
+            # The cached template source is current, so only its revision is asked.
+            wiki.requests.clear()
+            self.create_app("--expand-locally", "Page00", wiki=wiki).run()
+            self.assertListEqual([], _source_requests())
+
+            # A cached source of another revision is downloaded again.
+            with open_page_store(self.tmpdir.name, "wiki.local") as store:
+                meta = store.get_meta("Template:Box")
+                meta.revision -= 1
+                store.put(meta, "({{{1}}})")
+            self.create_app("--expand-locally", "Page00", wiki=wiki).run()
+            self.assertEqual(1, len(_source_requests()))
+            with open_page_store(self.tmpdir.name, "wiki.local") as store:
+                self.assertEqual("A [x]", store.get_text("Page00"))
+
+
+if __name__ == "__main__":
+    main()
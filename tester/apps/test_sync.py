@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Dict
+from unittest import TestCase, main
+from unittest.mock import patch
+
+from requests.exceptions import HTTPError
+
+from mwfilter.apps.sync.app import SyncApp
+from mwfilter.arguments import DEFAULT_EXCLUDE_PAGE, get_default_arguments
+from mwfilter.mw.site import HttpOptions
+from mwfilter.system.timing import STAGE_HTTP, STAGE_WRITE, StageTimer, use_timer
+from tester.apps.fake_wiki import FakeWiki
+
+TEXTS = {f"Page{i:02}": f"Text of page {i}, see [[Page00]]." for i in range(10)}
+EXCLUDE = "* [[Page01]]\n* Page0[89]\n* Mwfilter:.*\n"
+
+
+class SyncTestCase(TestCase):
+    def setUp(self):
+        self.tmpdir = TemporaryDirectory()
+        self.root = Path(self.tmpdir.name)
+        self.cache_dir = self.root / "cache"
+        self.cache_dir.mkdir()
+        self.mkdocs_yml = self.root / "site" / "mkdocs.yml"
+        self.mkdocs_yml.parent.mkdir()
+        self.mkdocs_yml.write_text("site_name: Fake\n")
+        self.docs_dir = self.mkdocs_yml.parent / "docs"
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def create_app(self, wiki: FakeWiki, *argv: str, refetch=False) -> SyncApp:
+        common = "-C", str(self.cache_dir), "-H", "wiki.local", "-y", *argv
+        sync_argv = ("--refetch",) if refetch else ()
+        args = get_default_arguments(
+            [
+                *common,
+                "sync",
+                "--endpoint-path",
+                "/w/",
+                "--mkdocs-yml",
+                str(self.mkdocs_yml),
+                "--fetch-jobs",
+                "3",
+                "--convert-jobs",
+                "2",
+                "--executor",
+                "thread",
+                *sync_argv,
+            ]
+        )
+        app = SyncApp(args)
+        options = HttpOptions(retries=0)
+        patcher = patch.object(
+            app._down,
+            "create_site",
+            lambda: wiki.create_site(options),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return app
+
+    def markdown_names(self):
+        return sorted(p.stem for p in self.docs_dir.rglob("*.md"))
+
+    @staticmethod
+    def wiki_texts() -> Dict[str, str]:
+        return dict(TEXTS, **{DEFAULT_EXCLUDE_PAGE: EXCLUDE})
+
+    def test_pipeline(self):
+        timer = StageTimer()
+        with FakeWiki(self.wiki_texts()) as wiki:
+            with use_timer(timer):
+                self.create_app(wiki).run()
+
+        # Listed pages pass the exclusion before they are fetched and converted.
+        expected = [f"Page{i:02}" for i in (0, 2, 3, 4, 5, 6, 7)]
+        self.assertListEqual(expected, self.markdown_names())
+        self.assertIn("Page00", (self.docs_dir / "Page02.md").read_text())
+
+        # The fetch jobs run in worker threads, but are timed by the caller's timer.
+        self.assertLessEqual(len(expected), timer.stages[STAGE_HTTP].count)
+        self.assertLessEqual(len(expected), timer.stages[STAGE_WRITE].count)
+        for name in expected:
+            self.assertIn(STAGE_HTTP, timer.pages[name])
+
+    def test_fetch_error(self):
+        with FakeWiki(self.wiki_texts(), failures=["Page05"]) as wiki:
+            with self.assertRaises(HTTPError):
+                self.create_app(wiki).run()
+            self.assertNotIn("Page05", self.markdown_names())
+
+    def test_ignore_errors(self):
+        with FakeWiki(self.wiki_texts(), failures=["Page00"]) as wiki:
+            self.create_app(wiki, "-i").run()
+
+        # A page that was never downloaded is neither converted nor linked.
+        expected = [f"Page{i:02}" for i in (2, 3, 4, 5, 6, 7)]
+        self.assertListEqual(expected, self.markdown_names())
+        self.assertNotIn("Page00.md", (self.docs_dir / "Page02.md").read_text())
+
+    def test_ignore_errors_cached(self):
+        with FakeWiki(self.wiki_texts()) as wiki:
+            self.create_app(wiki).run()
+        linked = (self.docs_dir / "Page02.md").read_text()
+
+        # A page that fails to download again is converted from the cache.
+        with FakeWiki(self.wiki_texts(), failures=["Page00"]) as wiki:
+            self.create_app(wiki, "-i", refetch=True).run()
+        expected = [f"Page{i:02}" for i in (0, 2, 3, 4, 5, 6, 7)]
+        self.assertListEqual(expected, self.markdown_names())
+        self.assertEqual(linked, (self.docs_dir / "Page02.md").read_text())
+
+    def test_linking_pages(self):
+        self.docs_dir.mkdir()
+        markdowns = {
+            "Page02": "See [Page00](Page00.md).",
+            "Page03": "See [Page00](Page00.md#Top).",
+            "Page04": "See [Page05](Page05.md) and <span>Page00</span>.",
+            "Page06": "See [A B](A_B.md).",
+        }
+        for name, markdown in markdowns.items():
+            (self.docs_dir / f"{name}.md").write_text(markdown)
+
+        # Only the pages whose links resolved to a late failure are converted again.
+        names = [*markdowns, "Page07"]
+        self.assertListEqual(
+            ["Page02", "Page03"],
+            SyncApp.linking_pages(self.docs_dir, names, ["Page00"]),
+        )
+        self.assertListEqual(
+            ["Page04"],
+            SyncApp.linking_pages(self.docs_dir, names, ["Page05", "Page07"]),
+        )
+        self.assertListEqual([], SyncApp.linking_pages(self.docs_dir, names, []))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+
+from unittest import TestCase, main
+
+from mwfilter.benchmark.corpus import PAGE_KINDS, generate_corpus
+
+
+class CorpusTestCase(TestCase):
+    def test_reproducible(self):
+        corpus0 = generate_corpus(len(PAGE_KINDS), seed=1)
+        corpus1 = generate_corpus(len(PAGE_KINDS), seed=1)
+        corpus2 = generate_corpus(len(PAGE_KINDS), seed=2)
+        self.assertEqual(corpus0, corpus1)
+        self.assertNotEqual(corpus0, corpus2)
+
+    def test_features(self):
+        corpus = {page.kind: page.text for page in generate_corpus(len(PAGE_KINDS))}
+        self.assertEqual(set(PAGE_KINDS), set(corpus.keys()))
+        self.assertIn("{|", corpus["table"])
+        self.assertIn("**", corpus["list"])
+        self.assertIn("<references />", corpus["references"])
+        self.assertIn("[[Bench_Page_", corpus["links"])
+        self.assertLess(len(corpus["table"]) * 10, len(corpus["large"]))
+
+
+if __name__ == "__main__":
+    main()
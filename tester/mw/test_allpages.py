@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main
+
+from mwfilter.mw.allpages import TitleRange, iter_allpages_chunks, plan_title_ranges
+from mwfilter.mw.down_state import DownState
+
+TITLES = ["Alpha", "Beta", "Delta", "Gamma", "Omega"]
+
+
+class _ChunkedSite:
+    api_limit = 500
+
+    def __init__(self):
+        self.requests = list()
+
+    def get(self, action, **kwargs):
+        assert action == "query"
+        assert kwargs["generator"] == "allpages"
+        self.requests.append(kwargs)
+        limit = int(kwargs["gaplimit"])
+        titles = TITLES
+        if "gapfrom" in kwargs:
+            titles = [t for t in titles if kwargs["gapfrom"] <= t]
+        if "gapto" in kwargs:
+            titles = [t for t in titles if t <= kwargs["gapto"]]
+        begin = titles.index(kwargs["gapcontinue"]) if "gapcontinue" in kwargs else 0
+        rest = titles[begin:]
+        titles = rest[:limit]
+        pages = {
+            str(i): {"pageid": i, "ns": 0, "title": t} for i, t in enumerate(titles)
+        }
+        data = {"query": {"pages": pages}}
+        if limit < len(rest):
+            data["continue"] = {"gapcontinue": rest[limit], "continue": "-||"}
+        return data
+
+
+class AllPagesTestCase(TestCase):
+    def test_chunks(self):
+        site = _ChunkedSite()
+        chunks = list(iter_allpages_chunks(site, 0, chunk_size=2))
+        self.assertListEqual(
+            [["Alpha", "Beta"], ["Delta", "Gamma"], ["Omega"]],
+            [[p.name for p in chunk.pages] for chunk in chunks],
+        )
+        self.assertEqual("Delta", chunks[0].continuation["gapcontinue"])
+        self.assertIsNone(chunks[-1].continuation)
+
+        # A later process continues from a persisted continuation.
+        continuation = chunks[1].continuation
+        rest = list(iter_allpages_chunks(site, 0, continuation, 2))
+        self.assertListEqual(["Omega"], [p.name for p in rest[0].pages])
+
+    def test_title_ranges(self):
+        self.assertListEqual([TitleRange()], plan_title_ranges(100, 8, 500))
+        self.assertListEqual([TitleRange()], plan_title_ranges(100000, 1, 500))
+
+        ranges = plan_title_ranges(100000, 4, 500)
+        self.assertEqual(4, len(ranges))
+        self.assertIsNone(ranges[0].start)
+        self.assertIsNone(ranges[-1].end)
+        for prev, curr in zip(ranges, ranges[1:]):
+            self.assertEqual(prev.end, curr.start)
+
+        # Every title belongs to exactly one range.
+        for title in ["0", "Alpha", "Delta", "M", "Zulu", "가"]:
+            self.assertEqual(1, sum(r.includes(title) for r in ranges))
+
+    def test_range_chunks(self):
+        site = _ChunkedSite()
+        ranges = [TitleRange(None, "Delta"), TitleRange("Delta", None)]
+        names = [
+            [p.name for c in iter_allpages_chunks(site, 0, None, 2, r) for p in c.pages]
+            for r in ranges
+        ]
+        self.assertListEqual([["Alpha", "Beta"], ["Delta", "Gamma", "Omega"]], names)
+
+    def test_state(self):
+        with TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "down.state.json"
+            self.assertIsNone(DownState.load(path))
+
+            state = DownState(namespace=4)
+            state.complete("Alpha")
+            state.fail("Beta")
+            state.save(path)
+
+            loaded = DownState.load(path)
+            assert loaded is not None
+            self.assertEqual(4, loaded.namespace)
+            self.assertListEqual(["Alpha"], loaded.completed)
+            self.assertListEqual(["Beta"], loaded.failed)
+
+            loaded.complete("Beta")
+            loaded.next_chunk({"gapcontinue": "Delta"})
+            loaded.save(path)
+
+            loaded = DownState.load(path)
+            assert loaded is not None
+            self.assertListEqual([], loaded.completed)
+            self.assertListEqual([], loaded.failed)
+            self.assertEqual({"gapcontinue": "Delta"}, loaded.continuation)
+            self.assertFalse(loaded.finished)
+
+
+if __name__ == "__main__":
+    main()
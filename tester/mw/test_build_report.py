@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import List
+from unittest import TestCase, main
+
+from mwfilter.mw.build_report import (
+    BuildFailure,
+    BuildReport,
+    merge_reports,
+    verify_reports,
+)
+from mwfilter.system.shard import Shard, selection_digest
+
+NAMES = [f"Page_{i:02}" for i in range(30)]
+
+
+def _shard_reports(count: int) -> List[BuildReport]:
+    result = list()
+    for number in range(1, count + 1):
+        assigned = [n for n in NAMES if Shard(number, count).includes(n)]
+        report = BuildReport(
+            hostname="wiki.local",
+            shard_index=number,
+            shard_count=count,
+            total=len(NAMES),
+            selection=selection_digest(NAMES),
+            assigned=assigned,
+            converted=list(assigned),
+            elapsed=float(number),
+        )
+        result.append(report)
+    return result
+
+
+class BuildReportTestCase(TestCase):
+    def test_merge(self):
+        reports = _shard_reports(3)
+        self.assertListEqual(list(), verify_reports(reports, "wiki.local"))
+
+        merged = merge_reports(list(reversed(reports)), "wiki.local")
+        self.assertListEqual(NAMES, merged.converted)
+        self.assertEqual(1, merged.shard_count)
+        self.assertEqual(3.0, merged.elapsed)
+        self.assertListEqual(list(), merged.problems)
+
+        # The merged report is a complete unsharded build itself
+        self.assertListEqual(list(), verify_reports([merged], "wiki.local"))
+        self.assertEqual(merged, merge_reports(reports, "wiki.local"))
+
+    def test_missing_and_duplicated_shards(self):
+        reports = _shard_reports(3)
+        problems = verify_reports([reports[0], reports[2], reports[2]])
+        self.assertIn("Missing shard: 2/3", problems)
+        self.assertIn("Duplicated shard: 3/3", problems)
+        assigned = len(reports[0].assigned) + len(reports[2].assigned)
+        self.assertIn(f"{assigned} of {len(NAMES)} pages are assigned", problems)
+        self.assertTrue(any(p.startswith("Converted 2 times: ") for p in problems))
+
+    def test_failures(self):
+        reports = _shard_reports(2)
+        page = reports[0].assigned[0]
+        reports[0].converted.remove(page)
+        reports[0].failed.append(BuildFailure(page, "ValueError: x"))
+        problems = verify_reports(reports)
+        self.assertIn(f"Failed in 1/2: {page}: ValueError: x", problems)
+        self.assertIn(f"Not converted: {page}", problems)
+
+    def test_different_builds(self):
+        reports = _shard_reports(2)
+        reports[1].selection = selection_digest(NAMES[1:])
+        problems = verify_reports(reports)
+        self.assertEqual(1, len(problems))
+        self.assertIn("'selection'", problems[0])
+        self.assertListEqual(["No build reports"], verify_reports(list()))
+
+    def test_different_selection(self):
+        # Shards that agree with each other, but not with the pages they assigned.
+        reports = _shard_reports(2)
+        for report in reports:
+            report.selection = selection_digest(NAMES[1:] + ["Page_99"])
+        problems = verify_reports(reports)
+        self.assertListEqual(
+            ["The assigned pages are not the selected pages"], problems
+        )
+
+    def test_save_and_load(self):
+        report = _shard_reports(2)[1]
+        report.failed.append(BuildFailure("X", "Error"))
+        with TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "report.json"
+            report.save(path)
+            self.assertEqual(report, BuildReport.load(path))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+
+import bz2
+import gzip
+from io import BytesIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main
+
+from mwfilter.apps.import_.app import ImportApp
+from mwfilter.arguments import get_default_arguments
+from mwfilter.mw.dump import DumpReader, open_dump
+from mwfilter.store import open_page_store
+
+DUMP_XML = b"""<?xml version="1.0" encoding="utf-8"?>
+<mediawiki xmlns="http://www.mediawiki.org/xml/export-0.11/" version="0.11">
+  <siteinfo>
+    <sitename>Local</sitename>
+    <namespaces>
+      <namespace key="0" case="first-letter" />
+      <namespace key="10" case="first-letter">Template</namespace>
+    </namespaces>
+  </siteinfo>
+  <page>
+    <title>Main Page</title>
+    <ns>0</ns>
+    <id>1</id>
+    <revision>
+      <id>10</id>
+      <timestamp>2024-01-01T00:00:00Z</timestamp>
+      <contributor><username>Alice</username><id>1</id></contributor>
+      <model>wikitext</model>
+      <text bytes="3">Old</text>
+    </revision>
+    <revision>
+      <id>11</id>
+      <parentid>10</parentid>
+      <timestamp>2024-02-01T12:30:00Z</timestamp>
+      <contributor><ip>127.0.0.1</ip></contributor>
+      <model>wikitext</model>
+      <text bytes="9">Hello '''</text>
+    </revision>
+  </page>
+  <page>
+    <title>Home</title>
+    <ns>0</ns>
+    <id>2</id>
+    <redirect title="Main Page" />
+    <revision>
+      <id>12</id>
+      <timestamp>2024-03-01T00:00:00Z</timestamp>
+      <contributor><username>Bob</username><id>2</id></contributor>
+      <text bytes="24">#REDIRECT [[Main Page]]</text>
+    </revision>
+  </page>
+  <page>
+    <title>Template:Box/Doc</title>
+    <ns>10</ns>
+    <id>3</id>
+    <revision>
+      <id>13</id>
+      <timestamp>2024-04-01T00:00:00Z</timestamp>
+      <contributor><username>Alice</username><id>1</id></contributor>
+      <text bytes="3">Box</text>
+    </revision>
+  </page>
+</mediawiki>
+"""
+
+
+class DumpTestCase(TestCase):
+    def test_reader(self):
+        pages = list(DumpReader(BytesIO(DUMP_XML)))
+        self.assertListEqual(
+            ["Main_Page", "Home", "Template:Box/Doc"],
+            [meta.filename for meta, _ in pages],
+        )
+
+        meta, text = pages[0]
+        self.assertEqual("Hello '''", text)
+        self.assertEqual(11, meta.revision)
+        self.assertEqual(1, meta.page_id)
+        self.assertEqual(2024, meta.touched.year)
+        self.assertEqual(12, meta.touched.hour)
+        self.assertListEqual(["127.0.0.1", "Alice"], meta.authors)
+        self.assertFalse(meta.redirect)
+        self.assertFalse(meta.templates_expanded)
+        self.assertTrue(meta.from_dump)
+
+        meta, _ = pages[1]
+        self.assertTrue(meta.redirect)
+        self.assertEqual("Main_Page", meta.redirect_pagename)
+
+        meta, _ = pages[2]
+        self.assertEqual(10, meta.namespace)
+        self.assertEqual("Box/Doc", meta.page_title)
+        self.assertEqual("Box", meta.base_title)
+
+    def test_namespaces(self):
+        pages = list(DumpReader(BytesIO(DUMP_XML), {10}))
+        self.assertListEqual(["Template:Box/Doc"], [m.name for m, _ in pages])
+
+    def test_compressed(self):
+        with TemporaryDirectory() as tmpdir:
+            for name, data in (
+                ("dump.xml", DUMP_XML),
+                ("dump.xml.bz2", bz2.compress(DUMP_XML)),
+                ("dump.xml.gz", gzip.compress(DUMP_XML)),
+            ):
+                path = Path(tmpdir) / name
+                path.write_bytes(data)
+                with open_dump(str(path)) as f:
+                    self.assertEqual(3, len(list(DumpReader(f))))
+
+    def test_import_app(self):
+        with TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "dump.xml.bz2"
+            path.write_bytes(bz2.compress(DUMP_XML))
+            argv = ["-C", tmpdir, "-H", "wiki.local", "-y", "import", str(path)]
+            ImportApp(get_default_arguments(argv)).run()
+
+            with open_page_store(tmpdir, "wiki.local") as store:
+                self.assertListEqual(
+                    ["Home", "Main_Page", "Template:Box/Doc"],
+                    store.filenames(),
+                )
+                meta, text = store.get_page("Main_Page")
+                self.assertEqual("Hello '''", text)
+                self.assertEqual(11, meta.revision)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+
+from typing import Dict, List
+from unittest import TestCase, main
+
+from mwfilter.mw.expander import TemplateExpander, UnsupportedExpansion
+
+SOURCES: Dict[str, str] = {
+    "Template:Hello": "Hello, {{{1|World}}}!",
+    "Template:Named": "{{{name}}}={{{value|none}}}",
+    "Template:Doc": "<noinclude>Doc</noinclude>Body<includeonly>!</includeonly>",
+    "Template:Only": "A<onlyinclude>B</onlyinclude>C<onlyinclude>D</onlyinclude>",
+    "Template:Kind": "{{#switch:{{{1}}}|a|b=AB|c=C|#default=Other}}",
+    "Template:Nested": "[{{Hello|{{{1}}}}}]",
+    "Template:List": "* {{{1}}}",
+    "Template:Loop": "{{Loop}}",
+    "Template:Year": "{{CURRENTYEAR}}",
+    "Template:Expr": "{{#expr: 1 + 1}}",
+    "Template:Where": "{{NAMESPACE}}|{{NAMESPACENUMBER}}|{{PAGENAME}}",
+    "Template:Old": "#REDIRECT [[Template:Hello]]",
+    "Template:Older": "#redirect [[Template:Old#Usage]]",
+    "Template:Ping": "#REDIRECT [[Template:Pong]]",
+    "Template:Pong": "#REDIRECT [[Template:Ping]]",
+    "Template:Away": "#REDIRECT [[Help:Hello]]",
+}
+
+
+class _Loader:
+    def __init__(self, sources: Dict[str, str]):
+        self.sources = sources
+        self.requests: List[str] = list()
+
+    def __call__(self, title: str):
+        self.requests.append(title)
+        return self.sources.get(title)
+
+
+class ExpanderTestCase(TestCase):
+    def setUp(self):
+        self.loader = _Loader(SOURCES)
+        self.expander = TemplateExpander(self.loader, "Wiki")
+
+    def expand(self, text: str, title="Main/Sub") -> str:
+        return self.expander.expand(text, title)
+
+    def test_parameters(self):
+        self.assertEqual("Hello, World!", self.expand("{{Hello}}"))
+        self.assertEqual("Hello,  You !", self.expand("{{hello| You }}"))
+        self.assertEqual("Hello, A=B!", self.expand("{{Hello|1= A=B }}"))
+        self.assertEqual("x=none", self.expand("{{Named|name = x}}"))
+        self.assertEqual("[Hello, X!]", self.expand("{{Template:Nested|X}}"))
+        self.assertEqual("a\n* b", self.expand("a{{List|b}}"))
+
+    def test_sources_are_cached(self):
+        self.expand("{{Hello}}{{Hello|a}}{{Nested|b}}")
+        self.assertListEqual(
+            ["Template:Hello", "Template:Nested"],
+            sorted(set(self.loader.requests)),
+        )
+        self.assertEqual(2, len(self.loader.requests))
+
+    def test_include_tags(self):
+        self.assertEqual("Body!", self.expand("{{Doc}}"))
+        self.assertEqual("BD", self.expand("{{Only}}"))
+        self.assertEqual(
+            "ab", self.expand("a<includeonly>x</includeonly><noinclude>b</noinclude>")
+        )
+
+    def test_parser_functions(self):
+        self.assertEqual("yes", self.expand("{{#if: x | yes | no }}"))
+        self.assertEqual("no", self.expand("{{#if: {{{1|}}} | yes | no }}"))
+        self.assertEqual("eq", self.expand("{{#ifeq: 01 | 1.0 | eq | ne }}"))
+        self.assertEqual("ne", self.expand("{{#ifeq: a | b | eq | ne }}"))
+        self.assertEqual("eq", self.expand("{{#ifeq: -.5 | -5e-1 | eq | ne }}"))
+        for left, right in (("1_0", "10"), ("inf", "infinity"), ("nan", "NaN")):
+            with self.subTest(left=left, right=right):
+                text = f"{{{{#ifeq: {left} | {right} | eq | ne }}}}"
+                self.assertEqual("ne", self.expand(text))
+        self.assertEqual("AB", self.expand("{{Kind|a}}"))
+        self.assertEqual("C", self.expand("{{Kind|c}}"))
+        self.assertEqual("Other", self.expand("{{Kind|z}}"))
+
+    def test_magic_words(self):
+        self.assertEqual(
+            "Main/Sub|Main|Sub",
+            self.expand("{{FULLPAGENAME}}{{!}}{{BASEPAGENAME}}{{!}}{{SUBPAGENAME}}"),
+        )
+        self.assertEqual("Wiki", self.expand("{{SITENAME}}"))
+        self.assertEqual("HELLO", self.expand("{{uc:hello}}"))
+
+    def test_namespaces(self):
+        # A colon in a main namespace title is not a namespace prefix.
+        self.assertEqual("|0|Note: A", self.expand("{{Where}}", "Note: A"))
+        self.assertEqual(
+            "Help|12|Note: A",
+            self.expander.expand("{{Where}}", "Note: A", 12),
+        )
+
+        namespaces = {0: str(), 10: "Vorlage", 12: "Hilfe"}
+        expander = TemplateExpander(self.loader, "Wiki", namespaces)
+        self.assertEqual(
+            "Hilfe:Seite|Hilfe|12|Seite",
+            expander.expand("{{FULLPAGENAME}}{{!}}{{Vorlage:Where}}", "Seite", 12),
+        )
+        with self.assertRaises(UnsupportedExpansion):
+            expander.expand("{{NAMESPACE}}", "Seite", 4)
+
+    def test_redirects(self):
+        self.assertEqual("a Hello, x! b", self.expand("a {{Old|x}} b"))
+
+        # Chains, loops and targets outside the template namespace are left to
+        # the server; The result is cached like any other template.
+        for text in ("{{Older}}", "{{Ping}}", "{{Away}}"):
+            with self.subTest(text=text):
+                with self.assertRaises(UnsupportedExpansion):
+                    self.expand(text)
+        requests = len(self.loader.requests)
+        with self.assertRaises(UnsupportedExpansion):
+            self.expand("{{Ping}}")
+        self.assertEqual(requests, len(self.loader.requests))
+
+    def test_links_and_verbatim(self):
+        text = "{{#if: x | [[Page|label]] }}<nowiki>{{Hello}}</nowiki>"
+        self.assertEqual("[[Page|label]]<nowiki>{{Hello}}</nowiki>", self.expand(text))
+        self.assertEqual("{{{1}}}", self.expand("{{{1}}}"))
+
+    def test_unsupported(self):
+        for text in ("{{Loop}}", "{{Missing}}", "{{Expr}}", "{{Year}}", "{{:Page}}"):
+            with self.subTest(text=text):
+                with self.assertRaises(UnsupportedExpansion):
+                    self.expand(text)
+
+
+if __name__ == "__main__":
+    main()
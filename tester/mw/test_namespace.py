@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+
+from unittest import TestCase, main
+
+from mwfilter.mw.namespace import (
+    create_default_namespaces,
+    listable_namespaces,
+    parse_namespaces,
+)
+
+
+class NamespaceTestCase(TestCase):
+    def test_parse_namespaces(self):
+        self.assertListEqual([0], parse_namespaces("0"))
+        self.assertListEqual([0, 6, 10], parse_namespaces("0, 6,10,6"))
+        self.assertIsNone(parse_namespaces("all"))
+        self.assertIsNone(parse_namespaces(" ALL "))
+        with self.assertRaises(ValueError):
+            parse_namespaces("0,File")
+
+    def test_listable_namespaces(self):
+        namespaces = listable_namespaces(create_default_namespaces().keys())
+        self.assertListEqual(list(range(16)), namespaces)
+        self.assertListEqual([0, 3000], listable_namespaces([3000, -1, 0]))
+
+
+if __name__ == "__main__":
+    main()
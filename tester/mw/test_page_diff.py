@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+
+from datetime import datetime
+from unittest import TestCase, main
+
+from mwfilter.mw.page_diff import is_unchanged, vanished_filenames
+from mwfilter.mw.page_meta import PageMeta
+
+TOUCHED = datetime(2024, 1, 1)
+
+
+class PageDiffTestCase(TestCase):
+    def test_is_unchanged(self):
+        cached = PageMeta(name="Alpha", revision=10, touched=TOUCHED)
+        self.assertTrue(is_unchanged(cached, PageMeta(revision=10, touched=TOUCHED)))
+        self.assertFalse(is_unchanged(cached, PageMeta(revision=11, touched=TOUCHED)))
+
+        # A template edit re-renders the page without a new revision.
+        retouched = PageMeta(revision=10, touched=datetime(2024, 2, 1))
+        self.assertFalse(is_unchanged(cached, retouched))
+
+    def test_is_unchanged_as_written(self):
+        imported = PageMeta(revision=10, touched=TOUCHED, templates_expanded=False)
+        listed = PageMeta(revision=10, touched=datetime(2024, 2, 1))
+
+        # The text of an imported page is refetched to expand its templates,
+        # but never just because its 'touched' time is the revision timestamp.
+        self.assertFalse(is_unchanged(imported, listed))
+        self.assertTrue(is_unchanged(imported, listed, expanded=False))
+        self.assertFalse(is_unchanged(imported, PageMeta(revision=11), False))
+
+        expanded = PageMeta(revision=10, touched=datetime(2024, 2, 1))
+        self.assertFalse(is_unchanged(expanded, listed, expanded=False))
+
+    def test_vanished_filenames(self):
+        cached = [
+            PageMeta(name="Beta", page_title="Beta"),
+            PageMeta(name="Alpha Page", page_title="Alpha Page"),
+            PageMeta(name="Help:Gamma", page_title="Gamma", namespace=12),
+        ]
+        self.assertListEqual(
+            ["Alpha_Page", "Beta"],
+            vanished_filenames(cached, 0, set()),
+        )
+        self.assertListEqual(["Beta"], vanished_filenames(cached, 0, {"Alpha_Page"}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from threading import Thread
+from unittest import TestCase, main
+from urllib.parse import parse_qsl, urlsplit
+
+from requests.exceptions import ConnectionError
+
+from mwfilter.mw.replay import REDACTED_VALUE, Cassette, CassetteEntry
+from mwfilter.mw.site import HttpOptions, create_site
+
+SITEINFO = {
+    "query": {
+        "general": {"generator": "MediaWiki 1.39.0", "sitename": "Local"},
+        "namespaces": {"0": {"id": 0, "*": ""}},
+        "userinfo": {"id": 0, "name": "127.0.0.1", "groups": ["*"], "rights": []},
+    }
+}
+
+LOGIN_TOKEN = "0123456789abcdef+\\"
+SESSION_COOKIE = "session=fedcba9876543210"
+
+ALLPAGES = {
+    "batchcomplete": "",
+    "query": {
+        "pages": {
+            "1": {"pageid": 1, "ns": 0, "title": "Alpha", "lastrevid": 10},
+            "2": {"pageid": 2, "ns": 0, "title": "Beta", "lastrevid": 20},
+        }
+    },
+}
+
+
+class _ApiHandler(BaseHTTPRequestHandler):
+    def _respond(self, params):
+        if "siteinfo" in params.get("meta", str()):
+            obj = SITEINFO
+        elif params.get("meta") == "tokens":
+            obj = {"query": {"tokens": {"logintoken": LOGIN_TOKEN}}}
+        elif params.get("action") == "login":
+            obj = {"login": {"result": "Success", "lgusername": "user"}}
+        elif params.get("generator") == "allpages":
+            obj = ALLPAGES
+        elif "userinfo" in params.get("meta", str()):
+            obj = {"query": {"userinfo": SITEINFO["query"]["userinfo"]}}
+        else:
+            obj = {"error": {"code": "unknown", "info": "unknown"}}
+        body = json.dumps(obj).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        if params.get("action") == "login":
+            self.send_header("Set-Cookie", SESSION_COOKIE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):  # noqa
+        self._respond(dict(parse_qsl(urlsplit(self.path).query)))
+
+    def do_POST(self):  # noqa
+        length = int(self.headers.get("Content-Length", 0))
+        self._respond(dict(parse_qsl(self.rfile.read(length).decode())))
+
+    def log_message(self, *args):
+        pass
+
+
+class ReplayTestCase(TestCase):
+    def setUp(self):
+        self.tmpdir = TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_entry_round_trip(self):
+        cassette = Cassette(self.tmpdir.name)
+        url = "https://wiki.local/images/a.png"
+        entry = CassetteEntry("get", url, [("a", "1")], 200, {}, b"\x00\xff")
+        path = cassette.save(entry)
+        self.assertNotIn("text", json.loads(path.read_text()))
+
+        loaded = cassette.load(entry.key)
+        assert loaded is not None
+        self.assertEqual("GET", loaded.method)
+        self.assertEqual(b"\x00\xff", loaded.content)
+
+    def test_record_and_replay(self):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _ApiHandler)
+        thread = Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        host = f"127.0.0.1:{server.server_address[1]}"
+        try:
+            options = HttpOptions(retries=0, record_dir=self.tmpdir.name)
+            site = create_site(host, "/w/", options=options, scheme="http")
+            titles = [page.name for page in site.allpages(namespace=0)]
+            self.assertListEqual(["Alpha", "Beta"], titles)
+            site.connection.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+
+        options = HttpOptions(replay_dir=self.tmpdir.name, replay_latency=0.001)
+        site = create_site(host, "/w/", options=options, scheme="http")
+        self.assertEqual("Local", site.site["sitename"])
+        titles = [page.name for page in site.allpages(namespace=0)]
+        self.assertListEqual(["Alpha", "Beta"], titles)
+
+        adapter = site.connection.get_adapter(f"http://{host}/w/api.php")
+        self.assertEqual(2, adapter.hits)
+        self.assertEqual(0, adapter.misses)
+
+        with self.assertRaises(ConnectionError):
+            site.api("query", meta="siteinfo", siprop="statistics")
+        self.assertEqual(1, adapter.misses)
+
+    def test_record_login(self):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _ApiHandler)
+        thread = Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        host = f"127.0.0.1:{server.server_address[1]}"
+        auth = "user", "password1234"
+        try:
+            options = HttpOptions(retries=0, record_dir=self.tmpdir.name)
+            site = create_site(host, "/w/", auth, options=options, scheme="http")
+            self.assertIn("session", site.connection.cookies)
+            site.connection.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+
+        paths = list(Path(self.tmpdir.name).rglob("*.json"))
+        self.assertLess(0, len(paths))
+        for path in paths:
+            text = path.read_text()
+            self.assertNotIn("0123456789abcdef", text)
+            self.assertNotIn("fedcba9876543210", text)
+            self.assertNotIn("password1234", text)
+            headers = json.loads(text)["headers"]
+            self.assertNotIn("set-cookie", {k.lower() for k in headers})
+
+        token = {"query": {"tokens": {"logintoken": REDACTED_VALUE}}}
+        bodies = [json.loads(json.loads(p.read_text())["text"]) for p in paths]
+        self.assertIn(token, bodies)
+
+        # The redacted token is still enough for the replayed login.
+        options = HttpOptions(replay_dir=self.tmpdir.name)
+        site = create_site(host, "/w/", auth, options=options, scheme="http")
+        self.assertTrue(site.initialized)
+
+
+if __name__ == "__main__":
+    main()
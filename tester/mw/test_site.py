@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+
+from unittest import TestCase, main
+
+from mwclient.errors import MaximumRetriesExceeded
+from requests.adapters import HTTPAdapter
+
+from mwfilter.mw.site import (
+    RETRY_STATUS_CODES,
+    HttpOptions,
+    LagSleepers,
+    RateLimitedSession,
+    create_session,
+    grow_pool,
+    site_key,
+)
+
+
+class SiteTestCase(TestCase):
+    def test_create_session(self):
+        session = create_session(8, HttpOptions(retries=3, backoff=0.1))
+        try:
+            adapter = session.get_adapter("https://wiki.local/w/api.php")
+            self.assertIsInstance(adapter, HTTPAdapter)
+            self.assertEqual(8, adapter._pool_maxsize)  # noqa
+            self.assertEqual(3, adapter.max_retries.total)
+            self.assertEqual(0.1, adapter.max_retries.backoff_factor)
+            self.assertIn("POST", adapter.max_retries.allowed_methods)
+            for code in RETRY_STATUS_CODES:
+                self.assertIn(code, adapter.max_retries.status_forcelist)
+            self.assertIs(adapter, session.get_adapter("http://wiki.local/"))
+
+            self.assertEqual("gzip, deflate", session.headers["Accept-Encoding"])
+            self.assertEqual("keep-alive", session.headers["Connection"])
+            self.assertTrue(session.headers["User-Agent"].startswith("mwfilter/"))
+        finally:
+            session.close()
+
+    def test_create_rate_limited_session(self):
+        session = create_session(options=HttpOptions(rate_limit=10.0))
+        try:
+            self.assertIsInstance(session, RateLimitedSession)
+            assert isinstance(session, RateLimitedSession)
+            self.assertAlmostEqual(0.1, session.limiter.interval)
+        finally:
+            session.close()
+
+        session = create_session(options=HttpOptions(rate_limit=10.0, replay_dir="x"))
+        try:
+            self.assertNotIsInstance(session, RateLimitedSession)
+        finally:
+            session.close()
+
+    def test_site_key(self):
+        key0 = site_key("wiki.local", "/w/")
+        key1 = site_key("wiki.local", "/w/", ("user", "secret"))
+        key2 = site_key("wiki.local", "/w/", options=HttpOptions(retries=9))
+        self.assertEqual(("wiki.local", "/w/", None, HttpOptions()), key0)
+        self.assertEqual(("wiki.local", "/w/", "user", HttpOptions()), key1)
+        self.assertEqual(key0, site_key("wiki.local", "/w/", None, HttpOptions()))
+        self.assertNotEqual(key0, key2)
+        self.assertEqual(1, len({key0, site_key("wiki.local", "/w/")}))
+
+    def test_grow_pool(self):
+        session = create_session(pool_size=2)
+        try:
+            adapter = session.get_adapter("https://wiki.local/")
+            assert isinstance(adapter, HTTPAdapter)
+            grow_pool(session, 8)
+            self.assertEqual(8, adapter.poolmanager.connection_pool_kw["maxsize"])
+
+            # A smaller pool size never shrinks the shared pool.
+            grow_pool(session, 1)
+            self.assertEqual(8, adapter.poolmanager.connection_pool_kw["maxsize"])
+            self.assertIs(adapter, session.get_adapter("http://wiki.local/"))
+        finally:
+            session.close()
+
+    def test_lag_sleeper(self):
+        callbacks = list()
+        sleepers = LagSleepers(2, 0.0, lambda *x: callbacks.append(x[1]))
+
+        # Errors already retried by the session adapter are not retried again.
+        with self.assertRaises(MaximumRetriesExceeded):
+            sleepers.make().sleep()
+        self.assertListEqual([], callbacks)
+
+        # 'maxlag' waits are retried up to the maximum number of retries.
+        sleeper = sleepers.make()
+        sleeper.sleep(0.001)
+        sleeper.sleep(0.001)
+        with self.assertRaises(MaximumRetriesExceeded):
+            sleeper.sleep(0.001)
+        self.assertListEqual([1, 2], callbacks)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main
+
+from mwclient import Site
+
+from mwfilter.mw.site import HttpOptions, create_site, load_site_cache
+from mwfilter.mw.site_cache import SITE_CACHE_VERSION, SiteCache
+from tester.apps.fake_wiki import SESSION_COOKIE, FakeWiki
+
+
+def create_initialized_site() -> Site:
+    site = Site("wiki.local", do_init=False)
+    site.site = {"generator": "MediaWiki 1.39.0", "sitename": "Local"}
+    site.namespaces = {0: "", 10: "Template"}
+    site.username = "User"
+    site.groups = ["*", "user"]
+    site.rights = ["read"]
+    site.initialized = True
+    site.connection.cookies.set("wiki_session", "abc", domain="wiki.local")
+    return site
+
+
+class SiteCacheTestCase(TestCase):
+    def setUp(self):
+        self.tmpdir = TemporaryDirectory()
+        self.path = Path(self.tmpdir.name) / "site.json"
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_round_trip(self):
+        SiteCache.from_site(create_initialized_site(), "/w/", "User").save(self.path)
+        self.assertEqual(0o600, os.stat(self.path).st_mode & 0o777)
+
+        cache = SiteCache.load(self.path)
+        self.assertIsInstance(cache, SiteCache)
+        site = Site("wiki.local", do_init=False)
+        cache.apply(site)
+        self.assertTrue(site.initialized)
+        self.assertEqual((1, 39, 0), site.version)
+        self.assertEqual("Template", site.namespaces[10])
+        self.assertListEqual(["read"], site.rights)
+        self.assertEqual("abc", site.connection.cookies.get("wiki_session"))
+
+    def test_corrupt(self):
+        SiteCache.from_site(create_initialized_site(), "/w/", None).save(self.path)
+        valid = json.loads(self.path.read_text())
+        self.assertEqual(SITE_CACHE_VERSION, valid["version"])
+
+        options = HttpOptions(site_cache_path=str(self.path), site_cache_ttl=60)
+        corrupt = [
+            "{",
+            "[]",
+            json.dumps(dict(valid, version=SITE_CACHE_VERSION + 1)),
+            json.dumps({k: v for k, v in valid.items() if k != "version"}),
+            json.dumps(dict(valid, cookies="wiki_session=abc")),
+            json.dumps(dict(valid, saved_at="yesterday")),
+            json.dumps(dict(valid, general={"sitename": "Local"})),
+            json.dumps(dict(valid, general={"generator": "Unknown 1.0"})),
+            json.dumps(dict(valid, namespaces={"Template": "10"})),
+        ]
+        for text in corrupt:
+            with self.subTest(text=text):
+                self.path.write_text(text)
+                self.assertIsNone(SiteCache.load(self.path))
+                self.assertIsNone(load_site_cache(options, "/w/"))
+
+    def test_is_valid(self):
+        cache = SiteCache.from_site(create_initialized_site(), "/w/", "User")
+        now = cache.saved_at
+        self.assertTrue(cache.is_valid("/w/", "User", 60, now + 30))
+        self.assertFalse(cache.is_valid("/w/", "User", 60, now + 60))
+        self.assertFalse(cache.is_valid("/", "User", 60, now))
+        self.assertFalse(cache.is_valid("/w/", None, 60, now))
+
+        cache.cookies[0].expires = int(now) + 10
+        self.assertTrue(cache.is_valid("/w/", "User", 60, now))
+        self.assertFalse(cache.is_valid("/w/", "User", 60, now + 30))
+
+    def test_load_site_cache(self):
+        options = HttpOptions(site_cache_path=str(self.path), site_cache_ttl=60)
+        self.assertIsNone(load_site_cache(options, "/w/"))
+
+        SiteCache.from_site(create_initialized_site(), "/w/", None).save(self.path)
+        self.assertIsNotNone(load_site_cache(options, "/w/"))
+        self.assertIsNone(load_site_cache(options, "/w/", "User"))
+        self.assertIsNone(load_site_cache(HttpOptions(), "/w/"))
+
+    def test_ended_session(self):
+        auth = "User", "secret"
+        options = HttpOptions(
+            retries=0,
+            site_cache_path=str(self.path),
+            site_cache_ttl=60,
+        )
+        with FakeWiki(dict()) as wiki:
+
+            def _create_site() -> Site:
+                return create_site(
+                    wiki.host, "/w/", auth, options=options, scheme="http"
+                )
+
+            self.assertEqual("User", _create_site().username)
+            self.assertEqual(1, wiki.logins)
+
+            # A warm start only checks that the cached session is still alive.
+            self.assertEqual("User", _create_site().username)
+            self.assertEqual(1, wiki.logins)
+
+            # The server ended the session, so the user logs in again.
+            wiki.sessions.clear()
+            site = _create_site()
+            self.assertEqual(2, wiki.logins)
+            self.assertEqual("User", site.username)
+            self.assertEqual("session2", site.connection.cookies.get(SESSION_COOKIE))
+
+            cache = SiteCache.load(self.path)
+            assert cache is not None
+            self.assertListEqual(["session2"], [c.value for c in cache.cookies])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Any, Dict, List
+from unittest import TestCase, main
+
+from mwfilter.mw.template_index import TemplateIndex
+from mwfilter.mw.templates import request_revisions, request_templates
+
+
+class _FakeSite:
+    def __init__(self, responses: List[Dict[str, Any]]):
+        self.responses = responses
+        self.requests: List[Dict[str, Any]] = list()
+
+    def get(self, action: str, **kwargs):
+        assert action == "query"
+        self.requests.append(kwargs)
+        return self.responses.pop(0)
+
+
+class TemplateIndexTestCase(TestCase):
+    def test_affected_pages(self):
+        index = TemplateIndex()
+        index.update("A", {"Template:Box": 1, "Template:Nav": 5})
+        index.update("B", {"Template:Box": 1})
+        index.update("C", {"Template:Box": 2})
+        self.assertListEqual(["Template:Box", "Template:Nav"], index.templates)
+        self.assertListEqual(["A", "B", "C"], index.dependents("Template:Box"))
+
+        current = {"Template:Box": 2, "Template:Nav": 5}
+        self.assertSetEqual({"A", "B"}, index.affected_pages(current))
+
+        # A refetched page no longer uses the template
+        index.update("A", {"Template:Nav": 5})
+        index.update("B", {"Template:Box": 2})
+        self.assertSetEqual(set(), index.affected_pages(current))
+        self.assertListEqual(["B", "C"], index.dependents("Template:Box"))
+
+        index.remove("A")
+        self.assertListEqual(["Template:Box"], index.templates)
+        self.assertListEqual(list(), index.templates_of("A"))
+
+    def test_save_load(self):
+        with TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "templates.json"
+            self.assertListEqual(list(), TemplateIndex.load(path).templates)
+
+            index = TemplateIndex()
+            index.update("A", {"Template:Box": 1})
+            index.save(path)
+            loaded = TemplateIndex.load(path)
+            self.assertListEqual(["Template:Box"], loaded.templates_of("A"))
+            self.assertSetEqual({"A"}, loaded.affected_pages({"Template:Box": 3}))
+
+            path.write_text("{")
+            self.assertListEqual(list(), TemplateIndex.load(path).templates)
+
+    def test_request_templates(self):
+        site = _FakeSite(
+            [
+                {
+                    "continue": {"tlcontinue": "1|10|Nav", "continue": "||"},
+                    "query": {
+                        "pages": {
+                            "1": {
+                                "title": "A",
+                                "templates": [{"ns": 10, "title": "Template:Box"}],
+                            },
+                            "2": {"title": "B"},
+                        }
+                    },
+                },
+                {
+                    "query": {
+                        "pages": {
+                            "1": {
+                                "title": "A",
+                                "templates": [{"ns": 10, "title": "Template:Nav"}],
+                            },
+                        }
+                    },
+                },
+            ]
+        )
+        result = request_templates(site, ["A", "B"])
+        self.assertDictEqual({"A": ["Template:Box", "Template:Nav"], "B": []}, result)
+        self.assertEqual("A|B", site.requests[0]["titles"])
+        self.assertEqual("1|10|Nav", site.requests[1]["tlcontinue"])
+
+    def test_request_revisions(self):
+        pages = {
+            "1": {"title": "Template:Box", "lastrevid": 7},
+            "-1": {"title": "Template:Missing", "missing": ""},
+        }
+        site = _FakeSite([{"query": {"pages": pages}}])
+        titles = ["Template:Box", "Template:Missing"]
+        result = request_revisions(site, titles)
+        self.assertDictEqual({"Template:Box": 7, "Template:Missing": 0}, result)
+
+
+if __name__ == "__main__":
+    main()
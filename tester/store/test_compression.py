@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main, skipUnless
+
+from mwfilter.mw.page_meta import PageMeta
+from mwfilter.store.compression import (
+    compress,
+    decode_text,
+    detect_compression,
+    encode_text,
+    zstd_available,
+)
+from mwfilter.store.file_store import FilePageStore
+from mwfilter.store.sqlite_store import SqlitePageStore
+
+TEXT = "== 문서 ==\n" + "Some '''wiki''' text. " * 100
+
+
+class CompressionTestCase(TestCase):
+    def test_gzip(self):
+        data = encode_text(TEXT, "gzip")
+        self.assertEqual("gzip", detect_compression(data))
+        self.assertLess(len(data), len(TEXT.encode()))
+        self.assertEqual(data, encode_text(TEXT, "gzip"))
+        self.assertEqual(TEXT, decode_text(data))
+
+    def test_none(self):
+        data = encode_text(TEXT)
+        self.assertEqual("none", detect_compression(data))
+        self.assertEqual(TEXT, decode_text(data))
+
+    @skipUnless(zstd_available(), "The 'zstandard' package is not installed")
+    def test_zstd(self):
+        data = encode_text(TEXT, "zstd")
+        self.assertEqual("zstd", detect_compression(data))
+        self.assertEqual(TEXT, decode_text(data))
+
+    def test_unsupported(self):
+        with self.assertRaises(ValueError):
+            compress(b"", "lzma")
+
+
+class CompressedStoreTestCase(TestCase):
+    def setUp(self):
+        self.tmpdir = TemporaryDirectory()
+        self.root = Path(self.tmpdir.name)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_file_store(self):
+        meta = PageMeta(name="Page", page_title="Page")
+        FilePageStore(self.root).put(meta, "plain")
+        self.assertTrue((self.root / "Page.wiki").is_file())
+
+        store = FilePageStore(self.root, "gzip")
+        store.put(meta, TEXT)
+        self.assertFalse((self.root / "Page.wiki").exists())
+        self.assertTrue((self.root / "Page.wiki.gz").is_file())
+        self.assertIsNone(store.text_path("Page"))
+
+        # Reading does not depend on the compression of the store.
+        self.assertEqual(TEXT, FilePageStore(self.root).get_text("Page"))
+        self.assertTrue(FilePageStore(self.root).delete("Page"))
+        self.assertListEqual([], list(self.root.iterdir()))
+
+    def test_sqlite_store(self):
+        db_path = self.root / "pages.sqlite3"
+        with SqlitePageStore(db_path, "gzip") as store:
+            store.put(PageMeta(name="Page", page_title="Page"), TEXT)
+            self.assertEqual(TEXT, store.get_text("Page"))
+        with SqlitePageStore(db_path) as store:
+            self.assertEqual(TEXT, store.get_page("Page")[1])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+
+import json
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main
+
+from mwfilter.mw.page_meta import PageMeta
+from mwfilter.store import open_page_store
+from mwfilter.store.file_store import FilePageStore
+
+
+class FilePageStoreTestCase(TestCase):
+    def setUp(self):
+        self.tmpdir = TemporaryDirectory()
+        self.pages_dir = Path(self.tmpdir.name) / "wiki.local" / "pages"
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_layout(self):
+        store = open_page_store(self.tmpdir.name, "wiki.local", "file")
+        self.assertIsInstance(store, FilePageStore)
+
+        meta = PageMeta(name="Sub/Child Page", page_title="Sub/Child Page")
+        store.put(meta, "Text")
+
+        # [IMPORTANT] The cache layout of older versions must stay readable.
+        json_path = self.pages_dir / "Sub" / "Child_Page.json"
+        wiki_path = self.pages_dir / "Sub" / "Child_Page.wiki"
+        self.assertEqual("Sub/Child Page", json.loads(json_path.read_text())["name"])
+        self.assertEqual("Text", wiki_path.read_text())
+        self.assertEqual(str(wiki_path), store.text_path("Sub/Child_Page"))
+
+    def test_bulk(self):
+        store = FilePageStore(self.pages_dir)
+        self.assertListEqual([], store.filenames())
+
+        pages = [
+            (PageMeta(name="Beta", page_title="Beta", revision=2), "B"),
+            (PageMeta(name="Alpha", page_title="Alpha", revision=1), "A"),
+            (PageMeta(name="A/B", page_title="A/B", revision=3), "AB"),
+        ]
+        self.assertEqual(3, store.put_many(pages))
+        self.assertListEqual(["A/B", "Alpha", "Beta"], store.filenames())
+        self.assertListEqual([3, 1, 2], [m.revision for m in store.iter_metas()])
+
+        selected = list(store.iter_pages(["Beta", "A/B"]))
+        self.assertListEqual(["B", "AB"], [text for _, text in selected])
+
+        meta, text = store.get_page("Alpha")
+        self.assertEqual(("Alpha", "A"), (meta.name, text))
+
+        self.assertTrue(store.delete("Alpha"))
+        self.assertFalse(store.delete("Alpha"))
+        self.assertFalse(store.exists("Alpha"))
+        with self.assertRaises(FileNotFoundError):
+            store.get_page("Alpha")
+
+
+if __name__ == "__main__":
+    main()
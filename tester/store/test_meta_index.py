@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main
+
+from mwfilter.mw.page_meta import PageMeta
+from mwfilter.store.file_store import FilePageStore
+from mwfilter.store.meta_index import MetaIndex
+
+
+class MetaIndexTestCase(TestCase):
+    def setUp(self):
+        self.tmpdir = TemporaryDirectory()
+        self.root = Path(self.tmpdir.name)
+        self.index_path = self.root / "pages.jsonl"
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_missing(self):
+        index = MetaIndex(self.index_path)
+        self.assertIsNone(index.load())
+        index.put(PageMeta(name="Alpha"))
+        self.assertFalse(self.index_path.exists())
+
+    def test_append_and_compact(self):
+        index = MetaIndex(self.index_path)
+        index.rewrite([PageMeta(name="Alpha"), PageMeta(name="Beta")])
+        index.put(PageMeta(name="Gamma", revision=1))
+        index.put(PageMeta(name="Alpha", revision=2))
+        index.remove("Beta")
+
+        metas = MetaIndex(self.index_path).load()
+        assert metas is not None
+        self.assertListEqual(["Alpha", "Gamma"], sorted(metas))
+        self.assertEqual(2, metas["Alpha"].revision)
+
+        for revision in range(10):
+            index.put(PageMeta(name="Gamma", revision=revision))
+        lines = self.index_path.read_text().splitlines()
+        self.assertLess(len(lines), 10)
+
+        metas = MetaIndex(self.index_path).load()
+        assert metas is not None
+        self.assertEqual(9, metas["Gamma"].revision)
+
+    def test_interrupted_append(self):
+        index = MetaIndex(self.index_path)
+        index.rewrite([PageMeta(name="Alpha")])
+        with self.index_path.open("at") as f:
+            f.write('{"filename":"Be')
+        self.assertIsNone(MetaIndex(self.index_path).load())
+
+    def test_file_store(self):
+        pages_dir = self.root / "pages"
+        store = FilePageStore(pages_dir, index_path=self.index_path)
+        store.put_many(
+            [
+                (PageMeta(name="Beta", revision=2), "B"),
+                (PageMeta(name="Alpha", revision=1), "A"),
+            ]
+        )
+        self.assertListEqual(["Alpha", "Beta"], store.filenames())
+        self.assertTrue(self.index_path.is_file())
+
+        # Pages cached before the index existed are found by a single walk.
+        self.index_path.unlink()
+        store = FilePageStore(pages_dir, index_path=self.index_path)
+        self.assertListEqual([1, 2], [m.revision for m in store.iter_metas()])
+        self.assertTrue(self.index_path.is_file())
+
+        store.delete("Alpha")
+        store = FilePageStore(pages_dir, index_path=self.index_path)
+        self.assertListEqual(["Beta"], store.filenames())
+
+    def test_file_store_stale(self):
+        pages_dir = self.root / "pages"
+        store = FilePageStore(pages_dir, index_path=self.index_path)
+        store.put(PageMeta(name="Alpha", revision=1), "A")
+        store.put(PageMeta(name="Beta", revision=2), "B")
+
+        # A page deleted behind the back of the index is not listed.
+        store.meta_path("Alpha").unlink()
+        store.wiki_path("Alpha").unlink()
+        store = FilePageStore(pages_dir, index_path=self.index_path)
+        self.assertListEqual(["Beta"], store.filenames())
+        self.assertListEqual([2], [m.revision for m in store.iter_metas()])
+
+        # A page added behind the back of the index is listed.
+        other = FilePageStore(pages_dir)
+        other.put(PageMeta(name="Gamma", revision=3), "C")
+        store = FilePageStore(pages_dir, index_path=self.index_path)
+        self.assertListEqual(["Beta", "Gamma"], store.filenames())
+        metas = MetaIndex(self.index_path).load()
+        assert metas is not None
+        self.assertListEqual(["Beta", "Gamma"], sorted(metas))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+
+import sqlite3
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main
+
+from mwfilter.mw.page_meta import PageMeta
+from mwfilter.store.sqlite_store import SqlitePageStore
+
+
+class SqlitePageStoreTestCase(TestCase):
+    def setUp(self):
+        self.tmpdir = TemporaryDirectory()
+        self.db_path = Path(self.tmpdir.name) / "wiki.local" / "pages.sqlite3"
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_put_and_get(self):
+        meta = PageMeta(namespace=0, name="Sub/Child", page_title="Sub/Child")
+        meta.revision = 7
+        meta.authors = ["alice"]
+
+        with SqlitePageStore(self.db_path) as store:
+            self.assertFalse(store.exists("Sub/Child"))
+            store.put(meta, "== 문서 ==\nText")
+            store.put(PageMeta(name="Alpha", page_title="Alpha"), "Alpha")
+
+            self.assertTrue(store.exists("Sub/Child"))
+            self.assertListEqual(["Alpha", "Sub/Child"], store.filenames())
+            self.assertEqual("== 문서 ==\nText", store.get_text("Sub/Child"))
+            self.assertIsNone(store.text_path("Sub/Child"))
+
+            loaded = store.get_meta("Sub/Child")
+            self.assertEqual(7, loaded.revision)
+            self.assertListEqual(["alice"], loaded.authors)
+            self.assertListEqual(
+                ["Alpha", "Sub/Child"],
+                [m.name for m in store.iter_metas()],
+            )
+
+            meta.revision = 8
+            store.put(meta, "Updated")
+            self.assertEqual("Updated", store.get_text("Sub/Child"))
+            self.assertEqual(8, store.get_meta("Sub/Child").revision)
+
+            with self.assertRaises(FileNotFoundError):
+                store.get_text("Missing")
+
+    def test_bulk(self):
+        pages = [
+            (PageMeta(name=f"Page_{i:04}", page_title=f"Page_{i:04}"), str(i))
+            for i in range(1200)
+        ]
+        with SqlitePageStore(self.db_path) as store:
+            self.assertEqual(1200, store.put_many(pages))
+            texts = [text for _, text in store.iter_pages()]
+            self.assertListEqual([str(i) for i in range(1200)], texts)
+
+            selected = store.iter_pages(["Page_0010", "Page_0002"])
+            self.assertListEqual(["10", "2"], [text for _, text in selected])
+            with self.assertRaises(FileNotFoundError):
+                list(store.iter_pages(["Page_0001", "Missing"]))
+
+            self.assertTrue(store.delete("Page_0000"))
+            self.assertFalse(store.delete("Page_0000"))
+            self.assertEqual(1199, len(store.filenames()))
+
+    def test_indexes(self):
+        SqlitePageStore(self.db_path).close()
+        with sqlite3.connect(self.db_path) as conn:
+            rows = conn.execute("SELECT name FROM sqlite_master WHERE type='index'")
+            names = {row[0] for row in rows}
+        conn.close()
+        for name in ("pages_title", "pages_namespace", "pages_revision"):
+            self.assertIn(name, names)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+
+import os
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main, skipIf
+
+from mwfilter.system.atomic import UMASK, DirSync, atomic_open, atomic_write_text
+
+
+class AtomicTestCase(TestCase):
+    def setUp(self):
+        self.tmpdir = TemporaryDirectory()
+        self.root = Path(self.tmpdir.name)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_replace(self):
+        path = self.root / "a" / "b.md"
+        atomic_write_text(path, "old")
+        atomic_write_text(path, "new", fsync=True)
+        self.assertEqual("new", path.read_text())
+        self.assertListEqual([path], list(path.parent.iterdir()))
+
+    def test_interrupted(self):
+        path = self.root / "page.wiki"
+        atomic_write_text(path, "old")
+        with self.assertRaises(KeyboardInterrupt):
+            with atomic_open(path, "wt") as f:
+                f.write("partial")
+                raise KeyboardInterrupt
+        self.assertEqual("old", path.read_text())
+        self.assertListEqual([path], list(self.root.iterdir()))
+
+    @skipIf(os.name == "nt", "Windows has no POSIX file modes")
+    def test_permissions(self):
+        path = self.root / "page.md"
+        atomic_write_text(path, "new")
+        self.assertEqual(0o666 & ~UMASK, path.stat().st_mode & 0o777)
+
+        os.chmod(path, 0o640)
+        atomic_write_text(path, "replaced")
+        self.assertEqual(0o640, path.stat().st_mode & 0o777)
+
+        atomic_write_text(path, "secret", permissions=0o600)
+        self.assertEqual(0o600, path.stat().st_mode & 0o777)
+
+    def test_dir_sync(self):
+        dir_sync = DirSync(enabled=True)
+        dir_sync.update([self.root / "a.md", self.root / "b.md"])
+        dir_sync.add(self.root / "c.md")
+        self.assertEqual(1, dir_sync.sync())
+        self.assertEqual(0, dir_sync.sync())
+        self.assertEqual(0, DirSync().sync())
+
+
+if __name__ == "__main__":
+    main()
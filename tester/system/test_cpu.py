@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main
+
+from mwfilter.system.cpu import cgroup_cpu_quota, usable_cpu_count
+
+
+class CpuTestCase(TestCase):
+    def test_cgroup_v2(self):
+        with TemporaryDirectory() as tmpdir:
+            (Path(tmpdir) / "cpu.max").write_text("150000 100000\n")
+            self.assertEqual(1.5, cgroup_cpu_quota(tmpdir))
+            self.assertGreaterEqual(2, usable_cpu_count(tmpdir))
+
+    def test_cgroup_v2_unlimited(self):
+        with TemporaryDirectory() as tmpdir:
+            (Path(tmpdir) / "cpu.max").write_text("max 100000\n")
+            self.assertIsNone(cgroup_cpu_quota(tmpdir))
+
+    def test_cgroup_v1(self):
+        with TemporaryDirectory() as tmpdir:
+            cpu_dir = Path(tmpdir) / "cpu,cpuacct"
+            cpu_dir.mkdir()
+            (cpu_dir / "cpu.cfs_quota_us").write_text("200000\n")
+            (cpu_dir / "cpu.cfs_period_us").write_text("100000\n")
+            self.assertEqual(2.0, cgroup_cpu_quota(tmpdir))
+
+    def test_cgroup_v1_unlimited(self):
+        with TemporaryDirectory() as tmpdir:
+            cpu_dir = Path(tmpdir) / "cpu"
+            cpu_dir.mkdir()
+            (cpu_dir / "cpu.cfs_quota_us").write_text("-1\n")
+            (cpu_dir / "cpu.cfs_period_us").write_text("100000\n")
+            self.assertIsNone(cgroup_cpu_quota(tmpdir))
+
+    def test_no_cgroup(self):
+        with TemporaryDirectory() as tmpdir:
+            self.assertIsNone(cgroup_cpu_quota(tmpdir))
+            self.assertLessEqual(1, usable_cpu_count(tmpdir))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+
+import json
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main
+
+from mwfilter.system.metrics import MetricsRegistry
+
+
+class MetricsTestCase(TestCase):
+    def test_counter(self):
+        registry = MetricsRegistry()
+        registry.inc("pages_total")
+        registry.inc("pages_total", 2)
+        registry.inc("pages_total", kind="image")
+        self.assertEqual(3, registry.value("pages_total"))
+        self.assertEqual(1, registry.value("pages_total", kind="image"))
+        with self.assertRaises(TypeError):
+            registry.set("pages_total", 1)
+
+    def test_histogram(self):
+        registry = MetricsRegistry()
+        for value in (0.1, 0.5, 2.0, 100.0):
+            registry.observe("latency_seconds", value, buckets=(0.1, 1.0))
+        histogram = registry.histogram("latency_seconds")
+        assert histogram is not None
+        self.assertEqual(4, histogram.count)
+        expected = [(0.1, 1), (1.0, 2), (float("inf"), 4)]
+        self.assertEqual(expected, histogram.cumulative())
+
+    def test_prometheus(self):
+        registry = MetricsRegistry()
+        registry.set_constant_labels(host='a"b')
+        registry.inc("pages_total", 3)
+        registry.observe("latency_seconds", 0.2, buckets=(1.0,))
+        text = registry.as_prometheus()
+        self.assertIn("# TYPE pages_total counter\n", text)
+        self.assertIn('pages_total{host="a\\"b"} 3\n', text)
+        self.assertIn('latency_seconds_bucket{host="a\\"b",le="+Inf"} 1\n', text)
+        self.assertIn('latency_seconds_count{host="a\\"b"} 1\n', text)
+
+    def test_save_json(self):
+        registry = MetricsRegistry()
+        registry.inc("pages_total")
+        with TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "metrics.json"
+            registry.save(str(path))
+            obj = json.loads(path.read_text())
+            self.assertEqual(["metrics.json"], [p.name for p in Path(tmpdir).iterdir()])
+        samples = obj["metrics"]["pages_total"]["samples"]
+        self.assertEqual([{"labels": {}, "value": 1}], samples)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+
+from queue import Queue
+from threading import Event, Thread
+from unittest import TestCase, main
+
+from mwfilter.system.pipeline import (
+    iter_until_stopped,
+    put_until_stopped,
+    wait_until_stopped,
+)
+
+
+class PipelineTestCase(TestCase):
+    def test_stream(self):
+        queue: Queue = Queue(maxsize=2)
+        stop = Event()
+
+        def _produce():
+            for i in range(10):
+                put_until_stopped(queue, i, stop)
+            put_until_stopped(queue, None, stop)
+
+        producer = Thread(target=_produce)
+        producer.start()
+        self.assertListEqual(list(range(10)), list(iter_until_stopped(queue, stop)))
+        producer.join()
+
+    def test_stopped_put(self):
+        queue: Queue = Queue(maxsize=1)
+        stop = Event()
+        self.assertTrue(put_until_stopped(queue, 1, stop))
+
+        # A full queue no longer blocks the producer once the pipeline is stopped.
+        Thread(target=stop.set).start()
+        self.assertFalse(put_until_stopped(queue, 2, stop))
+        self.assertListEqual([], list(iter_until_stopped(queue, stop)))
+
+    def test_wait(self):
+        event = Event()
+        stop = Event()
+        event.set()
+        self.assertTrue(wait_until_stopped(event, stop))
+        stop.set()
+        self.assertFalse(wait_until_stopped(Event(), stop))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+
+from unittest import TestCase, main
+
+from mwfilter.system.progress import Progress, format_seconds
+
+
+class ProgressTestCase(TestCase):
+    def test_format_seconds(self):
+        self.assertEqual("00:00:00", format_seconds(0))
+        self.assertEqual("00:01:05", format_seconds(65))
+        self.assertEqual("02:00:01", format_seconds(7201))
+
+    def test_eta(self):
+        progress = Progress(10, start=0.0)
+        self.assertIsNone(progress.eta)
+        progress.update(5)
+        self.assertEqual(5, progress.remaining)
+        self.assertEqual(50.0, progress.percent)
+        eta = progress.eta
+        self.assertIsNotNone(eta)
+        assert eta is not None
+        self.assertAlmostEqual(progress.elapsed, eta, delta=1.0)
+
+    def test_cancel(self):
+        progress = Progress(10)
+        progress.update(4)
+        progress.cancel(2)
+        self.assertEqual(8, progress.total)
+        self.assertEqual(4, progress.remaining)
+        progress.cancel(10)
+        self.assertEqual(4, progress.total)
+        self.assertEqual(100.0, progress.percent)
+
+    def test_empty(self):
+        progress = Progress(0)
+        self.assertEqual(100.0, progress.percent)
+        self.assertEqual(0, progress.remaining)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+
+from concurrent.futures import ThreadPoolExecutor
+from time import monotonic
+from unittest import TestCase, main
+
+from mwfilter.system.rate_limit import RateLimiter
+
+
+class RateLimitTestCase(TestCase):
+    def test_acquire(self):
+        limiter = RateLimiter(100.0)
+        self.assertAlmostEqual(0.01, limiter.interval)
+        self.assertEqual(0.0, limiter.acquire())
+        self.assertLess(0.0, limiter.acquire())
+
+    def test_concurrent_acquire(self):
+        limiter = RateLimiter(200.0)
+        begin = monotonic()
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            delays = list(executor.map(lambda _: limiter.acquire(), range(11)))
+        elapsed = monotonic() - begin
+
+        # Ten intervals between eleven requests, however many jobs share it.
+        self.assertLessEqual(0.05 - 0.005, elapsed)
+        self.assertEqual(1, sum(1 for d in delays if d <= 0))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+
+from unittest import TestCase, main
+
+from mwfilter.system.shard import Shard, parse_shard, selection_digest, shard_index
+
+
+class ShardTestCase(TestCase):
+    def test_parse_shard(self):
+        self.assertEqual(Shard(2, 4), parse_shard("2/4"))
+        self.assertEqual("2/4", str(parse_shard("2/4")))
+        for value in ("0/4", "5/4", "1", "a/b", "1/0"):
+            with self.subTest(value=value):
+                with self.assertRaises(ValueError):
+                    parse_shard(value)
+
+    def test_disjoint_cover(self):
+        names = [f"Page_{i:03}" for i in range(200)]
+        shards = [Shard(i, 4) for i in range(1, 5)]
+        slices = [[n for n in names if s.includes(n)] for s in shards]
+        self.assertListEqual(names, sorted(n for s in slices for n in s))
+        for part in slices:
+            self.assertLess(20, len(part))
+
+    def test_stable(self):
+        # The assignment must never change between processes or releases.
+        self.assertEqual(shard_index("Main_Page", 7), shard_index("Main_Page", 7))
+        self.assertListEqual(
+            [1, 1, 1],
+            [shard_index(name, 1) for name in ("A", "B", "C")],
+        )
+        self.assertEqual(selection_digest(["B", "A"]), selection_digest(["A", "B"]))
+
+
+if __name__ == "__main__":
+    main()
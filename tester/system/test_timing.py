@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+
+from unittest import TestCase, main
+
+from mwfilter.system.timing import (
+    StageTimer,
+    current_timer,
+    timing,
+    timing_page,
+    use_timer,
+)
+
+
+class TimingTestCase(TestCase):
+    def test_no_timer(self):
+        self.assertIsNone(current_timer())
+        with timing("stage"):
+            pass
+
+    def test_pages(self):
+        timer = StageTimer()
+        with use_timer(timer):
+            with timing("discover"):
+                pass
+            with timing_page("A"):
+                with timing("read"):
+                    pass
+                with timing("read"):
+                    pass
+            with timing_page("B"), timing("dump"):
+                pass
+        self.assertIsNone(current_timer())
+
+        self.assertEqual(1, timer.stages["discover"].count)
+        self.assertEqual(2, timer.stages["read"].count)
+        self.assertEqual({"A", "B"}, set(timer.pages.keys()))
+        self.assertEqual(["read"], list(timer.pages["A"].keys()))
+        self.assertEqual(2, len(timer.slowest_pages(2)))
+        self.assertIn("Top 1 slowest pages", timer.report(1))
+
+    def test_merge(self):
+        worker = StageTimer(keep_records=True)
+        with use_timer(worker, "A"), timing("pandoc"):
+            pass
+        self.assertEqual(1, len(worker.records()))
+
+        timer = StageTimer()
+        timer.merge(worker.records())
+        timer.merge(worker.records())
+        self.assertEqual(2, timer.stages["pandoc"].count)
+        self.assertEqual([], timer.records())
+
+
+if __name__ == "__main__":
+    main()
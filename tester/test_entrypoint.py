@@ -2,9 +2,11 @@
 
 from contextlib import redirect_stdout
 from io import StringIO
+from tempfile import TemporaryDirectory
 from unittest import TestCase, main
 
 from mwfilter.arguments import version
+from mwfilter.benchmark.imports import loaded_heavy_modules
 from mwfilter.entrypoint import main as entrypoint_main
 
 
@@ -20,6 +22,13 @@ class EntrypointTestCase(TestCase):
         self.assertEqual(0, code)
         self.assertEqual(version(), buffer.getvalue().strip())
 
+    def test_lightweight_imports(self):
+        self.assertEqual([], loaded_heavy_modules(["--version"]))
+        self.assertEqual([], loaded_heavy_modules(["--help"]))
+        with TemporaryDirectory() as tmpdir:
+            cmdline = ["-H", "localhost", "-C", tmpdir, "clean"]
+            self.assertEqual([], loaded_heavy_modules(cmdline))
+
 
 if __name__ == "__main__":
     main()